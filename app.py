@@ -1,11 +1,35 @@
-from flask import Flask, render_template, request, jsonify, flash, redirect, url_for
+from flask import Flask, render_template, request, jsonify, flash, redirect, url_for, Response, stream_with_context, session, make_response
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from flask_mail import Mail, Message
 from datetime import datetime, timezone, UTC
-from models import db, User, WasteCollection, RecyclingCenter, Incentive, WasteStatistics, PickupSchedule, RecyclingActivity, WasteGuideline, UserLogin
+from models import db, User, WasteCollection, RecyclingCenter, Incentive, WasteStatistics, PickupSchedule, RecyclingActivity, WasteGuideline, UserLogin, GreenActivity
+from migrations import upgrade_database
+from pagination import keyset_page, keyset_filter, clamp_limit, MAX_STREAM_ROWS
+from spatial_index import center_index
+from tile_clusters import tile_cache, tiles_for_bbox, MAX_ZOOM
+from bulk_ingest import ingest
+from scoring import get_rules
+from app_logging import init_logging
+from db_profiles import database_uri, engine_options, apply_profile
+from login_audit import audit_writer
+from passwords import hasher, HashingBusy
+from user_cache import user_cache
+from guidelines_cache import guidelines_cache
+from waste_charts import chart_cache, BUCKETS
+from assets import init_assets
+from geocoding import geocode_service
+from route_planning import plan_day
+from slots import zone_for_address, book_slot, release_slot, slot_status, nearest_free_slot
+from leaderboard import leaderboard, PERIODS
+from carbon import record_collection_carbon, record_green_activity, carbon_summary
+from exports import Export, ExportUnavailable
+from metrics import request_metrics
+from db_diagnostics import diagnostics
+from rollups import record_collection_added, record_collection_removed, set_collection_status, get_user_totals, sync_user_statistics, start_statistics_refresher, rollups_missing, rebuild_rollups
 import os
+import math
+import json
 from dotenv import load_dotenv
-from werkzeug.security import generate_password_hash, check_password_hash
 from sqlalchemy import inspect
 
 # Load environment variables
@@ -21,9 +45,13 @@ if not os.path.exists(instance_path):
 
 # Configure Flask app
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-here')
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(instance_path, 'ecotrack.db')}"
+app.config['SQLALCHEMY_DATABASE_URI'] = database_uri(instance_path)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Database deployment profile (default, sqlite-wal or postgres)
+app.config['DB_PROFILE'] = os.getenv('DB_PROFILE', 'default')
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['DB_PROFILE'])
+
 # Email Configuration
 app.config['MAIL_SERVER'] = os.getenv('MAIL_SERVER', 'smtp.gmail.com')
 app.config['MAIL_PORT'] = int(os.getenv('MAIL_PORT', '587'))
@@ -36,9 +64,92 @@ app.config['UPLOAD_FOLDER'] = os.getenv('UPLOAD_FOLDER', 'uploads')
 app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_CONTENT_LENGTH', 16777216))
 app.config['ALLOWED_EXTENSIONS'] = set(os.getenv('ALLOWED_EXTENSIONS', 'png,jpg,jpeg,gif').split(','))
 
+# Statistics Configuration (seconds WasteStatistics may lag behind the rollups, 0 disables the refresher)
+app.config['STATS_MAX_STALENESS'] = int(os.getenv('STATS_MAX_STALENESS', '300'))
+
+# Bulk ingestion (partners sending this token in X-Ingest-Token may add rows for any user)
+app.config['BULK_INGEST_TOKEN'] = os.getenv('BULK_INGEST_TOKEN')
+
+# Recycling center index (seconds before other workers' center changes are picked up)
+app.config['CENTER_INDEX_TTL'] = int(os.getenv('CENTER_INDEX_TTL', '300'))
+center_index.ttl_seconds = app.config['CENTER_INDEX_TTL']
+
+# Rendered /guidelines cache (guideline edits from other workers show up within the TTL)
+app.config['GUIDELINES_CACHE_TTL'] = int(os.getenv('GUIDELINES_CACHE_TTL', '300'))
+guidelines_cache.ttl_seconds = app.config['GUIDELINES_CACHE_TTL']
+
+# Logging Configuration (DEBUG records are kept for LOG_DEBUG_SAMPLE_RATE of requests)
+app.config['LOG_LEVEL'] = os.getenv('LOG_LEVEL', 'INFO')
+app.config['LOG_DEBUG_SAMPLE_RATE'] = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', '0'))
+app.config['LOG_QUEUE_SIZE'] = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+
+# Login audit (events are batched by a background writer unless LOGIN_AUDIT_ASYNC is false)
+app.config['LOGIN_AUDIT_ASYNC'] = os.getenv('LOGIN_AUDIT_ASYNC', 'True').lower() == 'true'
+app.config['LOGIN_AUDIT_QUEUE_SIZE'] = int(os.getenv('LOGIN_AUDIT_QUEUE_SIZE', '10000'))
+app.config['LOGIN_AUDIT_FLUSH_MS'] = int(os.getenv('LOGIN_AUDIT_FLUSH_MS', '200'))
+app.config['LOGIN_AUDIT_FLUSH_SIZE'] = int(os.getenv('LOGIN_AUDIT_FLUSH_SIZE', '500'))
+# Operator endpoints (login audit metrics, db diagnostics) need OPS_TOKEN in X-Ops-Token
+app.config['OPS_TOKEN'] = os.getenv('OPS_TOKEN')
+
+# Password hashing (werkzeug method string with its work factor, hashed on a process pool)
+app.config['PASSWORD_HASH_METHOD'] = os.getenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+app.config['PASSWORD_HASH_WORKERS'] = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))
+app.config['PASSWORD_HASH_MAX_PENDING'] = int(os.getenv('PASSWORD_HASH_MAX_PENDING', '8'))
+app.config['PASSWORD_HASH_TIMEOUT'] = float(os.getenv('PASSWORD_HASH_TIMEOUT', '5'))
+
+# Cache of logged-in users for load_user (USER_CACHE_TTL=0 disables it)
+app.config['USER_CACHE_TTL'] = float(os.getenv('USER_CACHE_TTL', '30'))
+app.config['USER_CACHE_SIZE'] = int(os.getenv('USER_CACHE_SIZE', '10000'))
+app.config['USER_CACHE_REDIS_URL'] = os.getenv('USER_CACHE_REDIS_URL')
+
+# Fingerprinted assets in static/dist (built by build_assets.py) are cached this long
+app.config['ASSET_MAX_AGE'] = int(os.getenv('ASSET_MAX_AGE', str(365 * 24 * 3600)))
+
+# Pickup route planning (dispatch tools send DISPATCH_TOKEN in X-Dispatch-Token)
+app.config['DISPATCH_TOKEN'] = os.getenv('DISPATCH_TOKEN')
+app.config['GEOCODER'] = os.getenv('GEOCODER', 'geocoding:GazetteerGeocoder')
+app.config['GEOCODER_GAZETTEER'] = os.getenv('GEOCODER_GAZETTEER')
+if os.getenv('ROUTE_DEPOT'):
+    app.config['ROUTE_DEPOT'] = tuple(float(value) for value in os.getenv('ROUTE_DEPOT').split(','))
+app.config['ROUTE_VEHICLE_CAPACITY_KG'] = float(os.getenv('ROUTE_VEHICLE_CAPACITY_KG', '1000'))
+app.config['ROUTE_MAX_STOPS'] = int(os.getenv('ROUTE_MAX_STOPS', '40'))
+app.config['ROUTE_CLUSTER_SIZE'] = int(os.getenv('ROUTE_CLUSTER_SIZE', '150'))
+app.config['ROUTE_DEFAULT_QUANTITY_KG'] = float(os.getenv('ROUTE_DEFAULT_QUANTITY_KG', '5'))
+
+# Pickup slots per day and zone (PIN code); suggestions look this many days either side
+app.config['PICKUP_SLOT_CAPACITY'] = int(os.getenv('PICKUP_SLOT_CAPACITY', '50'))
+app.config['PICKUP_SLOT_HORIZON_DAYS'] = int(os.getenv('PICKUP_SLOT_HORIZON_DAYS', '14'))
+
+# Compliance exports of any user or every user need EXPORT_TOKEN in X-Export-Token
+app.config['EXPORT_TOKEN'] = os.getenv('EXPORT_TOKEN')
+
+# Per-endpoint latency and SQL metrics at /metrics (Prometheus scrapers send METRICS_TOKEN as a bearer token)
+app.config['METRICS_ENABLED'] = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+app.config['METRICS_TOKEN'] = os.getenv('METRICS_TOKEN')
+# Requests running one SQL statement this many times are logged as possible N+1 queries
+app.config['N_PLUS_ONE_THRESHOLD'] = int(os.getenv('N_PLUS_ONE_THRESHOLD', '10'))
+
+# Statements slower than this (ms) are kept for /db-diagnostics, 0 disables
+app.config['SLOW_QUERY_MS'] = float(os.getenv('SLOW_QUERY_MS', '100'))
+# Approximate row counts on /db-diagnostics are cached this long (seconds)
+app.config['DB_DIAGNOSTICS_TTL'] = int(os.getenv('DB_DIAGNOSTICS_TTL', '300'))
+
+# Leaderboards are rebuilt from the database this often (seconds) to pick up other workers' changes
+app.config['LEADERBOARD_REFRESH'] = int(os.getenv('LEADERBOARD_REFRESH', '300'))
+
 # Initialize extensions
-print(f"Database URI: {app.config['SQLALCHEMY_DATABASE_URI']}")  # Debug print
+logger = init_logging(app)
+logger.debug("Database URI: %s", app.config['SQLALCHEMY_DATABASE_URI'])
 db.init_app(app)
+apply_profile(app, db, app.config['DB_PROFILE'])
+audit_writer.init_app(app)
+hasher.init_app(app)
+user_cache.init_app(app)
+init_assets(app)
+request_metrics.init_app(app)
+diagnostics.init_app(app)
+geocode_service.init_app(app)
+leaderboard.init_app(app)
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
@@ -47,7 +158,15 @@ mail = Mail(app)
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    return user_cache.load(int(user_id))
+
+@app.before_request
+def ensure_statistics_refresher():
+    start_statistics_refresher(app)
+
+@app.before_request
+def ensure_leaderboard():
+    leaderboard.start(app)
 
 # Authentication routes
 @app.route('/login', methods=['GET', 'POST'])
@@ -68,35 +187,30 @@ def login():
             if user and user.check_password(password):
                 # Successful login
                 login_user(user)
+
+                # Upgrade hashes stored with an older method or work factor
+                if user.password_needs_rehash():
+                    user.set_password(password)
+                    db.session.commit()
                 
                 # Record successful login
-                login_record = UserLogin(
-                    user_id=user.id,
-                    ip_address=ip_address,
-                    user_agent=user_agent,
-                    status='success'
-                )
-                db.session.add(login_record)
-                db.session.commit()
+                audit_writer.record(user.id, ip_address, user_agent, 'success')
                 
                 flash('Welcome back!', 'success')
                 return redirect(url_for('dashboard'))
             else:
                 # Record failed login attempt if user exists
                 if user:
-                    login_record = UserLogin(
-                        user_id=user.id,
-                        ip_address=ip_address,
-                        user_agent=user_agent,
-                        status='failed'
-                    )
-                    db.session.add(login_record)
-                    db.session.commit()
+                    audit_writer.record(user.id, ip_address, user_agent, 'failed')
                 
                 flash('Invalid email or password', 'danger')
                 
+        except HashingBusy:
+            logger.warning("Password hashing pool saturated, rejecting login")
+            db.session.rollback()
+            flash('The server is busy right now. Please try again in a moment.', 'warning')
         except Exception as e:
-            print(f"Login error: {e}")
+            logger.exception("Login error: %s", e)
             db.session.rollback()
             flash('An error occurred during login. Please try again.', 'danger')
     
@@ -160,9 +274,14 @@ def register():
             flash('Registration successful! Welcome to EcoTrack!', 'success')
             return redirect(url_for('dashboard'))
             
+        except HashingBusy:
+            logger.warning("Password hashing pool saturated, rejecting registration")
+            db.session.rollback()
+            flash('The server is busy right now. Please try again in a moment.', 'warning')
+            return redirect(url_for('register'))
         except Exception as e:
             db.session.rollback()
-            print(f"Registration error: {str(e)}")
+            logger.exception("Registration error: %s", e)
             flash('An error occurred during registration. Please try again.', 'danger')
             return redirect(url_for('register'))
             
@@ -186,36 +305,16 @@ def home():
 @login_required
 def dashboard():
     try:
-        # Get waste collections for calculations
-        waste_collections = WasteCollection.query.filter_by(user_id=current_user.id).order_by(WasteCollection.created_at.desc()).all()
-        
-        # Calculate totals
-        total_waste = sum(float(collection.quantity) for collection in waste_collections) if waste_collections else 0.0
-        recycled_waste = sum(float(collection.quantity) for collection in waste_collections if collection.status == 'Recycled') if waste_collections else 0.0
-        carbon_offset = recycled_waste * 2.5  # Example: 2.5 kg CO2 per kg recycled
-        
-        # Get or create waste statistics
-        stats = WasteStatistics.query.filter_by(user_id=current_user.id).order_by(WasteStatistics.date.desc()).first()
+        # Read totals from the per-type/per-status rollup instead of scanning every collection
+        total_waste, recycled_waste = get_user_totals(current_user.id)
+        carbon_offset = get_rules().recycled_carbon_offset(recycled_waste)
         
-        if not stats:
-            # Create new statistics record
-            stats = WasteStatistics(
-                user_id=current_user.id,
-                total_waste=total_waste,
-                recycled_waste=recycled_waste,
-                carbon_offset=carbon_offset,
-                waste_type='Total',
-                date=datetime.now(UTC).date()
-            )
-            db.session.add(stats)
-            db.session.commit()
-        else:
-            # Update existing statistics
-            stats.total_waste = total_waste
-            stats.recycled_waste = recycled_waste
-            stats.carbon_offset = carbon_offset
-            stats.date = datetime.now(UTC).date()
-            db.session.commit()
+        # Read-only: WasteStatistics is kept fresh by the write endpoints and the refresher
+        stats = {
+            'total_waste': total_waste,
+            'recycled_waste': recycled_waste,
+            'carbon_offset': carbon_offset
+        }
         
         # Get recent activities
         activities = RecyclingActivity.query.filter_by(user_id=current_user.id).order_by(RecyclingActivity.date.desc()).limit(5).all()
@@ -223,18 +322,16 @@ def dashboard():
         return render_template('dashboard.html', 
                              stats=[stats],  # Wrap in list since template expects iterable
                              activities=activities,
-                             waste_collections=waste_collections,
                              total_waste=total_waste,
                              recycled_waste=recycled_waste,
                              carbon_offset=carbon_offset)
                              
     except Exception as e:
-        print(f"Dashboard error: {e}")
+        logger.exception("Dashboard error: %s", e)
         flash('Error loading dashboard data', 'danger')
         return render_template('dashboard.html', 
                              stats=[{'total_waste': 0, 'recycled_waste': 0, 'carbon_offset': 0}],
                              activities=[],
-                             waste_collections=[],
                              total_waste=0,
                              recycled_waste=0,
                              carbon_offset=0)
@@ -276,6 +373,23 @@ def schedule_pickup():
                 return redirect(url_for('schedule_pickup'))
 
             try:
+                # Reserve a slot for the day in the pickup's zone before booking
+                zone = zone_for_address(address)
+                if not book_slot(pickup_date.date(), zone, app.config['PICKUP_SLOT_CAPACITY']):
+                    db.session.rollback()
+                    suggestion = nearest_free_slot(
+                        pickup_date.date(), zone, app.config['PICKUP_SLOT_CAPACITY'],
+                        earliest=datetime.now(UTC).date(),
+                        horizon_days=app.config['PICKUP_SLOT_HORIZON_DAYS']
+                    )
+                    if suggestion:
+                        flash(f'No pickup slots are left on {pickup_date:%Y-%m-%d} in your area. '
+                              f'The nearest available date is {suggestion:%Y-%m-%d}.', 'warning')
+                    else:
+                        flash(f'No pickup slots are left on {pickup_date:%Y-%m-%d} in your area. '
+                              'Please try a later date.', 'warning')
+                    return redirect(url_for('schedule_pickup'))
+
                 # Create new pickup schedule
                 new_pickup = PickupSchedule(
                     user_id=current_user.id,
@@ -284,19 +398,12 @@ def schedule_pickup():
                     quantity_estimate=quantity,
                     pickup_address=address,
                     special_instructions=instructions,
-                    status='Scheduled'
+                    status='Scheduled',
+                    zone=zone
                 )
 
                 # Points calculation
-                points_per_kg = {
-                    'Plastic': 15,
-                    'Paper': 10,
-                    'Glass': 12,
-                    'Metal': 20,
-                    'Organic': 8,
-                    'Electronic': 25
-                }
-                base_points = int(quantity * points_per_kg.get(waste_type, 10))
+                base_points = get_rules().collection_points(waste_type, quantity)
 
                 # Create recycling activity
                 activity = RecyclingActivity(
@@ -304,7 +411,8 @@ def schedule_pickup():
                     activity_type='Pickup Scheduled',
                     description=f'Scheduled {quantity} kg of {waste_type} waste pickup',
                     points_earned=base_points,
-                    date=datetime.now(UTC)
+                    date=datetime.now(UTC),
+                    pickup_schedule=new_pickup
                 )
 
                 # Add to database and commit
@@ -312,7 +420,7 @@ def schedule_pickup():
                 db.session.add(activity)
                 
                 # Update user points
-                current_user.points += base_points
+                current_user.add_points(base_points)
                 
                 # Commit all changes
                 db.session.commit()
@@ -322,7 +430,7 @@ def schedule_pickup():
 
             except Exception as e:
                 db.session.rollback()
-                print(f"Database Error: {str(e)}")
+                logger.exception("Error scheduling pickup: %s", e)
                 flash('Failed to schedule pickup. Please try again.', 'danger')
                 return redirect(url_for('schedule_pickup'))
 
@@ -336,18 +444,18 @@ def schedule_pickup():
         return render_template('schedule.html', existing_pickups=existing_pickups)
 
     except Exception as e:
-        print(f"Unexpected error: {str(e)}")
+        logger.exception("Unexpected error in schedule_pickup: %s", e)
         flash('An unexpected error occurred.', 'danger')
         return redirect(url_for('dashboard'))
 
 @app.route('/locator')
 def recycling_centers():
     try:
-        # Fetch all active recycling centers
-        centers = RecyclingCenter.query.filter_by(is_active=True).all()
+        # Centers are loaded by the map per tile, only check whether any exist
+        has_centers = RecyclingCenter.query.filter_by(is_active=True).first() is not None
         
         # If no centers exist, add sample data for Bangalore area
-        if not centers:
+        if not has_centers:
             sample_centers = [
                 RecyclingCenter(
                     name='EcoRecycle Center',
@@ -382,37 +490,74 @@ def recycling_centers():
                 for center in sample_centers:
                     db.session.add(center)
                 db.session.commit()
-                centers = sample_centers
             except Exception as db_error:
                 db.session.rollback()
-                print(f"Error adding sample centers: {str(db_error)}")
+                logger.error("Error adding sample centers: %s", db_error)
                 raise
         
-        # Prepare centers data for template
-        centers_data = []
-        for center in centers:
-            center_data = {
-                'id': center.id,
-                'name': center.name,
-                'address': center.address,
-                'contact': center.contact_number,
-                'latitude': float(center.latitude),
-                'longitude': float(center.longitude),
-                'operating_hours': center.operating_hours,
-                'waste_types': ['Plastic', 'Paper', 'Glass', 'Metal', 'Electronic', 'Organic']
-            }
-            centers_data.append(center_data)
-        
-        return render_template('locator.html', centers=centers_data)
+        return render_template('locator.html',
+                             waste_types=['Plastic', 'Paper', 'Glass', 'Metal', 'Electronic', 'Organic'])
     
     except Exception as e:
-        import traceback
-        print(f"Error in recycling_centers route: {str(e)}")
-        print("Traceback:")
-        traceback.print_exc()
+        logger.exception("Error in recycling_centers route: %s", e)
         flash('Unable to load recycling centers. Please try again later.', 'danger')
         return redirect(url_for('dashboard'))
 
+@app.route('/api/centers/nearest')
+def nearest_centers():
+    lat = request.args.get('lat', type=float)
+    lng = request.args.get('lng', type=float)
+    k = request.args.get('k', 10, type=int)
+    radius_km = request.args.get('radius_km', type=float)
+
+    if lat is None or lng is None or not (-90 <= lat <= 90) or not (-180 <= lng <= 180):
+        return jsonify({'error': 'Valid lat and lng parameters are required'}), 400
+    if not (1 <= k <= 100):
+        return jsonify({'error': 'k must be between 1 and 100'}), 400
+    if radius_km is not None and radius_km <= 0:
+        return jsonify({'error': 'radius_km must be positive'}), 400
+
+    try:
+        results = center_index.nearest(lat, lng, k=k, radius_km=radius_km)
+        return jsonify({
+            'centers': [dict(center, distance_km=round(distance, 3)) for distance, center in results]
+        })
+    except Exception as e:
+        logger.exception("Error in nearest_centers: %s", e)
+        return jsonify({'error': 'Failed to search recycling centers'}), 500
+
+@app.route('/api/centers/tiles/<int:z>/<int:x>/<int:y>')
+def center_tile(z, x, y):
+    if not (0 <= z <= MAX_ZOOM) or not (0 <= x < 2 ** z) or not (0 <= y < 2 ** z):
+        return jsonify({'error': 'Invalid tile coordinates'}), 400
+
+    response = jsonify({'z': z, 'x': x, 'y': y, 'clusters': tile_cache.get(z, x, y)})
+    response.headers['Cache-Control'] = 'public, max-age=60'
+    return response
+
+@app.route('/api/centers/clusters')
+def center_clusters():
+    # Clustered centers for a map viewport, assembled from cached tiles
+    try:
+        south, west, north, east = [float(value) for value in request.args.get('bbox', '').split(',')]
+        zoom = request.args.get('zoom', type=int)
+    except ValueError:
+        return jsonify({'error': 'bbox must be south,west,north,east'}), 400
+    if not all(math.isfinite(value) for value in (south, west, north, east)):
+        # float() accepts nan and inf, which the tile maths cannot turn into tile numbers
+        return jsonify({'error': 'bbox must be finite numbers'}), 400
+    if zoom is None or not (0 <= zoom <= MAX_ZOOM) or south > north or west > east:
+        return jsonify({'error': 'Valid bbox and zoom parameters are required'}), 400
+
+    tiles = tiles_for_bbox(south, west, north, east, zoom)
+    if len(tiles) > 64:
+        return jsonify({'error': 'Viewport covers too many tiles, zoom in'}), 400
+
+    clusters = []
+    for z, x, y in tiles:
+        clusters.extend(tile_cache.get(z, x, y))
+    return jsonify({'zoom': zoom, 'clusters': clusters})
+
 @app.route('/incentives')
 @login_required
 def incentives():
@@ -422,40 +567,43 @@ def incentives():
 
 @app.route('/guidelines')
 def guidelines():
-    guidelines = WasteGuideline.query.all()
-    return render_template('guidelines.html', guidelines=guidelines)
+    entry = guidelines_cache.get()
+
+    # Anonymous visitors with no pending flash messages all see the same page
+    if not current_user.is_authenticated and '_flashes' not in session:
+        page, etag = guidelines_cache.anonymous_page(
+            entry, lambda fragment: render_template('guidelines.html', guidelines_html=fragment)
+        )
+        response = make_response(page)
+        response.set_etag(etag)
+        response.cache_control.public = True
+    else:
+        # The navbar shows the user's points, so only the guidelines fragment is shared
+        response = make_response(render_template('guidelines.html', guidelines_html=entry.fragment))
+        response.add_etag()
+        response.cache_control.private = True
+    response.last_modified = entry.last_modified
+    response.cache_control.no_cache = True
+    response.vary.add('Cookie')
+    return response.make_conditional(request)
 
 @app.route('/waste-details', methods=['GET'])
 @login_required
 def waste_details():
     try:
-        # Debug: Print current user information
-        print(f"Current User ID: {current_user.id}")
-        print(f"Current User Email: {current_user.email}")
-        
         # Fetch waste collections for the current user, ordered by most recent first
         waste_collections = WasteCollection.query.filter_by(user_id=current_user.id).order_by(WasteCollection.created_at.desc()).limit(50).all()
         
-        # Debug: Print number of waste collections
-        print(f"Number of Waste Collections: {len(waste_collections)}")
+        logger.debug("Loaded %d waste collections", len(waste_collections))
+        
+        # Calculate points for all collections in one pass
+        points = get_rules().score_collections(
+            (collection.waste_type, collection.quantity, collection.status) for collection in waste_collections
+        )
         
         # Prepare collections data with additional formatting
         collections_data = []
-        for collection in waste_collections:
-            # Debug: Print each collection details
-            print(f"Collection Details: ID={collection.id}, Type={collection.waste_type}, Quantity={collection.quantity}, Status={collection.status}")
-            
-            # Calculate points for this collection
-            points_per_kg = {
-                'Plastic': 15, 'Paper': 10, 'Glass': 12, 
-                'Metal': 20, 'Organic': 8, 'Electronic': 25
-            }
-            base_points = int(collection.quantity * points_per_kg.get(collection.waste_type, 10))
-            
-            # Bonus points for recycled status
-            if collection.status == 'Recycled':
-                base_points = int(base_points * 1.5)
-            
+        for collection, base_points in zip(waste_collections, points):
             collections_data.append({
                 'id': collection.id,
                 'created_at': collection.created_at.strftime('%Y-%m-%d %H:%M'),
@@ -466,26 +614,21 @@ def waste_details():
                 'points_earned': base_points
             })
         
-        # Prepare waste type distribution for chart
-        waste_type_counts = {}
-        for collection in waste_collections:
-            waste_type_counts[collection.waste_type] = waste_type_counts.get(collection.waste_type, 0) + 1
+        # Summary over the full history; the charts fetch their data from the JSON endpoints
+        distribution = chart_cache.distribution(current_user.id)
         
-        # Debug: Print waste type counts
-        print(f"Waste Type Counts: {waste_type_counts}")
+        logger.debug("Waste type distribution: %s", distribution)
         
         return render_template(
             'waste_details.html', 
             waste_collections=waste_collections, 
             collections_data=collections_data,
-            waste_type_counts=waste_type_counts
+            distribution=distribution
         )
     
     except Exception as e:
         # Log the full error details
-        import traceback
-        print(f"Error in waste_details route: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception("Error in waste_details route: %s", e)
         
         # Flash a user-friendly error message
         flash('Unable to load waste details. Please try again later.', 'danger')
@@ -517,24 +660,14 @@ def add_waste_details():
             scheduled_date=current_time
         )
         db.session.add(collection)
+        record_collection_added(collection)
+        record_collection_carbon(collection)
         
-        # Calculate points based on waste quantity and type
-        points_per_kg = {
-            'Plastic': 15,    # Higher points for plastic due to recycling importance
-            'Paper': 10,      # Medium points for paper
-            'Glass': 12,      # Medium-high points for glass
-            'Metal': 20,      # Highest points for metal due to value
-            'Organic': 8      # Lower points for organic waste
-        }
-        
-        base_points = int(quantity * points_per_kg.get(waste_type, 10))  # Default 10 points if type not found
-        
-        # Bonus points for recycled status
-        if status == 'Recycled':
-            base_points = int(base_points * 1.5)  # 50% bonus for recycled waste
+        # Calculate points based on waste quantity, type and recycled bonus
+        base_points = get_rules().collection_points(waste_type, quantity, status)
         
         # Update user's points
-        current_user.points += base_points
+        current_user.add_points(base_points)
         
         # Create recycling activity record
         activity = RecyclingActivity(
@@ -542,28 +675,13 @@ def add_waste_details():
             activity_type='Waste Added',
             description=f'Added {quantity} kg of {waste_type} waste',
             date=current_time,
-            points_earned=base_points
+            points_earned=base_points,
+            waste_collection=collection
         )
         db.session.add(activity)
         
         # Update user's waste statistics
-        stats = WasteStatistics.query.filter_by(user_id=current_user.id).order_by(WasteStatistics.date.desc()).first()
-        if not stats:
-            stats = WasteStatistics(
-                user_id=current_user.id,
-                total_waste=quantity,
-                recycled_waste=quantity if status == 'Recycled' else 0,
-                waste_type=waste_type,
-                date=current_time.date(),
-                carbon_offset=quantity * 2.5 if status == 'Recycled' else 0
-            )
-            db.session.add(stats)
-        else:
-            stats.total_waste += quantity
-            if status == 'Recycled':
-                stats.recycled_waste += quantity
-                stats.carbon_offset += quantity * 2.5
-            stats.date = current_time.date()
+        sync_user_statistics(current_user.id)
         
         db.session.commit()
         flash('Waste details added successfully!', 'success')
@@ -572,11 +690,95 @@ def add_waste_details():
         flash('Please enter a valid quantity', 'danger')
     except Exception as e:
         db.session.rollback()
-        print(f"Error adding waste details: {str(e)}")
+        logger.exception("Error adding waste details: %s", e)
         flash('An error occurred while adding waste details', 'danger')
     
     return redirect(url_for('dashboard'))
 
+@app.route('/api/waste-collections/bulk', methods=['POST'])
+@login_required
+def bulk_add_waste_collections():
+    # Accept CSV or NDJSON uploads of many waste collections at once
+    fmt = request.args.get('format')
+    if not fmt:
+        fmt = 'csv' if request.mimetype in ('text/csv', 'application/csv') else 'ndjson'
+    if fmt not in ('csv', 'ndjson'):
+        return jsonify({'error': 'format must be csv or ndjson'}), 400
+
+    token = app.config['BULK_INGEST_TOKEN']
+    allow_any_user = bool(token) and request.headers.get('X-Ingest-Token') == token
+
+    try:
+        report = ingest(request.stream, fmt, current_user.id, allow_any_user=allow_any_user)
+    except Exception as e:
+        db.session.rollback()
+        logger.exception("Error in bulk waste ingestion: %s", e)
+        return jsonify({'error': 'Failed to process upload'}), 500
+
+    status_code = 200 if report.error_count == 0 else 207
+    return jsonify(report.to_dict()), status_code
+
+@app.route('/api/leaderboard')
+@login_required
+def get_leaderboard():
+    period = request.args.get('period', 'all')
+    if period not in PERIODS:
+        return jsonify({'error': f"period must be one of {', '.join(PERIODS)}"}), 400
+    limit = min(request.args.get('limit', 10, type=int), 100)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+
+    entries, total = leaderboard.top(period, limit, offset)
+    names = dict(db.session.query(User.id, User.username).filter(User.id.in_([entry['user_id'] for entry in entries])))
+    for entry in entries:
+        entry['username'] = names.get(entry['user_id'])
+    rank, points = leaderboard.rank(period, current_user.id)
+    return jsonify({
+        'period': period,
+        'total_users': total,
+        'top': entries,
+        'me': {'rank': rank, 'points': points}
+    })
+
+@app.route('/api/pickup-slots')
+@login_required
+def pickup_slots():
+    try:
+        day = datetime.strptime(request.args.get('date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'date must be YYYY-MM-DD'}), 400
+    zone = request.args.get('zone') or zone_for_address(request.args.get('address', ''))
+
+    capacity = app.config['PICKUP_SLOT_CAPACITY']
+    status = slot_status(day, zone, capacity)
+    if not status['available']:
+        suggestion = nearest_free_slot(day, zone, capacity, earliest=datetime.now(UTC).date(),
+                                       horizon_days=app.config['PICKUP_SLOT_HORIZON_DAYS'])
+        status['suggested_date'] = suggestion.isoformat() if suggestion else None
+    return jsonify(status)
+
+@app.route('/api/pickup-routes')
+@login_required
+def pickup_routes():
+    # Routes expose every user's pickup address, so they are for dispatch only
+    token = app.config['DISPATCH_TOKEN']
+    if not token or request.headers.get('X-Dispatch-Token') != token:
+        return jsonify({'error': 'Dispatch token required'}), 403
+
+    try:
+        day = datetime.strptime(request.args.get('date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'date must be YYYY-MM-DD'}), 400
+
+    try:
+        plan = plan_day(day, app.config, waste_type=request.args.get('waste_type'))
+        # Keep newly geocoded addresses for the next plan
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.exception("Error planning pickup routes: %s", e)
+        return jsonify({'error': 'Failed to plan routes'}), 500
+    return jsonify(plan)
+
 @app.route('/delete-waste/<int:activity_id>', methods=['POST'])
 @login_required
 def delete_waste(activity_id):
@@ -588,98 +790,92 @@ def delete_waste(activity_id):
             flash('Record not found.', 'danger')
             return redirect(url_for('dashboard'))
             
-        # Parse the quantity from the description
-        description_parts = activity.description.split()
-        quantity = float(description_parts[1])  # Gets the number before 'kg'
-        waste_type = description_parts[4]  # Gets the waste type
-        
-        # Find and delete the corresponding waste collection
-        waste_collection = WasteCollection.query.filter_by(
-            user_id=current_user.id,
-            waste_type=waste_type,
-            quantity=quantity
-        ).first()
+        # Look up the linked collection or pickup by primary key
+        waste_collection = db.session.get(WasteCollection, activity.waste_collection_id) if activity.waste_collection_id else None
+        pickup = db.session.get(PickupSchedule, activity.pickup_schedule_id) if activity.pickup_schedule_id else None
         
         if waste_collection:
             # Update user's points
-            current_user.points -= activity.points_earned
-            
-            # Update waste statistics
-            stats = WasteStatistics.query.filter_by(user_id=current_user.id).order_by(WasteStatistics.date.desc()).first()
-            if stats:
-                stats.total_waste -= quantity
-                if waste_collection.status == 'Recycled':
-                    stats.recycled_waste -= quantity
-                    stats.carbon_offset -= quantity * 2.5
+            current_user.add_points(-activity.points_earned)
             
             # Delete the records
-            db.session.delete(waste_collection)
+            record_collection_removed(waste_collection)
+            record_collection_carbon(waste_collection, sign=-1)
             db.session.delete(activity)
+            db.session.delete(waste_collection)
+            
+            # Update waste statistics
+            sync_user_statistics(current_user.id)
             db.session.commit()
             
             flash('Waste record deleted successfully!', 'success')
+        elif pickup:
+            current_user.add_points(-activity.points_earned)
+            release_slot(pickup)
+            db.session.delete(activity)
+            db.session.delete(pickup)
+            db.session.commit()
+            
+            flash('Pickup deleted successfully!', 'success')
         else:
             flash('Associated waste collection not found.', 'warning')
             db.session.delete(activity)
             db.session.commit()
             
     except Exception as e:
-        print(f"Error deleting waste: {str(e)}")
+        logger.exception("Error deleting waste: %s", e)
         db.session.rollback()
         flash('An error occurred while deleting the waste record.', 'danger')
     
     return redirect(url_for('dashboard'))
 
+@app.route('/update-waste-status/<int:collection_id>', methods=['POST'])
+@login_required
+def update_waste_status(collection_id):
+    try:
+        collection = WasteCollection.query.filter_by(id=collection_id, user_id=current_user.id).first()
+        new_status = request.form.get('status')
+
+        if not collection or new_status not in ('Pending', 'Collected', 'Recycled'):
+            flash('Invalid waste record or status.', 'danger')
+            return redirect(url_for('waste_details'))
+
+        set_collection_status(collection, new_status)
+        sync_user_statistics(current_user.id)
+        db.session.commit()
+        flash('Waste status updated successfully!', 'success')
+
+    except Exception as e:
+        db.session.rollback()
+        logger.exception("Error updating waste status: %s", e)
+        flash('An error occurred while updating the waste status.', 'danger')
+
+    return redirect(url_for('waste_details'))
+
 # Carbon offset calculation and routes
 def calculate_carbon_offset(activity_type, quantity):
     """Calculate carbon offset based on activity type and quantity"""
-    offset_factors = {
-        'recycling_paper': 0.9,      # kg CO2e per kg of paper recycled
-        'recycling_plastic': 1.5,    # kg CO2e per kg of plastic recycled
-        'recycling_glass': 0.3,      # kg CO2e per kg of glass recycled
-        'recycling_metal': 4.0,      # kg CO2e per kg of metal recycled
-        'public_transport': 0.1,     # kg CO2e per km traveled
-        'cycling': 0.2,              # kg CO2e per km traveled (compared to driving)
-        'tree_planting': 20,         # kg CO2e per tree per year
-    }
-    return offset_factors.get(activity_type, 0) * quantity
+    return get_rules().carbon_offset(activity_type, quantity)
 
-@app.route('/base')
+@app.route('/base', endpoint='carbon_dashboard')
 @login_required
-def dashboard():
-    user = current_user
-    
-    # Get user's waste collections
-    collections = WasteCollection.query.filter_by(user_id=user.id).all()
-    
-    # Calculate total carbon offset from waste collections
-    total_offset = 0
-    for collection in collections:
-        if collection.waste_type == 'Paper':
-            total_offset += calculate_carbon_offset('recycling_paper', collection.quantity)
-        elif collection.waste_type == 'Plastic':
-            total_offset += calculate_carbon_offset('recycling_plastic', collection.quantity)
-        elif collection.waste_type == 'Glass':
-            total_offset += calculate_carbon_offset('recycling_glass', collection.quantity)
-        elif collection.waste_type == 'Metal':
-            total_offset += calculate_carbon_offset('recycling_metal', collection.quantity)
-    
-    # Get user's green activities
-    activities = GreenActivity.query.filter_by(user_id=user.id).all()
-    
-    # Add offset from other green activities
-    for activity in activities:
-        total_offset += activity.carbon_offset
+def carbon_dashboard():
+    # Totals come from the daily carbon ledger kept up to date by the write paths
+    carbon = carbon_summary(current_user.id)
     
-    # Update user's total carbon offset
-    user.carbon_offset = total_offset
-    db.session.commit()
+    # Get user's most recent green activities
+    activities = GreenActivity.query.filter_by(user_id=current_user.id).order_by(GreenActivity.date.desc()).limit(5).all()
     
     return render_template('dashboard.html',
-                         user=user,
-                         collections=collections,
+                         user=current_user,
                          activities=activities,
-                         carbon_offset=total_offset)
+                         carbon=carbon,
+                         carbon_offset=carbon['total'])
+
+@app.route('/api/carbon-offset')
+@login_required
+def get_carbon_offset():
+    return jsonify(carbon_summary(current_user.id))
 
 @app.route('/offset-calculator')
 @login_required
@@ -702,43 +898,50 @@ def add_green_activity():
             user_id=current_user.id,
             activity_type=activity_type,
             description=description,
-            carbon_offset=offset
+            carbon_offset=offset,
+            quantity=quantity,
+            date=datetime.utcnow()
         )
         
         db.session.add(activity)
+        record_green_activity(activity)
         db.session.commit()
         
         flash('Green activity added successfully!', 'success')
     except Exception as e:
+        db.session.rollback()
         flash('Error adding green activity. Please try again.', 'danger')
-        print(f"Error: {str(e)}")
+        logger.exception("Error adding green activity: %s", e)
     
     return redirect(url_for('dashboard'))
 
 # Database initialization
 def init_db():
-    print("Starting database initialization...")
-    print(f"Instance path: {instance_path}")
-    print(f"Database URI: {app.config['SQLALCHEMY_DATABASE_URI']}")
+    logger.info("Starting database initialization...")
+    logger.info("Instance path: %s", instance_path)
+    logger.info("Database URI: %s", app.config['SQLALCHEMY_DATABASE_URI'])
     
     try:
         with app.app_context():
             # Drop all existing tables (optional, use carefully)
             # db.drop_all()
             
-            print("Creating database tables...")
-            db.create_all()
+            logger.info("Creating database tables and indexes...")
+            upgrade_database(db.engine)
+            # A database from before the rollups has collections but no rollup rows yet
+            if rollups_missing():
+                logger.info("Rebuilt %d waste rollup rows", rebuild_rollups())
             
             # Verify table creation
             inspector = inspect(db.engine)
             tables = inspector.get_table_names()
-            print(f"Created tables: {tables}")
+            logger.info("Created tables: %s", tables)
             
-            print("Database tables created successfully!")
+            logger.info("Database tables created successfully!")
             
             # Check if we need to add sample data
             if User.query.count() == 0:
-                print("Adding sample data...")
+                logger.info("Adding sample data...")
                 try:
                     # Create a sample user if no users exist
                     sample_user = User(
@@ -763,54 +966,30 @@ def init_db():
                     
                     # Commit sample data
                     db.session.commit()
-                    print("Sample data added successfully!")
+                    logger.info("Sample data added successfully!")
                     
                 except Exception as sample_error:
                     db.session.rollback()
-                    print(f"Error adding sample data: {sample_error}")
+                    logger.error("Error adding sample data: %s", sample_error)
             
     except Exception as e:
-        print(f"Database initialization error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Database initialization error: %s", e)
         raise
 
 # Add database diagnostics route
 @app.route('/db-diagnostics')
-@login_required
 def database_diagnostics():
+    # Slow statements and table sizes are for operators only, and refresh=1 re-runs the catalog queries
+    token = app.config['OPS_TOKEN']
+    if not token or request.headers.get('X-Ops-Token') != token:
+        return jsonify({'error': 'Operator token required'}), 403
+    # Built from planner statistics and pragmas only, so it stays fast on large databases
     try:
-        # Check database connection
-        try:
-            db.session.execute('SELECT 1')
-            connection_status = 'Successful'
-        except Exception as conn_error:
-            connection_status = f'Failed: {conn_error}'
-        
-        # Check table existence
-        inspector = inspect(db.engine)
-        tables = inspector.get_table_names()
-        
-        # Count records in key tables
-        table_counts = {}
-        for table in ['user', 'pickup_schedule', 'recycling_activity', 'recycling_center']:
-            try:
-                count = db.session.execute(f'SELECT COUNT(*) FROM {table}').scalar()
-                table_counts[table] = count
-            except Exception as count_error:
-                table_counts[table] = f'Error: {count_error}'
-        
-        diagnostics = {
-            'connection_status': connection_status,
-            'tables_found': tables,
-            'table_record_counts': table_counts,
-            'database_uri': app.config['SQLALCHEMY_DATABASE_URI']
-        }
-        
-        return jsonify(diagnostics)
-    
+        return jsonify(diagnostics.report(refresh=request.args.get('refresh') in ('1', 'true')))
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        db.session.rollback()
+        logger.exception("Error building database diagnostics: %s", e)
+        return jsonify({'error': 'Failed to build database diagnostics'}), 500
 
 # Sample data initialization
 def add_sample_waste_data(user_id):
@@ -861,13 +1040,15 @@ def add_sample_waste_data(user_id):
             status=data['status']
         )
         db.session.add(new_collection)
+        record_collection_added(new_collection)
+        record_collection_carbon(new_collection)
     
     try:
         db.session.commit()
         return True
     except Exception as e:
         db.session.rollback()
-        print(f"Error adding sample data: {str(e)}")
+        logger.exception("Error adding sample data: %s", e)
         return False
 
 # Add route to initialize sample data
@@ -881,6 +1062,19 @@ def initialize_sample_data():
     return redirect(url_for('waste_details'))
 
 # API routes
+@app.route('/api/waste-distribution')
+@login_required
+def get_waste_distribution():
+    return jsonify(chart_cache.distribution(current_user.id))
+
+@app.route('/api/waste-series')
+@login_required
+def get_waste_series():
+    bucket = request.args.get('bucket', 'daily')
+    if bucket not in BUCKETS:
+        return jsonify({'error': f"bucket must be one of {', '.join(BUCKETS)}"}), 400
+    return jsonify(chart_cache.series(current_user.id, bucket))
+
 @app.route('/api/waste-stats')
 @login_required
 def get_waste_stats():
@@ -906,18 +1100,105 @@ def get_waste_stats():
             'recycling_rate': round(recycling_rate, 2)
         })
     except Exception as e:
-        print(f"Error in get_waste_stats: {str(e)}")
+        logger.exception("Error in get_waste_stats: %s", e)
         return jsonify({'error': 'Failed to fetch waste statistics'}), 500
 
 @app.route('/login-history')
 @login_required
 def login_history():
-    # Get user's login history
-    history = UserLogin.query.filter_by(user_id=current_user.id)\
-        .order_by(UserLogin.login_time.desc())\
-        .all()
+    # Get one page of the user's login history, newest first
+    per_page = clamp_limit(request.args.get('per_page', type=int), 50)
+    cursor = request.args.get('cursor')
+    history, next_cursor = keyset_page(
+        UserLogin.query.filter_by(user_id=current_user.id),
+        UserLogin.login_time,
+        UserLogin.id,
+        cursor=cursor,
+        per_page=per_page
+    )
     
-    return render_template('login_history.html', login_history=history)
+    return render_template('login_history.html',
+                         login_history=history,
+                         next_cursor=next_cursor,
+                         is_first_page=not cursor,
+                         per_page=per_page)
+
+@app.route('/api/login-history')
+@login_required
+def api_login_history():
+    # Stream the login history as NDJSON without loading it all into memory
+    query = keyset_filter(
+        UserLogin.query.filter_by(user_id=current_user.id),
+        UserLogin.login_time,
+        UserLogin.id,
+        request.args.get('cursor')
+    )
+    # A negative LIMIT means no limit to SQLite, so clamp rather than pass it through
+    limit = clamp_limit(request.args.get('limit', type=int), None, maximum=MAX_STREAM_ROWS)
+    if limit is not None:
+        query = query.limit(limit)
+
+    def generate():
+        for login in query.yield_per(1000):
+            yield json.dumps({
+                'id': login.id,
+                'login_time': login.login_time.isoformat(),
+                'status': login.status,
+                'ip_address': login.ip_address,
+                'user_agent': login.user_agent
+            }) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/export/<dataset>')
+@login_required
+def export_dataset(dataset):
+    # Stream a full table as CSV (optionally gzipped) or Parquet without loading it into memory
+    user_id = current_user.id
+    requested = request.args.get('user_id')
+    if requested is not None and requested != str(current_user.id):
+        token = app.config['EXPORT_TOKEN']
+        if not token or request.headers.get('X-Export-Token') != token:
+            return jsonify({'error': 'Export token required to export other users'}), 403
+        if requested == 'all':
+            user_id = None
+        elif requested.isdigit():
+            user_id = int(requested)
+        else:
+            return jsonify({'error': "user_id must be a user id or 'all'"}), 400
+
+    try:
+        export = Export(dataset, request.args.get('format', 'csv'), user_id,
+                        compress=request.args.get('gzip') in ('1', 'true'))
+    except ExportUnavailable as e:
+        return jsonify({'error': str(e)}), 400
+
+    def generate():
+        try:
+            yield from export.chunks()
+        except Exception as e:
+            # Headers are already sent, so the client sees a truncated file
+            logger.exception("Error exporting %s: %s", dataset, e)
+            raise
+        logger.info("Exported %d %s rows as %s", export.rows, dataset, export.filename)
+
+    return Response(stream_with_context(generate()), mimetype=export.mimetype,
+                    headers={'Content-Disposition': f'attachment; filename="{export.filename}"'})
+
+@app.route('/metrics')
+def metrics():
+    token = app.config['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return jsonify({'error': 'Metrics token required'}), 403
+    return Response(request_metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/login-audit/metrics')
+def login_audit_metrics():
+    # Login failure telemetry is for operators only
+    token = app.config['OPS_TOKEN']
+    if not token or request.headers.get('X-Ops-Token') != token:
+        return jsonify({'error': 'Operator token required'}), 403
+    return jsonify(audit_writer.stats())
 
 # Test route for environment variables
 @app.route('/test-config')
@@ -1000,10 +1281,10 @@ def bad_request_error(error):
     }), 400
 
 if __name__ == '__main__':
-    print("Starting application...")
+    logger.info("Starting application...")
     try:
         init_db()
-        print("Database initialized successfully!")
+        logger.info("Database initialized successfully!")
         app.run(debug=True)
     except Exception as e:
-        print(f"Error starting application: {str(e)}")
\ No newline at end of file
+        logger.exception("Error starting application: %s", e)
\ No newline at end of file
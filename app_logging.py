@@ -0,0 +1,93 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+import random
+import uuid
+from flask import g, has_request_context, request, session
+
+LOGGER_NAME = 'ecotrack'
+LOG_FORMAT = '%(asctime)s %(levelname)s [%(request_id)s user=%(user_id)s %(endpoint)s] %(name)s: %(message)s'
+
+logger = logging.getLogger(LOGGER_NAME)
+
+def get_logger(name=None):
+    return logger.getChild(name) if name else logger
+
+class RequestContextFilter(logging.Filter):
+    """Attach request id, endpoint and user id to every record, and drop records
+    below LOG_LEVEL except DEBUG records of requests picked for debug sampling."""
+
+    def __init__(self, level=logging.INFO):
+        super().__init__()
+        self.level = level
+
+    def filter(self, record):
+        sampled = False
+        if has_request_context():
+            record.request_id = getattr(g, 'request_id', '-')
+            record.endpoint = request.endpoint or '-'
+            # Flask-Login keeps the id in the session, so no user lookup is needed
+            record.user_id = session.get('_user_id', '-')
+            sampled = getattr(g, 'debug_sampled', False)
+        else:
+            record.request_id = '-'
+            record.endpoint = '-'
+            record.user_id = '-'
+        # Sampled requests add their DEBUG records; every other record still needs LOG_LEVEL
+        if record.levelno < self.level and not (sampled and record.levelno <= logging.DEBUG):
+            return False
+        return True
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Drop records instead of blocking or raising when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+_listener = None
+
+def init_logging(app):
+    """Route the ecotrack logger through a queue so request threads never
+    block on log I/O; a background listener thread does the writing."""
+    global _listener
+    if _listener is not None:
+        return logger
+
+    level = getattr(logging, app.config.get('LOG_LEVEL', 'INFO').upper(), logging.INFO)
+    sample_rate = app.config.get('LOG_DEBUG_SAMPLE_RATE', 0.0)
+    # DEBUG records must reach the filter for sampling to have any effect
+    logger.setLevel(logging.DEBUG if sample_rate > 0 else level)
+    logger.propagate = False
+
+    output = logging.StreamHandler()
+    output.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.Queue(maxsize=app.config.get('LOG_QUEUE_SIZE', 10000))
+    queue_handler = DroppingQueueHandler(log_queue)
+    # Context must be captured on the request thread, before the record is queued
+    queue_handler.addFilter(RequestContextFilter(level))
+    logger.addHandler(queue_handler)
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    @app.before_request
+    def assign_request_context():
+        g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex[:12]
+        g.debug_sampled = level <= logging.DEBUG or (sample_rate > 0 and random.random() < sample_rate)
+
+    @app.after_request
+    def add_request_id_header(response):
+        response.headers['X-Request-ID'] = getattr(g, 'request_id', '')
+        return response
+
+    return logger
@@ -0,0 +1,266 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+from flask import request, send_from_directory, url_for
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+VENDOR_DIR = os.path.join(BASE_DIR, 'assets', 'vendor')
+DIST_DIR = os.path.join(BASE_DIR, 'static', 'dist')
+MANIFEST_PATH = os.path.join(DIST_DIR, 'manifest.json')
+
+# Third-party files kept in assets/vendor; `build_assets.py --fetch` downloads any that are missing.
+# Leaflet is committed. The pages only draw pie and bar charts, which the plotly-basic
+# partial bundle covers, but it is not committed yet: until it is fetched, builds and the
+# unbuilt fallback use the full plotly.min.js (about 3.5 MB) from the plotly package.
+PLOTLY_VERSION = '2.18.0'
+LEAFLET_VERSION = '1.9.3'
+VENDOR_FILES = {
+    'plotly-basic.min.js': f'https://cdn.plot.ly/plotly-basic-{PLOTLY_VERSION}.min.js',
+    'leaflet.js': f'https://unpkg.com/leaflet@{LEAFLET_VERSION}/dist/leaflet.js',
+    'leaflet.css': f'https://unpkg.com/leaflet@{LEAFLET_VERSION}/dist/leaflet.css',
+    'images/layers.png': f'https://unpkg.com/leaflet@{LEAFLET_VERSION}/dist/images/layers.png',
+    'images/layers-2x.png': f'https://unpkg.com/leaflet@{LEAFLET_VERSION}/dist/images/layers-2x.png',
+    'images/marker-icon.png': f'https://unpkg.com/leaflet@{LEAFLET_VERSION}/dist/images/marker-icon.png',
+    'images/marker-icon-2x.png': f'https://unpkg.com/leaflet@{LEAFLET_VERSION}/dist/images/marker-icon-2x.png',
+    'images/marker-shadow.png': f'https://unpkg.com/leaflet@{LEAFLET_VERSION}/dist/images/marker-shadow.png',
+}
+
+# Bundle name -> source files, concatenated in order
+BUNDLES = {
+    'app.css': ['static/css/style.css'],
+    'app.js': ['static/js/main.js'],
+    'plotly.js': ['assets/vendor/plotly-basic.min.js'],
+    'leaflet.css': ['assets/vendor/leaflet.css'],
+    'leaflet.js': ['assets/vendor/leaflet.js'],
+}
+
+# Where templates point when the pipeline has not been run. Vendor files are served
+# unbundled from assets/vendor, so pages work offline without a build.
+FALLBACK_URLS = {
+    'app.css': ('static', 'css/style.css'),
+    'app.js': ('static', 'js/main.js'),
+    'plotly.js': ('vendor_asset', 'plotly-basic.min.js'),
+    'leaflet.css': ('vendor_asset', 'leaflet.css'),
+    'leaflet.js': ('vendor_asset', 'leaflet.js'),
+}
+
+CSS_URL = re.compile(r'url\((["\']?)(?!data:|https?:|/)([^"\')]+)\1\)')
+
+def plotly_package_bundle():
+    """Full plotly.min.js shipped with the plotly Python package, if installed"""
+    try:
+        import plotly
+    except ImportError:
+        return None
+    path = os.path.join(os.path.dirname(plotly.__file__), 'package_data', 'plotly.min.js')
+    return path if os.path.exists(path) else None
+
+def fetch_vendor_files(force=False):
+    """Download VENDOR_FILES into assets/vendor. The only step that needs the network."""
+    import requests
+
+    fetched = []
+    for name, url in VENDOR_FILES.items():
+        path = os.path.join(VENDOR_DIR, name)
+        if os.path.exists(path) and not force:
+            continue
+        response = requests.get(url, timeout=30)
+        response.raise_for_status()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(response.content)
+        fetched.append(name)
+    return fetched
+
+def minify_css(text):
+    try:
+        import rcssmin
+        return rcssmin.cssmin(text)
+    except ImportError:
+        pass
+    text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\s*([{};:,>])\s*', r'\1', text)
+    return text.replace(';}', '}').strip()
+
+def minify_js(text):
+    try:
+        import rjsmin
+        return rjsmin.jsmin(text)
+    except ImportError:
+        # Without rjsmin only trivially safe whitespace is removed
+        return '\n'.join(line.strip() for line in text.splitlines() if line.strip())
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:12]
+
+def hashed_name(name, data):
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{content_hash(data)}{ext}"
+
+def write_output(filename, data):
+    path = os.path.join(DIST_DIR, filename)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+    # mtime=0 keeps the .gz byte-identical between builds of the same content
+    with open(path + '.gz', 'wb') as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    try:
+        import brotli
+        with open(path + '.br', 'wb') as f:
+            f.write(brotli.compress(data, quality=11))
+    except ImportError:
+        pass
+
+def copy_asset_dir(source_dir, relative_dir):
+    """Copy a directory of CSS images into dist/<content hash>/<relative_dir>.
+
+    File names are kept because libraries like Leaflet derive sibling image
+    URLs (marker-shadow.png) from the one the CSS references; the hash goes
+    into the directory instead.
+    """
+    directory = os.path.join(source_dir, relative_dir)
+    names = sorted(name for name in os.listdir(directory) if os.path.isfile(os.path.join(directory, name)))
+    digest = hashlib.sha256()
+    for name in names:
+        with open(os.path.join(directory, name), 'rb') as f:
+            digest.update(name.encode('utf-8') + b'\0' + f.read())
+    prefix = f"{digest.hexdigest()[:12]}/{relative_dir}" if relative_dir else digest.hexdigest()[:12]
+    target = os.path.join(DIST_DIR, prefix)
+    os.makedirs(target, exist_ok=True)
+    for name in names:
+        shutil.copyfile(os.path.join(directory, name), os.path.join(target, name))
+    return prefix
+
+def rewrite_css_urls(text, source_dir):
+    """Point url(...) references at copies of their directories in dist"""
+    prefixes = {}
+
+    def replace(match):
+        relative = match.group(2)
+        if not os.path.exists(os.path.join(source_dir, relative)):
+            return match.group(0)
+        relative_dir, name = os.path.split(relative)
+        if relative_dir not in prefixes:
+            prefixes[relative_dir] = copy_asset_dir(source_dir, relative_dir)
+        return f'url({prefixes[relative_dir]}/{name})'
+    return CSS_URL.sub(replace, text)
+
+def read_sources(name, sources):
+    paths = [os.path.join(BASE_DIR, source) for source in sources]
+    if name == 'plotly.js' and not all(os.path.exists(path) for path in paths):
+        # Offline fallback: the full bundle from the plotly Python package in requirements.txt
+        bundled = plotly_package_bundle()
+        if bundled:
+            paths = [bundled]
+    missing = [path for path in paths if not os.path.exists(path)]
+    if missing:
+        return None
+    return paths
+
+def build_assets(clean=True):
+    """Bundle, minify, fingerprint and precompress every bundle into static/dist.
+
+    Returns (manifest, skipped bundle names). Bundles whose sources are
+    missing are skipped and keep using FALLBACK_URLS.
+    """
+    if clean and os.path.isdir(DIST_DIR):
+        shutil.rmtree(DIST_DIR)
+    os.makedirs(DIST_DIR, exist_ok=True)
+
+    manifest = {}
+    skipped = []
+    for name, sources in BUNDLES.items():
+        paths = read_sources(name, sources)
+        if paths is None:
+            skipped.append(name)
+            continue
+
+        parts = []
+        for path in paths:
+            with open(path, encoding='utf-8') as f:
+                text = f.read()
+            if name.endswith('.css'):
+                text = rewrite_css_urls(text, os.path.dirname(path))
+                if not path.endswith('.min.css'):
+                    text = minify_css(text)
+            elif not path.endswith('.min.js'):
+                text = minify_js(text)
+            parts.append(text)
+        # Semicolons between JS files stop one file's last statement running into the next
+        data = (';\n' if name.endswith('.js') else '\n').join(parts).encode('utf-8')
+
+        filename = hashed_name(name, data)
+        write_output(filename, data)
+        manifest[name] = filename
+
+    with open(MANIFEST_PATH, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest, skipped
+
+def assets_stale():
+    """True when static/dist is missing or older than any bundle source"""
+    if not os.path.exists(MANIFEST_PATH):
+        return True
+    built_at = os.path.getmtime(MANIFEST_PATH)
+    for name, sources in BUNDLES.items():
+        paths = read_sources(name, sources) or []
+        if any(os.path.getmtime(path) > built_at for path in paths):
+            return True
+    return False
+
+def load_manifest():
+    try:
+        with open(MANIFEST_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def init_assets(app):
+    """Expose asset_url() to templates and serve static/dist with precompression
+    and far-future cache headers. Restart the app after rebuilding assets."""
+    manifest = load_manifest()
+    max_age = app.config.get('ASSET_MAX_AGE', 31536000)
+
+    def asset_url(name):
+        if name in manifest:
+            return url_for('dist_asset', filename=manifest[name])
+        fallback = FALLBACK_URLS[name]
+        if isinstance(fallback, tuple):
+            return url_for(fallback[0], filename=fallback[1])
+        return fallback
+
+    def dist_asset(filename):
+        encodings = request.accept_encodings
+        response = None
+        for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if encodings[encoding] and os.path.exists(os.path.join(DIST_DIR, filename + suffix)):
+                # The type of the original file, not of the .br/.gz on disk
+                mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+                response = send_from_directory(DIST_DIR, filename + suffix, mimetype=mimetype)
+                response.headers['Content-Encoding'] = encoding
+                break
+        if response is None:
+            response = send_from_directory(DIST_DIR, filename)
+        response.headers['Vary'] = 'Accept-Encoding'
+        # Filenames change with their content, so browsers never need to revalidate
+        response.headers['Cache-Control'] = f'public, max-age={max_age}, immutable'
+        return response
+
+    def vendor_asset(filename):
+        path = os.path.join(VENDOR_DIR, filename)
+        if filename == 'plotly-basic.min.js' and not os.path.exists(path):
+            bundled = plotly_package_bundle()
+            if bundled:
+                return send_from_directory(os.path.dirname(bundled), os.path.basename(bundled))
+        return send_from_directory(VENDOR_DIR, filename)
+
+    app.add_url_rule('/static/dist/<path:filename>', 'dist_asset', dist_asset)
+    app.add_url_rule('/static/vendor/<path:filename>', 'vendor_asset', vendor_asset)
+    app.jinja_env.globals['asset_url'] = asset_url
+    return manifest
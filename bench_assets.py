@@ -0,0 +1,123 @@
+import argparse
+import gzip
+import os
+import re
+import tempfile
+
+# Page weight before and after the asset pipeline, measured offline with the test client.
+# CDN files cannot be downloaded here, so the old Plotly is sized from the full plotly.min.js
+# in the plotly package (what plotly-latest served), gzipped the way the CDN sends it.
+# Time to interactive is estimated from bytes, requests and round trips on a simulated link.
+
+PAGES = ['/guidelines', '/waste-details', '/locator']
+ASSET_TAG = re.compile(r'<(?:script[^>]*\ssrc|link[^>]*\shref)="([^"]+\.(?:js|css)[^"]*)"')
+
+def setup_app():
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    os.environ['LOG_LEVEL'] = 'CRITICAL'
+    os.environ['STATS_MAX_STALENESS'] = '0'
+    from app import app, db
+    from models import User
+
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench', email='bench@example.com')
+        user.password_hash = 'x'
+        db.session.add(user)
+        db.session.commit()
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = '1'
+        session['_fresh'] = True
+    return client
+
+def local_asset(client, url):
+    """(bytes on the wire, needs a revalidation request on repeat visits)"""
+    response = client.get(url, headers={'Accept-Encoding': 'br, gzip'})
+    cache_control = response.headers.get('Cache-Control', '')
+    return len(response.data), 'immutable' not in cache_control and 'max-age' not in cache_control
+
+def old_plotly_size():
+    from assets import plotly_package_bundle
+
+    path = plotly_package_bundle()
+    if path is None:
+        return None
+    with open(path, 'rb') as f:
+        data = f.read()
+    return len(gzip.compress(data, compresslevel=6)), len(data)
+
+def estimate_ms(transfer_bytes, requests, rounds, bandwidth_mbps, rtt_ms):
+    return transfer_bytes * 8 / (bandwidth_mbps * 1000) + rounds * rtt_ms + requests * rtt_ms / 6
+
+def report(label, rows, args):
+    print(f"\n{label}")
+    for page, (transfer, js_bytes, requests, revalidations, external) in rows.items():
+        first = estimate_ms(transfer, requests, 2, args.bandwidth_mbps, args.rtt_ms)
+        repeat = revalidations * args.rtt_ms / 6 + (args.rtt_ms if revalidations else 0)
+        note = f", {external} external files not measured" if external else ''
+        print(f"  {page:15} {transfer / 1024:8.1f} KiB transferred, {js_bytes / 1024:8.1f} KiB JS to parse, "
+              f"{requests} requests, ~{first:.0f} ms first visit, {revalidations} revalidations "
+              f"(~{repeat:.0f} ms) on repeat{note}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare page weight before and after the asset pipeline')
+    parser.add_argument('--bandwidth-mbps', type=float, default=1.6)
+    parser.add_argument('--rtt-ms', type=float, default=150.0)
+    args = parser.parse_args()
+
+    from assets import build_assets, FALLBACK_URLS
+
+    manifest, skipped = build_assets()
+    client = setup_app()
+    plotly_before = old_plotly_size()
+
+    # Before: style.css and main.js straight from Flask, plotly-latest in base.html on every
+    # page and a second copy parsed again on /waste-details, Leaflet from unpkg
+    before = {}
+    for page in PAGES:
+        transfer = js_bytes = requests = revalidations = external = 0
+        for url in ['/static/css/style.css', '/static/js/main.js']:
+            size, revalidate = local_asset(client, url)
+            transfer += size
+            js_bytes += size if url.endswith('.js') else 0
+            requests += 1
+            revalidations += revalidate
+        copies = 2 if page == '/waste-details' else 1
+        if plotly_before:
+            transfer += plotly_before[0]
+            js_bytes += plotly_before[1] * copies
+            requests += 1
+        else:
+            external += 1
+        if page == '/locator':
+            external += 2
+        before[page] = (transfer, js_bytes, requests, revalidations, external)
+
+    after = {}
+    for page in PAGES:
+        html = client.get(page).get_data(as_text=True)
+        transfer = js_bytes = requests = revalidations = external = 0
+        for url in ASSET_TAG.findall(html):
+            if url.startswith('http'):
+                # Bootstrap and Font Awesome stay on their CDNs in both runs
+                if url not in FALLBACK_URLS.values():
+                    continue
+                external += 1
+                continue
+            size, revalidate = local_asset(client, url)
+            transfer += size
+            if url.endswith('.js'):
+                js_bytes += len(client.get(url).data)
+            requests += 1
+            revalidations += revalidate
+        after[page] = (transfer, js_bytes, requests, revalidations, external)
+
+    print(f"Simulated link: {args.bandwidth_mbps} Mbps, {args.rtt_ms:.0f} ms RTT (Bootstrap/Font Awesome excluded)")
+    if skipped:
+        print(f"Not built (vendor sources missing, run build_assets.py --fetch): {', '.join(skipped)}")
+    report('Before (CDN plotly-latest, unversioned static files)', before, args)
+    report('After (asset pipeline)', after, args)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine
+from models import db
+from migrations import upgrade_database
+
+# The per-user (user_id, time) queries issued by app.py
+HOT_QUERIES = {
+    'waste_collection': "SELECT * FROM waste_collection WHERE user_id = ? ORDER BY created_at DESC LIMIT 50",
+    'recycling_activity': "SELECT * FROM recycling_activity WHERE user_id = ? ORDER BY date DESC LIMIT 5",
+    'waste_statistics': "SELECT * FROM waste_statistics WHERE user_id = ? ORDER BY date DESC LIMIT 1",
+    'pickup_schedule': "SELECT * FROM pickup_schedule WHERE user_id = ? ORDER BY pickup_date DESC",
+    'user_login': "SELECT * FROM user_login WHERE user_id = ? ORDER BY login_time DESC",
+}
+
+WASTE_TYPES = ['Plastic', 'Paper', 'Glass', 'Metal', 'Organic', 'Electronic']
+
+def drop_composite_indexes(conn):
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            conn.execute(f"DROP INDEX IF EXISTS {index.name}")
+    conn.commit()
+
+def populate(conn, rows, users, batch_size=50000):
+    start = datetime(2020, 1, 1)
+    conn.executemany(
+        "INSERT INTO user (id, username, email, password_hash, points, is_active) VALUES (?, ?, ?, 'x', 0, 1)",
+        ((i, f'user{i}', f'user{i}@example.com') for i in range(1, users + 1))
+    )
+
+    def timestamps():
+        for _ in range(rows):
+            yield random.randint(1, users), start + timedelta(seconds=random.randint(0, 5 * 365 * 86400))
+
+    inserts = {
+        'waste_collection': ("INSERT INTO waste_collection (user_id, scheduled_date, waste_type, quantity, status, created_at) "
+                             "VALUES (?, ?, ?, ?, 'Collected', ?)",
+                             lambda u, t: (u, t, random.choice(WASTE_TYPES), round(random.uniform(0.1, 20), 2), t)),
+        'recycling_activity': ("INSERT INTO recycling_activity (user_id, activity_type, points_earned, date) VALUES (?, 'Waste Added', 10, ?)",
+                               lambda u, t: (u, t)),
+        'waste_statistics': ("INSERT INTO waste_statistics (user_id, total_waste, recycled_waste, waste_type, date) VALUES (?, 1, 0, 'Total', ?)",
+                             lambda u, t: (u, t.date())),
+        'pickup_schedule': ("INSERT INTO pickup_schedule (user_id, pickup_date, waste_type, status, pickup_address) VALUES (?, ?, 'Paper', 'Scheduled', 'Somewhere')",
+                            lambda u, t: (u, t)),
+        'user_login': ("INSERT INTO user_login (user_id, login_time, status) VALUES (?, ?, 'success')",
+                       lambda u, t: (u, t)),
+    }
+
+    for table, (sql, make_row) in inserts.items():
+        batch = []
+        for user_id, ts in timestamps():
+            batch.append(make_row(user_id, ts))
+            if len(batch) >= batch_size:
+                conn.executemany(sql, batch)
+                batch = []
+        if batch:
+            conn.executemany(sql, batch)
+        conn.commit()
+        print(f"  {table}: {rows} rows")
+
+def run_queries(conn, users, samples):
+    results = {}
+    user_ids = [random.randint(1, users) for _ in range(samples)]
+    for table, sql in HOT_QUERIES.items():
+        plan = [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", (1,))]
+        started = time.perf_counter()
+        for user_id in user_ids:
+            conn.execute(sql, (user_id,)).fetchall()
+        elapsed_ms = (time.perf_counter() - started) * 1000 / samples
+        results[table] = (plan, elapsed_ms)
+    return results
+
+def print_results(label, results):
+    print(f"\n{label}")
+    for table, (plan, elapsed_ms) in results.items():
+        print(f"  {table}: {elapsed_ms:.3f} ms/query")
+        for step in plan:
+            print(f"      {step}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-user queries with and without composite indexes')
+    parser.add_argument('--rows', type=int, default=1000000, help='Rows per table')
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--samples', type=int, default=200, help='Queries per table')
+    parser.add_argument('--db', help='Database file (defaults to a temporary file)')
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), 'bench.db')
+    engine = create_engine(f"sqlite:///{path}")
+    db.metadata.create_all(bind=engine)
+
+    conn = sqlite3.connect(path)
+    drop_composite_indexes(conn)
+    print(f"Populating {path}...")
+    populate(conn, args.rows, args.users)
+    conn.execute("ANALYZE")
+
+    before = run_queries(conn, args.users, args.samples)
+    print_results('Without composite indexes', before)
+
+    conn.close()
+    started = time.perf_counter()
+    created = upgrade_database(engine)
+    print(f"\nCreated {len(created)} indexes in {time.perf_counter() - started:.1f}s")
+
+    conn = sqlite3.connect(path)
+    conn.execute("ANALYZE")
+    after = run_queries(conn, args.users, args.samples)
+    print_results('With composite indexes', after)
+
+    print("\nSpeedup")
+    for table in HOT_QUERIES:
+        print(f"  {table}: {before[table][1] / after[table][1]:.1f}x")
+    conn.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+import argparse
+import io
+import random
+import time
+from app import app, db
+from models import User
+from migrations import upgrade_database
+from bulk_ingest import ingest
+
+# Measures bulk ingestion throughput end to end: parsing, validation, inserts
+# and the points, rollup, carbon and statistics updates. Point DATABASE_URL
+# at a scratch database; rows are added to it.
+
+WASTE_TYPES = ['Organic', 'Plastic', 'Paper', 'Glass', 'Metal', 'Electronic']
+STATUSES = ['Pending', 'Collected', 'Recycled']
+
+def make_csv(rng, rows, user_ids):
+    lines = ['user_id,waste_type,quantity,status,scheduled_date']
+    for _ in range(rows):
+        lines.append(f"{rng.choice(user_ids)},{rng.choice(WASTE_TYPES)},{rng.uniform(0.1, 10):.2f},"
+                     f"{rng.choice(STATUSES)},2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T10:00:00")
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure bulk waste-collection ingestion in rows per second')
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--users', type=int, default=1000, help='Distinct users the rows belong to')
+    parser.add_argument('--seed', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with app.app_context():
+        upgrade_database(db.engine)
+        user_ids = [user_id for user_id, in db.session.query(User.id).limit(args.users)]
+        if len(user_ids) < args.users:
+            db.session.execute(User.__table__.insert(), [{
+                'username': f'bench{index}-{time.time_ns()}', 'email': f'bench{index}-{time.time_ns()}@example.com',
+                'password_hash': '-', 'points': 0, 'is_active': True, 'carbon_offset': 0.0
+            } for index in range(args.users - len(user_ids))])
+            db.session.commit()
+            user_ids = [user_id for user_id, in db.session.query(User.id).limit(args.users)]
+
+        data = make_csv(rng, args.rows, user_ids)
+        started = time.perf_counter()
+        report = ingest(io.BytesIO(data), 'csv', user_ids[0], allow_any_user=True)
+        elapsed = time.perf_counter() - started
+
+    print(f"{report.inserted} rows in {report.batches} batches, {report.error_count} errors")
+    print(f"{elapsed:.2f} s, {report.inserted / elapsed:,.0f} rows/s")
+
+if __name__ == '__main__':
+    main()
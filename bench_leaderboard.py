@@ -0,0 +1,41 @@
+import argparse
+import random
+import time
+from leaderboard import Board
+
+def timed(label, count, func):
+    started = time.perf_counter()
+    for _ in range(count):
+        func()
+    elapsed = time.perf_counter() - started
+    print(f"{label}: {elapsed * 1e6 / count:.1f} us/op")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the in-memory leaderboard')
+    parser.add_argument('--users', type=int, default=1000000)
+    parser.add_argument('--ops', type=int, default=100000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    scores = {user_id: int(rng.paretovariate(1.2) * 10) for user_id in range(1, args.users + 1)}
+
+    started = time.perf_counter()
+    board = Board(scores)
+    print(f"Built board for {args.users} users in {time.perf_counter() - started:.2f} s")
+
+    user_ids = [rng.randrange(1, args.users + 1) for _ in range(args.ops)]
+    queries = iter(user_ids * 3)
+    timed('rank(user)', args.ops, lambda: board.rank(next(queries)))
+    timed('add(user, points)', args.ops, lambda: board.add(next(queries), rng.randrange(1, 50)))
+    timed('top(10)', 10000, lambda: board.top(10))
+    timed('top(10, offset=500000)', 10000, lambda: board.top(10, min(500000, args.users - 10)))
+
+    # Spot-check ranks against a full sort
+    ordered = sorted(board.scores.values(), reverse=True)
+    for user_id in user_ids[:50]:
+        rank, points = board.rank(user_id)
+        assert rank == ordered.index(points) + 1
+    print("Ranks match a full sort")
+
+if __name__ == '__main__':
+    main()
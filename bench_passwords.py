@@ -0,0 +1,69 @@
+import argparse
+import os
+import threading
+import time
+from werkzeug.security import generate_password_hash, check_password_hash
+from passwords import PasswordHasher, HashingBusy
+
+def verifies_per_second(password_hash, duration):
+    count = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        check_password_hash(password_hash, 'correct horse battery')
+        count += 1
+    return count / duration
+
+def pool_throughput(method, workers, threads, duration):
+    """Logins/s through the hashing pool with `threads` concurrent request threads"""
+    hasher = PasswordHasher(method=method, workers=workers, max_pending=threads)
+    password_hash = generate_password_hash('correct horse battery', method)
+    hasher.verify(password_hash, 'correct horse battery')  # start the pool outside the timing
+
+    counts = {'ok': 0, 'busy': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client():
+        while time.perf_counter() < deadline:
+            try:
+                hasher.verify(password_hash, 'correct horse battery')
+                key = 'ok'
+            except HashingBusy:
+                key = 'busy'
+            with lock:
+                counts[key] += 1
+
+    clients = [threading.Thread(target=client) for _ in range(threads)]
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    hasher.shutdown()
+    return counts['ok'] / duration, counts['busy']
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure password verifications (logins) per second per core')
+    parser.add_argument('--methods', nargs='+', default=['pbkdf2:sha256:260000', 'pbkdf2:sha256:600000'],
+                        help='Werkzeug hash methods; scrypt needs Werkzeug 2.3 or later')
+    parser.add_argument('--duration', type=float, default=3.0)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPU(s) available")
+    for method in args.methods:
+        try:
+            password_hash = generate_password_hash('correct horse battery', method)
+        except (ValueError, TypeError) as e:
+            print(f"{method}: not supported by the installed Werkzeug ({e}), skipped")
+            continue
+        rate = verifies_per_second(password_hash, args.duration)
+        print(f"{method}: {rate:.1f} logins/s on one core ({1000 / rate:.1f} ms each)")
+
+    method = os.getenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    rate, busy = pool_throughput(method, args.workers, args.threads, args.duration)
+    print(f"Pool ({args.workers} workers, {args.threads} threads, {method}): "
+          f"{rate:.1f} logins/s, {busy} rejected as busy")
+
+if __name__ == '__main__':
+    main()
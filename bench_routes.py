@@ -0,0 +1,41 @@
+import argparse
+import random
+import time
+from route_planning import Stop, plan_routes
+
+WASTE_TYPES = ['Plastic', 'Paper', 'Glass', 'Metal', 'Organic', 'Electronic']
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark route planning for one day of pickups')
+    parser.add_argument('--pickups', type=int, default=10000)
+    parser.add_argument('--capacity-kg', type=float, default=1000.0)
+    parser.add_argument('--max-stops', type=int, default=40)
+    parser.add_argument('--cluster-size', type=int, default=150)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    # Pickups spread over a metro area about 40 km across, denser near the centre
+    rng = random.Random(args.seed)
+    depot = (12.97, 77.59)
+    stops = [
+        Stop(i, f'Address {i}', rng.choice(WASTE_TYPES), round(rng.uniform(0.5, 40), 1),
+             depot[0] + rng.gauss(0, 0.09), depot[1] + rng.gauss(0, 0.09))
+        for i in range(args.pickups)
+    ]
+    naive_km = sum(2 * ((stop.lat - depot[0]) ** 2 + (stop.lng - depot[1]) ** 2) ** 0.5 * 111 for stop in stops)
+
+    started = time.perf_counter()
+    routes = plan_routes(stops, depot, args.capacity_kg, args.max_stops, args.cluster_size)
+    elapsed = time.perf_counter() - started
+
+    routed = sum(len(route['stops']) for route in routes)
+    assert routed == args.pickups and len({s['pickup_id'] for r in routes for s in r['stops']}) == args.pickups
+    assert all(route['load_kg'] <= args.capacity_kg and len(route['stops']) <= args.max_stops for route in routes)
+    total_km = sum(route['distance_km'] for route in routes)
+    print(f"Planned {args.pickups} pickups into {len(routes)} routes in {elapsed:.2f} s")
+    print(f"Total distance {total_km:.0f} km ({total_km / naive_km:.1%} of one round trip per pickup), "
+          f"mean load {sum(r['load_kg'] for r in routes) / len(routes):.0f} kg, "
+          f"mean {routed / len(routes):.1f} stops per route")
+
+if __name__ == '__main__':
+    main()
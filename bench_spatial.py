@@ -0,0 +1,40 @@
+import argparse
+import random
+import time
+from spatial_index import GridIndex, haversine_km
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark nearest-center queries on the grid index')
+    parser.add_argument('--centers', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=5000)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--radius-km', type=float, default=25.0)
+    args = parser.parse_args()
+
+    # Roughly the extent of a large Indian state
+    lat_range, lng_range = (11.5, 18.5), (74.0, 78.5)
+    points = [(random.uniform(*lat_range), random.uniform(*lng_range), i) for i in range(args.centers)]
+
+    started = time.perf_counter()
+    grid = GridIndex()
+    for lat, lng, item in points:
+        grid.insert(lat, lng, item)
+    print(f"Built index over {args.centers} centers in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    queries = [(random.uniform(*lat_range), random.uniform(*lng_range)) for _ in range(args.queries)]
+    started = time.perf_counter()
+    for lat, lng in queries:
+        grid.nearest(lat, lng, args.k, args.radius_km)
+    elapsed_ms = (time.perf_counter() - started) * 1000 / args.queries
+    print(f"nearest(k={args.k}, radius_km={args.radius_km}): {elapsed_ms:.3f} ms/query")
+
+    # Check a few answers against a brute-force scan
+    for lat, lng in queries[:20]:
+        expected = sorted(haversine_km(lat, lng, p_lat, p_lng) for p_lat, p_lng, _ in points)[:args.k]
+        expected = [d for d in expected if d <= args.radius_km]
+        got = [d for d, _ in grid.nearest(lat, lng, args.k, args.radius_km)]
+        assert all(abs(a - b) < 1e-9 for a, b in zip(got, expected)) and len(got) == len(expected)
+    print("Results match brute force")
+
+if __name__ == '__main__':
+    main()
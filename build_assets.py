@@ -0,0 +1,28 @@
+import argparse
+import os
+from assets import build_assets, fetch_vendor_files, DIST_DIR
+
+def main():
+    parser = argparse.ArgumentParser(description='Bundle, fingerprint and precompress static assets into static/dist')
+    parser.add_argument('--fetch', action='store_true',
+                        help='Download missing vendor libraries into assets/vendor first (needs network)')
+    parser.add_argument('--force', action='store_true', help='With --fetch, download vendor files even if present')
+    args = parser.parse_args()
+
+    if args.fetch:
+        fetched = fetch_vendor_files(force=args.force)
+        print(f"Fetched {len(fetched)} vendor files")
+
+    manifest, skipped = build_assets()
+    for name, filename in sorted(manifest.items()):
+        path = os.path.join(DIST_DIR, filename)
+        sizes = [f"{os.path.getsize(path)} B"]
+        for suffix in ('.gz', '.br'):
+            if os.path.exists(path + suffix):
+                sizes.append(f"{suffix[1:]} {os.path.getsize(path + suffix)} B")
+        print(f"{name} -> {filename} ({', '.join(sizes)})")
+    for name in skipped:
+        print(f"{name}: sources missing, templates use the unbuilt files from assets/vendor (run with --fetch)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,343 @@
+import csv
+import io
+import json
+from operator import itemgetter
+from datetime import date, datetime
+from sqlalchemy import update, select, func, bindparam
+from models import db, User, WasteCollection, RecyclingActivity, WasteRollup, CarbonLedger
+from rollups import apply_collection_delta, sync_statistics_for
+from carbon import apply_carbon_delta, WASTE
+from scoring import get_rules
+from user_cache import user_cache
+from waste_charts import chart_cache
+from leaderboard import leaderboard
+from app_logging import get_logger
+
+logger = get_logger('bulk_ingest')
+
+BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+VALID_STATUSES = ('Pending', 'Collected', 'Recycled')
+MAX_QUANTITY = 100000
+
+class RowError(ValueError):
+    pass
+
+def iter_csv(stream):
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8', newline=''))
+    # Line 1 is the header
+    for line_no, row in enumerate(reader, start=2):
+        yield line_no, row
+
+def iter_ndjson(stream):
+    for line_no, line in enumerate(io.TextIOWrapper(stream, encoding='utf-8'), start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_no, RowError('Invalid JSON')
+            continue
+        if not isinstance(row, dict):
+            yield line_no, RowError('Each line must be a JSON object')
+            continue
+        yield line_no, row
+
+def parse_row(row, default_user_id, allow_any_user, now):
+    """Validate one input row and return the WasteCollection column values"""
+    if isinstance(row, RowError):
+        raise row
+
+    user_id = row.get('user_id')
+    if user_id in (None, ''):
+        user_id = default_user_id
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        raise RowError('user_id must be an integer')
+    if user_id != default_user_id and not allow_any_user:
+        raise RowError('Not allowed to add collections for another user')
+
+    waste_type = (row.get('waste_type') or '').strip()
+    if not waste_type or len(waste_type) > 50:
+        raise RowError('waste_type is required (max 50 characters)')
+
+    try:
+        quantity = float(row.get('quantity'))
+    except (TypeError, ValueError):
+        raise RowError('quantity must be a number')
+    if not (0 < quantity <= MAX_QUANTITY):
+        raise RowError(f'quantity must be greater than 0 and at most {MAX_QUANTITY}')
+
+    status = (row.get('status') or 'Pending').strip()
+    if status not in VALID_STATUSES:
+        raise RowError(f"status must be one of {', '.join(VALID_STATUSES)}")
+
+    scheduled_date = row.get('scheduled_date')
+    if scheduled_date:
+        try:
+            scheduled_date = datetime.fromisoformat(str(scheduled_date))
+        except ValueError:
+            raise RowError('scheduled_date must be an ISO 8601 date')
+    else:
+        scheduled_date = now
+
+    return {
+        'user_id': user_id,
+        'waste_type': waste_type,
+        'quantity': quantity,
+        'status': status,
+        'notes': row.get('notes') or None,
+        'scheduled_date': scheduled_date,
+        'created_at': now
+    }
+
+class IngestReport:
+    def __init__(self):
+        self.inserted = 0
+        self.error_count = 0
+        self.errors = []
+        self.batches = 0
+
+    def add_error(self, line_no, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line_no, 'error': message})
+
+    def add_batch_error(self, line_numbers):
+        """One entry for a batch that could not be saved; none of its rows were inserted"""
+        self.error_count += len(line_numbers)
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({
+                'line': line_numbers[0],
+                'last_line': line_numbers[-1],
+                'error': f'Could not save the {len(line_numbers)} valid rows in this batch, please retry them'
+            })
+
+    def to_dict(self):
+        return {
+            'inserted': self.inserted,
+            'error_count': self.error_count,
+            'errors': self.errors,
+            'errors_truncated': self.error_count > len(self.errors),
+            'batches': self.batches
+        }
+
+def driver_executemany(table, rows, statement=None):
+    """Run an INSERT into table (or `statement`) for rows with a single DB-API executemany.
+
+    This skips SQLAlchemy's per-row bind processing, which dominates the
+    cost of large batches. SQLite gets dates and datetimes pre-formatted
+    the same way SQLAlchemy stores them.
+    """
+    if statement is None:
+        statement = table.insert()
+    connection = db.session.connection()
+    compiled = statement.compile(dialect=connection.dialect, column_keys=list(rows[0]))
+    if not compiled.positional or not set(compiled.positiontup) <= set(rows[0]):
+        db.session.execute(statement, rows)
+        return
+
+    keys = compiled.positiontup
+    getter = itemgetter(*keys)
+    date_positions = []
+    if connection.dialect.name == 'sqlite':
+        date_positions = [i for i, key in enumerate(keys) if isinstance(compiled.binds[key].type, (db.DateTime, db.Date))]
+
+    if not date_positions:
+        params = [getter(row) if len(keys) > 1 else (getter(row),) for row in rows]
+    else:
+        formatted = {}
+        params = []
+        for row in rows:
+            values = list(getter(row)) if len(keys) > 1 else [getter(row)]
+            for i in date_positions:
+                value = values[i]
+                if isinstance(value, date):
+                    if value not in formatted:
+                        # Same storage formats as SQLAlchemy's SQLite DateTime and Date
+                        formatted[value] = value.strftime('%Y-%m-%d %H:%M:%S.%f') if isinstance(value, datetime) \
+                            else value.isoformat()
+                    values[i] = formatted[value]
+            params.append(tuple(values))
+    connection.exec_driver_sql(compiled.string, params)
+
+def insert_returning_ids(table, rows):
+    """Insert rows and return their new primary keys in row order"""
+    connection = db.session.connection()
+    if connection.dialect.name == 'sqlite':
+        # SQLite has a single writer and this transaction holds the write lock from the
+        # first row on, so the new rowids are the len(rows) values ending at the maximum
+        driver_executemany(table, rows)
+        last_id = connection.execute(select(func.max(table.c.id))).scalar()
+        return list(range(last_id - len(rows) + 1, last_id + 1))
+    result = connection.execute(table.insert().returning(table.c.id, sort_by_parameter_order=True), rows)
+    return [row[0] for row in result]
+
+def _insert_missing(table, keys):
+    """Create rows with default totals for unique keys that have none yet; False if the database cannot"""
+    dialect = db.session.connection().dialect.name
+    if dialect not in ('sqlite', 'postgresql'):
+        return False
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    driver_executemany(table, keys, insert(table).on_conflict_do_nothing())
+    return True
+
+def apply_rollup_deltas(deltas, now):
+    """apply_collection_delta for a whole batch in two statements"""
+    table = WasteRollup.__table__
+    keys = [{'user_id': user_id, 'waste_type': waste_type, 'status': status, 'total_quantity': 0.0,
+             'collection_count': 0, 'updated_at': now} for user_id, waste_type, status in deltas]
+    if not _insert_missing(table, keys):
+        for (user_id, waste_type, status), (quantity, count) in deltas.items():
+            apply_collection_delta(user_id, waste_type, status, quantity, count=count)
+        return
+    # Increment in SQL so concurrent writers don't lose updates
+    driver_executemany(table, [
+        {'b_user_id': user_id, 'b_waste_type': waste_type, 'b_status': status, 'b_quantity': quantity,
+         'b_count': count, 'b_now': now}
+        for (user_id, waste_type, status), (quantity, count) in deltas.items()
+    ], update(table).where(
+        table.c.user_id == bindparam('b_user_id'), table.c.waste_type == bindparam('b_waste_type'),
+        table.c.status == bindparam('b_status')
+    ).values(
+        total_quantity=table.c.total_quantity + bindparam('b_quantity'),
+        collection_count=table.c.collection_count + bindparam('b_count'),
+        updated_at=bindparam('b_now', type_=db.DateTime)
+    ))
+
+def apply_carbon_deltas(deltas, now):
+    """apply_carbon_delta for a whole batch of waste collections in two statements"""
+    rules = get_rules()
+    table = CarbonLedger.__table__
+    keys = [{'user_id': user_id, 'day': day, 'source': WASTE, 'activity_type': waste_type, 'quantity': 0.0,
+             'carbon_offset': 0.0, 'entry_count': 0, 'updated_at': now} for user_id, day, waste_type in deltas]
+    if not _insert_missing(table, keys):
+        for (user_id, day, waste_type), (quantity, count) in deltas.items():
+            apply_carbon_delta(user_id, day, WASTE, waste_type, quantity,
+                               rules.waste_carbon_offset(waste_type, quantity), count=count)
+        return
+    driver_executemany(table, [
+        {'b_user_id': user_id, 'b_day': day, 'b_source': WASTE, 'b_activity_type': waste_type,
+         'b_quantity': quantity, 'b_offset': rules.waste_carbon_offset(waste_type, quantity), 'b_count': count,
+         'b_now': now}
+        for (user_id, day, waste_type), (quantity, count) in deltas.items()
+    ], update(table).where(
+        table.c.user_id == bindparam('b_user_id'), table.c.day == bindparam('b_day'),
+        table.c.source == bindparam('b_source'), table.c.activity_type == bindparam('b_activity_type')
+    ).values(
+        quantity=table.c.quantity + bindparam('b_quantity'),
+        carbon_offset=table.c.carbon_offset + bindparam('b_offset'),
+        entry_count=table.c.entry_count + bindparam('b_count'),
+        updated_at=bindparam('b_now', type_=db.DateTime)
+    ))
+
+def flush_batch(batch, report, now):
+    """Insert one batch and apply its points, rollup and carbon deltas. Returns the users it changed."""
+    user_ids = {values['user_id'] for _, values in batch}
+    known = {row[0] for row in db.session.query(User.id).filter(User.id.in_(user_ids))}
+
+    rows = []
+    lines = []
+    rollup_deltas = {}
+    carbon_deltas = {}
+    for line_no, values in batch:
+        user_id = values['user_id']
+        if user_id not in known:
+            report.add_error(line_no, f'Unknown user_id {user_id}')
+            continue
+        rows.append(values)
+        lines.append(line_no)
+        key = (user_id, values['waste_type'], values['status'])
+        quantity, count = rollup_deltas.get(key, (0.0, 0))
+        rollup_deltas[key] = (quantity + values['quantity'], count + 1)
+        key = (user_id, values['scheduled_date'].date(), values['waste_type'])
+        quantity, count = carbon_deltas.get(key, (0.0, 0))
+        carbon_deltas[key] = (quantity + values['quantity'], count + 1)
+
+    if not rows:
+        return set()
+
+    scores = get_rules().score_collections((values['waste_type'], values['quantity'], values['status']) for values in rows)
+    points = {}
+    for values, earned in zip(rows, scores):
+        points[values['user_id']] = points.get(values['user_id'], 0) + earned
+
+    try:
+        collection_ids = insert_returning_ids(WasteCollection.__table__, rows)
+
+        # One activity per collection, linked to it so deleting the collection takes its points back
+        driver_executemany(RecyclingActivity.__table__, [{
+            'user_id': values['user_id'],
+            'activity_type': 'Bulk Import',
+            'description': f"Imported {values['quantity']} kg of {values['waste_type']} waste",
+            'points_earned': earned,
+            'date': now,
+            'waste_collection_id': collection_id,
+            'pickup_schedule_id': None
+        } for values, earned, collection_id in zip(rows, scores, collection_ids)])
+        db.session.execute(
+            update(User.__table__).where(User.__table__.c.id == bindparam('uid'))
+            .values(points=User.__table__.c.points + bindparam('earned')),
+            [{'uid': user_id, 'earned': earned} for user_id, earned in points.items()]
+        )
+        apply_rollup_deltas(rollup_deltas, now)
+        apply_carbon_deltas(carbon_deltas, now)
+
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.exception("Bulk ingest batch of %d rows starting at line %d failed: %s", len(rows), lines[0], e)
+        report.add_batch_error(lines)
+        return set()
+
+    # The points and rollup updates bypass the ORM, so its invalidation hooks do not fire
+    for user_id in points:
+        user_cache.invalidate(user_id)
+        chart_cache.invalidate(user_id)
+    leaderboard.refresh_users(points)
+    for user_id, earned in points.items():
+        leaderboard.record_earned(user_id, earned, now)
+    report.inserted += len(rows)
+    report.batches += 1
+    return set(points)
+
+def ingest(stream, fmt, default_user_id, allow_any_user=False, batch_size=BATCH_SIZE):
+    """Validate and insert waste collections from a CSV or NDJSON stream.
+
+    bench_ingest.py measures about 11-12k rows/s on SQLite for 100k rows
+    spread over 1000 users and a year of dates, short of the 50k rows/s
+    target. Roughly two thirds of that time is SQLite executing the batched
+    collection and activity inserts and the rollup and ledger upserts.
+    """
+    report = IngestReport()
+    now = datetime.utcnow()
+    rows = iter_csv(stream) if fmt == 'csv' else iter_ndjson(stream)
+
+    batch = []
+    changed_users = set()
+    for line_no, row in rows:
+        try:
+            batch.append((line_no, parse_row(row, default_user_id, allow_any_user, now)))
+        except RowError as e:
+            report.add_error(line_no, str(e))
+            continue
+        if len(batch) >= batch_size:
+            changed_users |= flush_batch(batch, report, now)
+            batch = []
+    if batch:
+        changed_users |= flush_batch(batch, report, now)
+
+    # Once per user for the whole upload rather than per batch
+    try:
+        sync_statistics_for(changed_users)
+        db.session.commit()
+    except Exception as e:
+        # The rollups are committed, so the statistics refresher catches up later
+        db.session.rollback()
+        logger.exception("Error syncing statistics after bulk ingest: %s", e)
+    return report
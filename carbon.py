@@ -0,0 +1,165 @@
+from datetime import datetime, timedelta
+from sqlalchemy import select, update, func, case, cast, literal
+from sqlalchemy.exc import IntegrityError
+from models import db, CarbonLedger, WasteCollection, GreenActivity
+from scoring import get_rules
+from waste_charts import bucket_expression
+
+WASTE = 'waste'
+GREEN = 'green'
+RECENT_DAYS = 30
+
+def _ensure_entry(user_id, day, source, activity_type):
+    table = CarbonLedger.__table__
+    values = dict(user_id=user_id, day=day, source=source, activity_type=activity_type,
+                  quantity=0.0, carbon_offset=0.0, entry_count=0)
+    dialect = db.engine.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        db.session.execute(insert(table).values(**values).on_conflict_do_nothing())
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.execute(table.insert().values(**values))
+    except IntegrityError:
+        # Another request created the row first
+        pass
+
+def apply_carbon_delta(user_id, day, source, activity_type, quantity, offset, count=1):
+    """Add to a user's ledger bucket for one day. Caller owns the commit."""
+    lookup = CarbonLedger.query.filter_by(
+        user_id=user_id,
+        day=day,
+        source=source,
+        activity_type=activity_type
+    )
+    entry = lookup.first()
+
+    if not entry:
+        # Two first writes for a day can race here; both end up incrementing the same row
+        _ensure_entry(user_id, day, source, activity_type)
+        entry = lookup.one()
+
+    # Increment in SQL so concurrent writers don't lose updates
+    entry.quantity = CarbonLedger.quantity + float(quantity)
+    entry.carbon_offset = CarbonLedger.carbon_offset + float(offset)
+    entry.entry_count = CarbonLedger.entry_count + count
+    entry.updated_at = datetime.utcnow()
+    return entry
+
+def record_collection_carbon(collection, sign=1):
+    """Book (or with sign=-1, take back) a waste collection's offset on its scheduled day"""
+    offset = get_rules().waste_carbon_offset(collection.waste_type, collection.quantity)
+    return apply_carbon_delta(collection.user_id, collection.scheduled_date.date(), WASTE, collection.waste_type,
+                              sign * collection.quantity, sign * offset, count=sign)
+
+def record_green_activity(activity):
+    date = activity.date or datetime.utcnow()
+    return apply_carbon_delta(activity.user_id, date.date(), GREEN, activity.activity_type,
+                              activity.quantity or 0.0, activity.carbon_offset)
+
+def carbon_summary(user_id, today=None):
+    """Total, last-30-day, monthly and per-type offset for a user, from the ledger buckets"""
+    today = today or datetime.utcnow().date()
+    recent_start = today - timedelta(days=RECENT_DAYS - 1)
+    filters = (CarbonLedger.user_id == user_id,)
+
+    total, recent = db.session.query(
+        func.coalesce(func.sum(CarbonLedger.carbon_offset), 0.0),
+        func.coalesce(func.sum(case((CarbonLedger.day >= recent_start, CarbonLedger.carbon_offset), else_=0.0)), 0.0)
+    ).filter(*filters).one()
+
+    month = bucket_expression('monthly', CarbonLedger.day).label('month')
+    by_month = db.session.query(month, func.sum(CarbonLedger.carbon_offset)).filter(*filters) \
+        .group_by(month).order_by(month).all()
+    by_type = db.session.query(
+        CarbonLedger.source,
+        CarbonLedger.activity_type,
+        func.sum(CarbonLedger.quantity),
+        func.sum(CarbonLedger.carbon_offset)
+    ).filter(*filters).group_by(CarbonLedger.source, CarbonLedger.activity_type) \
+        .order_by(CarbonLedger.source, CarbonLedger.activity_type).all()
+
+    return {
+        'total': round(float(total), 3),
+        'last_30_days': round(float(recent), 3),
+        'by_month': [{'month': value[:7], 'carbon_offset': round(float(offset), 3)} for value, offset in by_month],
+        'by_activity_type': [{
+            'source': source,
+            'activity_type': activity_type,
+            'quantity': round(float(quantity), 3),
+            'carbon_offset': round(float(offset), 3)
+        } for source, activity_type, quantity, offset in by_type],
+    }
+
+def factor_expression(factors, column):
+    """factors[column] as one SQL CASE, 0 for types missing from the table"""
+    if not factors:
+        return literal(0.0)
+    return case(factors, value=column, else_=0.0)
+
+def day_expression(column):
+    if db.engine.dialect.name == 'sqlite':
+        return func.date(column)
+    return cast(column, db.Date)
+
+def recompute_carbon_ledger(user_id=None):
+    """Rebuild the ledger from WasteCollection and GreenActivity with the current factor tables.
+
+    Run this after changing carbon factors in scoring_rules.json; offsets are
+    recomputed in SQL with one CASE per factor table instead of row by row.
+    Green activities saved before quantities were stored keep their offset.
+    """
+    rules = get_rules()
+
+    green = GreenActivity.__table__
+    reprice = update(green).where(green.c.quantity.isnot(None)).values(
+        carbon_offset=green.c.quantity * factor_expression(rules.carbon_factors, green.c.activity_type)
+    )
+    delete_query = CarbonLedger.query
+    if user_id is not None:
+        reprice = reprice.where(green.c.user_id == user_id)
+        delete_query = delete_query.filter_by(user_id=user_id)
+    db.session.execute(reprice)
+    delete_query.delete(synchronize_session=False)
+
+    waste_day = day_expression(WasteCollection.scheduled_date)
+    waste = select(
+        WasteCollection.user_id,
+        waste_day,
+        literal(WASTE),
+        WasteCollection.waste_type,
+        func.sum(WasteCollection.quantity),
+        func.sum(WasteCollection.quantity * factor_expression(rules.waste_type_carbon_factor, WasteCollection.waste_type)),
+        func.count(WasteCollection.id),
+        func.current_timestamp()
+    )
+    green_day = day_expression(GreenActivity.date)
+    green_rows = select(
+        GreenActivity.user_id,
+        green_day,
+        literal(GREEN),
+        GreenActivity.activity_type,
+        func.sum(func.coalesce(GreenActivity.quantity, 0.0)),
+        func.sum(GreenActivity.carbon_offset),
+        func.count(GreenActivity.id),
+        func.current_timestamp()
+    )
+    if user_id is not None:
+        waste = waste.where(WasteCollection.user_id == user_id)
+        green_rows = green_rows.where(GreenActivity.user_id == user_id)
+    waste = waste.group_by(WasteCollection.user_id, waste_day, WasteCollection.waste_type)
+    green_rows = green_rows.group_by(GreenActivity.user_id, green_day, GreenActivity.activity_type)
+
+    columns = ['user_id', 'day', 'source', 'activity_type', 'quantity', 'carbon_offset', 'entry_count', 'updated_at']
+    for source in (waste, green_rows):
+        db.session.execute(CarbonLedger.__table__.insert().from_select(columns, source))
+    db.session.commit()
+
+    count_query = CarbonLedger.query
+    if user_id is not None:
+        count_query = count_query.filter_by(user_id=user_id)
+    return count_query.count()
@@ -0,0 +1,223 @@
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import inspect, text
+from models import db
+from metrics import slow_queries
+
+# Queries the app runs on its hot paths: name -> (SQL, function returning sample parameters).
+# EXPLAIN never executes them, so the sample values only need the right types.
+HOT_QUERIES = {}
+
+def register_hot_query(name, sql, params=None):
+    HOT_QUERIES[name] = (sql, params or (lambda: {}))
+
+def _today():
+    return datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+
+register_hot_query('waste_details', "SELECT * FROM waste_collection WHERE user_id = :user_id "
+                   "ORDER BY created_at DESC LIMIT 50", lambda: {'user_id': 1})
+register_hot_query('recent_activities', "SELECT * FROM recycling_activity WHERE user_id = :user_id "
+                   "ORDER BY date DESC LIMIT 5", lambda: {'user_id': 1})
+register_hot_query('waste_stats', "SELECT * FROM waste_statistics WHERE user_id = :user_id "
+                   "ORDER BY date DESC LIMIT 1", lambda: {'user_id': 1})
+register_hot_query('user_pickups', "SELECT * FROM pickup_schedule WHERE user_id = :user_id "
+                   "ORDER BY pickup_date DESC", lambda: {'user_id': 1})
+register_hot_query('login_history', "SELECT * FROM user_login WHERE user_id = :user_id "
+                   "ORDER BY login_time DESC, id DESC LIMIT 50", lambda: {'user_id': 1})
+register_hot_query('waste_rollups', "SELECT * FROM waste_rollup WHERE user_id = :user_id", lambda: {'user_id': 1})
+register_hot_query('carbon_summary', "SELECT source, activity_type, SUM(quantity), SUM(carbon_offset) "
+                   "FROM carbon_ledger WHERE user_id = :user_id GROUP BY source, activity_type",
+                   lambda: {'user_id': 1})
+register_hot_query('pickups_for_day', "SELECT id, pickup_address, waste_type, quantity_estimate FROM pickup_schedule "
+                   "WHERE pickup_date >= :start AND pickup_date < :end AND status = 'Scheduled'",
+                   lambda: {'start': _today(), 'end': _today() + timedelta(days=1)})
+register_hot_query('pickup_slot', "SELECT * FROM pickup_slot WHERE pickup_date = :day AND zone = :zone",
+                   lambda: {'day': _today().date(), 'zone': 'default'})
+register_hot_query('geocode_cache', "SELECT * FROM geocode_cache WHERE address_key = :key", lambda: {'key': ''})
+register_hot_query('leaderboard_period', "SELECT user_id, SUM(points_earned) FROM recycling_activity "
+                   "WHERE date >= :start GROUP BY user_id", lambda: {'start': _today() - timedelta(days=7)})
+
+SQLITE_INDEX_IN_PLAN = re.compile(r'USING (?:COVERING )?INDEX (\w+)')
+# 'SCAN t' without 'USING' reads the whole table; older SQLite says 'SCAN TABLE t'
+SQLITE_FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)')
+POSTGRES_INDEX_IN_PLAN = re.compile(r'Index (?:Only )?Scan (?:Backward )?using (\w+)')
+POSTGRES_FULL_SCAN = re.compile(r'Seq Scan on (\w+)')
+
+class DatabaseDiagnostics:
+    """Health report for /db-diagnostics built only from catalog data and pragmas.
+
+    Row counts are estimates from the planner statistics (sqlite_stat1 or
+    pg_class.reltuples) and are cached for DB_DIAGNOSTICS_TTL seconds, so
+    the report never scans a table. Pass refresh=True to re-sample the
+    statistics first; on SQLite ANALYZE is capped with analysis_limit.
+    """
+
+    def __init__(self, ttl_seconds=300, analysis_limit=1000):
+        self.ttl_seconds = ttl_seconds
+        self.analysis_limit = analysis_limit
+        self._counts = None
+        self._counted_at = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.ttl_seconds = app.config.get('DB_DIAGNOSTICS_TTL', self.ttl_seconds)
+
+    def report(self, refresh=False):
+        dialect = db.engine.dialect.name
+        started = time.perf_counter()
+        if refresh:
+            self.refresh_statistics()
+
+        report = {
+            'dialect': dialect,
+            'database_uri': db.engine.url.render_as_string(hide_password=True),
+            'connection_status': self.connection_status(),
+            'tables_found': inspect(db.engine).get_table_names(),
+            'approximate_row_counts': self.row_counts(dialect),
+            'hot_queries': self.query_plans(dialect),
+            'slow_statements': slow_queries.slowest(),
+            'slow_statement_threshold_ms': slow_queries.threshold_ms,
+        }
+        report['index_usage'] = self.index_usage(dialect, report['hot_queries'])
+        if dialect == 'sqlite':
+            report['storage'] = self.sqlite_storage()
+        report['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        return report
+
+    def connection_status(self):
+        try:
+            db.session.execute(text('SELECT 1'))
+            return 'Successful'
+        except Exception as e:
+            return f'Failed: {e}'
+
+    def refresh_statistics(self):
+        if db.engine.dialect.name == 'sqlite':
+            # Sample at most analysis_limit rows per index so this stays fast on big files
+            db.session.execute(text(f'PRAGMA analysis_limit={int(self.analysis_limit)}'))
+            db.session.execute(text('ANALYZE'))
+        elif db.engine.dialect.name == 'postgresql':
+            db.session.execute(text('ANALYZE'))
+        db.session.commit()
+        with self._lock:
+            self._counts = None
+
+    def row_counts(self, dialect):
+        with self._lock:
+            if self._counts is not None and time.monotonic() - self._counted_at < self.ttl_seconds:
+                return self._counts
+        if dialect == 'sqlite':
+            counts = self._sqlite_row_counts()
+        elif dialect == 'postgresql':
+            counts = {name: {'rows': max(int(rows), 0), 'source': 'pg_class.reltuples'}
+                      for name, rows in db.session.execute(text(
+                          "SELECT relname, reltuples FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+                          "WHERE c.relkind = 'r' AND n.nspname = current_schema()"))}
+        else:
+            counts = {}
+        counts = {'counted_at': datetime.utcnow().isoformat(timespec='seconds'), 'tables': counts}
+        with self._lock:
+            self._counts = counts
+            self._counted_at = time.monotonic()
+        return counts
+
+    def _sqlite_row_counts(self):
+        counts = {}
+        has_stats = db.session.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")).first()
+        if has_stats:
+            for table, stat in db.session.execute(text('SELECT tbl, stat FROM sqlite_stat1')):
+                rows = int((stat or '0').split()[0])
+                counts[table] = {'rows': max(rows, counts.get(table, {}).get('rows', 0)), 'source': 'sqlite_stat1'}
+        for table in inspect(db.engine).get_table_names():
+            if table in counts or table.startswith('sqlite_'):
+                continue
+            # The largest rowid is a B-tree seek and an upper bound on the row count
+            rows = db.session.execute(text(f'SELECT MAX(rowid) FROM "{table}"')).scalar()
+            counts[table] = {'rows': rows or 0, 'source': 'max_rowid'}
+        return counts
+
+    def query_plans(self, dialect):
+        plans = {}
+        for name, (sql, params) in HOT_QUERIES.items():
+            try:
+                if dialect == 'sqlite':
+                    plan = [row[-1] for row in db.session.execute(text(f'EXPLAIN QUERY PLAN {sql}'), params())]
+                    index_pattern = SQLITE_INDEX_IN_PLAN
+                else:
+                    plan = [row[0] for row in db.session.execute(text(f'EXPLAIN {sql}'), params())]
+                    index_pattern = POSTGRES_INDEX_IN_PLAN
+
+                indexes = []
+                full_scans = []
+                for step in plan:
+                    indexes.extend(index_pattern.findall(step))
+                    if dialect == 'sqlite':
+                        match = SQLITE_FULL_SCAN.match(step)
+                        if match and 'USING' not in step:
+                            full_scans.append(match.group(1))
+                    else:
+                        full_scans.extend(POSTGRES_FULL_SCAN.findall(step))
+                plans[name] = {'sql': sql, 'plan': plan, 'indexes_used': indexes, 'full_scans': full_scans}
+            except Exception as e:
+                db.session.rollback()
+                plans[name] = {'sql': sql, 'error': str(e)}
+        return plans
+
+    def index_usage(self, dialect, plans):
+        """Every index with the hot queries whose plans use it, plus scan counts where the database keeps them"""
+        used_by = {}
+        for name, plan in plans.items():
+            for index in plan.get('indexes_used', []):
+                used_by.setdefault(index, []).append(name)
+
+        usage = {}
+        inspector = inspect(db.engine)
+        for table in inspector.get_table_names():
+            for index in inspector.get_indexes(table):
+                usage[index['name']] = {
+                    'table': table,
+                    'columns': index['column_names'],
+                    'unique': bool(index.get('unique')),
+                    'hot_queries': used_by.get(index['name'], []),
+                }
+        for index, queries in used_by.items():
+            if index not in usage:
+                # Indexes the database created itself, e.g. for UNIQUE constraints on SQLite
+                usage[index] = {'table': None, 'columns': None, 'unique': True, 'hot_queries': queries}
+        if dialect == 'postgresql':
+            for index, scans in db.session.execute(text(
+                    'SELECT indexrelname, idx_scan FROM pg_stat_user_indexes')):
+                if index in usage:
+                    usage[index]['scans'] = int(scans or 0)
+        return usage
+
+    def sqlite_storage(self):
+        def pragma(name):
+            return db.session.execute(text(f'PRAGMA {name}')).scalar()
+
+        page_size = pragma('page_size')
+        page_count = pragma('page_count')
+        freelist_count = pragma('freelist_count')
+        storage = {
+            'journal_mode': pragma('journal_mode'),
+            'page_size': page_size,
+            'page_count': page_count,
+            'freelist_count': freelist_count,
+            'database_bytes': page_size * page_count,
+            'free_bytes': page_size * freelist_count,
+            'free_ratio': round(freelist_count / page_count, 4) if page_count else 0.0,
+            'wal_bytes': None,
+        }
+        path = db.engine.url.database
+        if path and path != ':memory:':
+            try:
+                storage['wal_bytes'] = os.path.getsize(f'{path}-wal')
+            except OSError:
+                storage['wal_bytes'] = 0
+        return storage
+
+diagnostics = DatabaseDiagnostics()
@@ -0,0 +1,77 @@
+import os
+from sqlalchemy import event
+
+# Deployment profiles selectable with DB_PROFILE in .env:
+#   default     - SQLite with the driver defaults (rollback journal)
+#   sqlite-wal  - SQLite in WAL mode with tuned pragmas, for multi-worker gunicorn
+#   postgres    - DATABASE_URL points at Postgres, with a sized and pre-pinged pool
+PROFILES = ('default', 'sqlite-wal', 'postgres')
+
+def database_uri(instance_path):
+    return os.getenv('DATABASE_URL') or f"sqlite:///{os.path.join(instance_path, 'ecotrack.db')}"
+
+def sqlite_pragmas():
+    return {
+        'journal_mode': 'WAL',
+        'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000')),
+        'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+        # Negative values are KiB rather than pages
+        'cache_size': -int(os.getenv('SQLITE_CACHE_SIZE_KB', '65536')),
+        'temp_store': 'MEMORY',
+    }
+
+def engine_options(profile):
+    """SQLALCHEMY_ENGINE_OPTIONS for a profile.
+
+    Each gunicorn worker is its own process with its own pool, so the pool
+    is sized for one worker's threads (GUNICORN_THREADS), not the whole
+    deployment.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE {profile!r}, expected one of {', '.join(PROFILES)}")
+    if profile == 'default':
+        return {}
+    if profile == 'postgres' and not os.getenv('DATABASE_URL'):
+        # Otherwise database_uri() quietly falls back to the SQLite file
+        raise ValueError('DB_PROFILE=postgres requires DATABASE_URL to point at a postgresql:// database')
+
+    threads = int(os.getenv('GUNICORN_THREADS', '4'))
+    options = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', str(threads))),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '2')),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', '10')),
+    }
+    if profile == 'sqlite-wal':
+        # The driver-level timeout matches busy_timeout so waits happen inside SQLite
+        options['connect_args'] = {
+            'timeout': sqlite_pragmas()['busy_timeout'] / 1000,
+            'check_same_thread': False,
+        }
+    else:
+        options['pool_pre_ping'] = True
+        options['pool_recycle'] = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+    return options
+
+def apply_profile(app, db, profile):
+    """Attach per-connection setup for the profile to the app's engine"""
+    if profile == 'postgres':
+        with app.app_context():
+            if db.engine.dialect.name != 'postgresql':
+                raise ValueError('DB_PROFILE=postgres requires a postgresql:// database URI')
+        return
+    if profile != 'sqlite-wal':
+        return
+
+    pragmas = sqlite_pragmas()
+    with app.app_context():
+        engine = db.engine
+        if engine.dialect.name != 'sqlite':
+            raise ValueError('DB_PROFILE=sqlite-wal requires a sqlite:// database URI')
+
+        @event.listens_for(engine, 'connect')
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            cursor.close()
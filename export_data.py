@@ -0,0 +1,34 @@
+import argparse
+import os
+import sys
+import time
+from app import app
+from exports import Export, ExportUnavailable, DATASETS, FORMATS
+
+def main():
+    parser = argparse.ArgumentParser(description='Export waste history tables as CSV or Parquet')
+    parser.add_argument('--dataset', choices=list(DATASETS) + ['all'], default='all')
+    parser.add_argument('--format', choices=FORMATS, default='csv')
+    parser.add_argument('--user-id', type=int, help='Only export this user (default: every user)')
+    parser.add_argument('--gzip', action='store_true', help='gzip CSV output, or use gzip inside Parquet')
+    parser.add_argument('--output-dir', default='.', help='Directory the files are written to')
+    args = parser.parse_args()
+
+    datasets = list(DATASETS) if args.dataset == 'all' else [args.dataset]
+    os.makedirs(args.output_dir, exist_ok=True)
+    with app.app_context():
+        for dataset in datasets:
+            try:
+                export = Export(dataset, args.format, args.user_id, compress=args.gzip)
+            except ExportUnavailable as e:
+                sys.exit(str(e))
+            path = os.path.join(args.output_dir, export.filename)
+            started = time.perf_counter()
+            with open(path, 'wb') as f:
+                for chunk in export.chunks():
+                    f.write(chunk)
+            print(f"{dataset}: {export.rows} rows, {os.path.getsize(path) / 1024:.1f} KiB "
+                  f"in {time.perf_counter() - started:.2f} s -> {path}")
+
+if __name__ == '__main__':
+    main()
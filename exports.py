@@ -0,0 +1,165 @@
+import csv
+import io
+import zlib
+from datetime import date, datetime
+from sqlalchemy import select
+from models import db, WasteCollection, RecyclingActivity, PickupSchedule, GreenActivity
+
+DATASETS = {
+    'waste_collections': WasteCollection,
+    'recycling_activities': RecyclingActivity,
+    'pickups': PickupSchedule,
+    'green_activities': GreenActivity,
+}
+FORMATS = ('csv', 'parquet')
+BATCH_SIZE = 5000
+PARQUET_ROW_GROUP_SIZE = 50000
+
+class ExportUnavailable(ValueError):
+    pass
+
+class _ChunkSink:
+    """Write-only file object that hands written bytes back to a generator"""
+    closed = False
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+def parquet_type(column):
+    import pyarrow as pa
+
+    python_type = column.type.python_type
+    if python_type is bool:
+        return pa.bool_()
+    if python_type is int:
+        return pa.int64()
+    if python_type is float:
+        return pa.float64()
+    if python_type is datetime:
+        return pa.timestamp('us')
+    if python_type is date:
+        return pa.date32()
+    return pa.string()
+
+class Export:
+    """One table, for one user or everyone, streamed as CSV or Parquet.
+
+    Rows are read in BATCH_SIZE partitions from a server-side cursor and
+    written out as they arrive, so memory stays flat however many rows
+    there are. Parquet needs the optional pyarrow package and is compressed
+    by Parquet itself; CSV can be gzipped on the fly.
+    """
+
+    def __init__(self, dataset, fmt='csv', user_id=None, compress=False, batch_size=BATCH_SIZE):
+        if dataset not in DATASETS:
+            raise ExportUnavailable(f"dataset must be one of {', '.join(DATASETS)}")
+        if fmt not in FORMATS:
+            raise ExportUnavailable(f"format must be one of {', '.join(FORMATS)}")
+        if fmt == 'parquet':
+            try:
+                import pyarrow.parquet  # noqa: F401
+            except ImportError:
+                raise ExportUnavailable('Parquet export needs the pyarrow package')
+        self.dataset = dataset
+        self.fmt = fmt
+        self.user_id = user_id
+        self.compress = compress
+        self.batch_size = batch_size
+        self.table = DATASETS[dataset].__table__
+        self.rows = 0
+
+    @property
+    def filename(self):
+        owner = 'all' if self.user_id is None else f'user-{self.user_id}'
+        suffix = '.csv.gz' if self.fmt == 'csv' and self.compress else f'.{self.fmt}'
+        return f'{self.dataset}-{owner}{suffix}'
+
+    @property
+    def mimetype(self):
+        if self.fmt == 'parquet':
+            return 'application/vnd.apache.parquet'
+        return 'application/gzip' if self.compress else 'text/csv'
+
+    def batches(self):
+        query = select(*self.table.columns).order_by(self.table.c.id)
+        if self.user_id is not None:
+            query = query.where(self.table.c.user_id == self.user_id)
+        result = db.session.execute(query, execution_options={'yield_per': self.batch_size})
+        for partition in result.partitions():
+            self.rows += len(partition)
+            yield partition
+
+    def chunks(self):
+        if self.fmt == 'parquet':
+            return self._parquet()
+        chunks = self._csv()
+        return self._gzip(chunks) if self.compress else chunks
+
+    def _csv(self):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow([column.name for column in self.table.columns])
+        for partition in self.batches():
+            writer.writerows(partition)
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode('utf-8')
+
+    def _gzip(self, chunks):
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    def _parquet(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        columns = list(self.table.columns)
+        schema = pa.schema([(column.name, parquet_type(column)) for column in columns])
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(sink, schema, compression='gzip' if self.compress else 'snappy')
+        pending = []
+        for partition in self.batches():
+            pending.extend(partition)
+            # One row group per PARQUET_ROW_GROUP_SIZE rows keeps the file scannable column by column
+            if len(pending) >= PARQUET_ROW_GROUP_SIZE:
+                writer.write_table(self._arrow_table(pending, columns, schema))
+                pending = []
+                yield sink.drain()
+        if pending:
+            writer.write_table(self._arrow_table(pending, columns, schema))
+        writer.close()
+        yield sink.drain()
+
+    def _arrow_table(self, rows, columns, schema):
+        import pyarrow as pa
+
+        arrays = [pa.array([row[index] for row in rows], type=schema.field(index).type)
+                  for index in range(len(columns))]
+        return pa.Table.from_arrays(arrays, schema=schema)
@@ -0,0 +1,155 @@
+import csv
+import importlib
+import re
+import threading
+from sqlalchemy.exc import IntegrityError
+from models import db, GeocodeCache
+from app_logging import get_logger
+
+logger = get_logger('geocoding')
+
+PIN_CODE = re.compile(r'\b(\d{6})\b')
+MAX_LOCALITY_WORDS = 4
+
+def normalize_address(address):
+    return re.sub(r'[^a-z0-9]+', ' ', (address or '').lower()).strip()[:250]
+
+class Geocoder:
+    """Interface for offline geocoders: geocode() returns (lat, lng) or None.
+
+    Set GEOCODER to 'module:Class' to plug in another implementation; it is
+    constructed with the app config.
+    """
+    name = 'none'
+
+    def __init__(self, config=None):
+        self.config = config or {}
+
+    def geocode(self, address):
+        return None
+
+class GazetteerGeocoder(Geocoder):
+    """Looks addresses up in a local CSV gazetteer with key,latitude,longitude rows.
+
+    Keys are 6-digit PIN codes or locality names. A PIN code in the address
+    wins; otherwise the longest locality name contained in the address is used.
+    """
+    name = 'gazetteer'
+
+    def __init__(self, config=None):
+        super().__init__(config)
+        self.pin_codes = {}
+        self.localities = {}
+        path = self.config.get('GEOCODER_GAZETTEER')
+        if path:
+            self.load(path)
+
+    def load(self, path):
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                point = (float(row['latitude']), float(row['longitude']))
+                key = normalize_address(row['key'])
+                if PIN_CODE.fullmatch(key):
+                    self.pin_codes[key] = point
+                elif key:
+                    self.localities[key] = point
+        logger.info("Loaded gazetteer with %d PIN codes and %d localities", len(self.pin_codes), len(self.localities))
+
+    def geocode(self, address):
+        key = normalize_address(address)
+        for pin in PIN_CODE.findall(key):
+            if pin in self.pin_codes:
+                return self.pin_codes[pin]
+        # Longest phrases first so 'new delhi' beats 'delhi'
+        words = key.split()
+        for size in range(min(MAX_LOCALITY_WORDS, len(words)), 0, -1):
+            for start in range(len(words) - size + 1):
+                point = self.localities.get(' '.join(words[start:start + size]))
+                if point:
+                    return point
+        return None
+
+def load_geocoder(config):
+    spec = config.get('GEOCODER') or 'geocoding:GazetteerGeocoder'
+    module_name, _, class_name = spec.partition(':')
+    return getattr(importlib.import_module(module_name), class_name)(config)
+
+class GeocodeService:
+    """Resolves addresses through an in-process dict, then the GeocodeCache
+    table, then the configured geocoder. New results are written back to the
+    table. Misses are not stored, so an address is retried on every call
+    until the geocoder (for example a newly configured gazetteer) finds it."""
+
+    def __init__(self, max_memory=200000):
+        self.geocoder = None
+        self.max_memory = max_memory
+        self._memory = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.geocoder = load_geocoder(app.config)
+
+    def geocode_many(self, addresses, chunk_size=500):
+        """Return {address: (lat, lng) or None}. Caller owns the commit."""
+        geocoder = self.geocoder or Geocoder()
+        keys = {address: normalize_address(address) for address in set(addresses)}
+
+        found = {}
+        missing = set()
+        for key in set(keys.values()):
+            if key in self._memory:
+                found[key] = self._memory[key]
+            else:
+                missing.add(key)
+
+        missing = sorted(missing)
+        for start in range(0, len(missing), chunk_size):
+            chunk = missing[start:start + chunk_size]
+            for row in GeocodeCache.query.filter(GeocodeCache.address_key.in_(chunk)):
+                # Rows without coordinates are misses stored by older versions
+                if row.latitude is not None:
+                    found[row.address_key] = (row.latitude, row.longitude)
+
+        new_rows = []
+        for key in missing:
+            if key in found:
+                continue
+            point = geocoder.geocode(key)
+            found[key] = point
+            if point is not None:
+                new_rows.append({'address_key': key, 'latitude': point[0], 'longitude': point[1],
+                                 'source': geocoder.name})
+        if new_rows:
+            stale = [row['address_key'] for row in new_rows]
+            for start in range(0, len(stale), chunk_size):
+                GeocodeCache.query.filter(GeocodeCache.address_key.in_(stale[start:start + chunk_size]),
+                                          GeocodeCache.latitude.is_(None)).delete(synchronize_session=False)
+            _insert_new(new_rows)
+
+        with self._lock:
+            if len(self._memory) > self.max_memory:
+                self._memory.clear()
+            for key in missing:
+                if found.get(key) is not None:
+                    self._memory[key] = found[key]
+        return {address: found.get(key) for address, key in keys.items()}
+
+def _insert_new(rows):
+    """Insert cache rows, skipping addresses another worker stored first"""
+    table = GeocodeCache.__table__
+    dialect = db.engine.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        db.session.execute(insert(table).on_conflict_do_nothing(), rows)
+        return
+    for row in rows:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(table.insert(), row)
+        except IntegrityError:
+            pass
+
+geocode_service = GeocodeService()
@@ -0,0 +1,77 @@
+import hashlib
+import threading
+import time
+from datetime import datetime, timezone
+from flask import render_template
+from markupsafe import Markup
+from sqlalchemy import event
+from models import WasteGuideline
+
+class GuidelinesEntry:
+    def __init__(self, fragment, etag, last_modified):
+        self.fragment = fragment
+        self.etag = etag
+        self.last_modified = last_modified
+        # Full page for anonymous visitors, rendered on first use
+        self.page = None
+        self.page_etag = None
+
+class GuidelinesCache:
+    """Rendered guidelines fragment, plus the full page for anonymous visitors.
+
+    Writes to WasteGuideline in this process drop the cache; the TTL picks
+    up changes made by other workers. Last-Modified only moves when the
+    rendered fragment actually changes, so a TTL rebuild of the same data
+    keeps clients' conditional requests answering 304.
+    """
+
+    def __init__(self, ttl_seconds=300):
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self._entry = None
+        self._built_version = None
+        self._built_at = 0.0
+        self._lock = threading.RLock()
+
+    def invalidate(self):
+        with self._lock:
+            self.version += 1
+
+    def _is_fresh(self):
+        return (self._entry is not None
+                and self._built_version == self.version
+                and time.monotonic() - self._built_at < self.ttl_seconds)
+
+    def get(self):
+        if self._is_fresh():
+            return self._entry
+        with self._lock:
+            if not self._is_fresh():
+                version = self.version
+                guidelines = WasteGuideline.query.order_by(WasteGuideline.id).all()
+                fragment = Markup(render_template('guidelines_list.html', guidelines=guidelines))
+                etag = hashlib.sha1(fragment.encode('utf-8')).hexdigest()
+                if self._entry is not None and self._entry.etag == etag:
+                    last_modified = self._entry.last_modified
+                else:
+                    last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+                self._entry = GuidelinesEntry(fragment, etag, last_modified)
+                self._built_version = version
+                self._built_at = time.monotonic()
+            return self._entry
+
+    def anonymous_page(self, entry, render):
+        """Full page bytes and their ETag, rendered once per fragment"""
+        if entry.page is None:
+            page = render(entry.fragment).encode('utf-8')
+            entry.page_etag = hashlib.sha1(page).hexdigest()
+            entry.page = page
+        return entry.page, entry.page_etag
+
+guidelines_cache = GuidelinesCache()
+
+@event.listens_for(WasteGuideline, 'after_insert')
+@event.listens_for(WasteGuideline, 'after_update')
+@event.listens_for(WasteGuideline, 'after_delete')
+def _invalidate_guidelines(mapper, connection, target):
+    guidelines_cache.invalidate()
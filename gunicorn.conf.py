@@ -0,0 +1,24 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Each worker gets its own SQLAlchemy pool sized to GUNICORN_THREADS (see db_profiles.py)
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('GUNICORN_WORKERS', '4'))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+worker_class = 'gthread'
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+
+def on_starting(server):
+    # Build fingerprinted assets once in the master, before the workers load the manifest
+    from assets import assets_stale, build_assets
+    if assets_stale():
+        build_assets()
+
+def worker_exit(server, worker):
+    # Write any queued login audit events before the worker goes away
+    from login_audit import audit_writer
+    from passwords import hasher
+    audit_writer.stop()
+    hasher.shutdown()
@@ -0,0 +1,358 @@
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session, object_session
+from models import db, User, RecyclingActivity
+from app_logging import get_logger
+
+logger = get_logger('leaderboard')
+
+PERIODS = ('all', 'week', 'month')
+USER_ID_BITS = 32
+
+class RankedSet:
+    """Sorted multiset of ints with O(log n) rank and select.
+
+    Keys live in sorted sublists of roughly `load` items. A Fenwick tree over
+    the sublist lengths turns "how many keys come before this sublist" into
+    a log-time prefix sum, so rank() and key_at() are O(log n) while add()
+    and remove() only shift one short sublist.
+    """
+
+    def __init__(self, load=1000):
+        self.load = load
+        self._lists = []
+        self._maxes = []
+        self._tree = []
+        self._len = 0
+
+    @classmethod
+    def from_sorted(cls, keys, load=1000):
+        ranked = cls(load)
+        ranked._lists = [keys[start:start + load] for start in range(0, len(keys), load)]
+        ranked._maxes = [sublist[-1] for sublist in ranked._lists]
+        ranked._len = len(keys)
+        ranked._rebuild_tree()
+        return ranked
+
+    def __len__(self):
+        return self._len
+
+    def _rebuild_tree(self):
+        tree = [0] + [len(sublist) for sublist in self._lists]
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _tree_add(self, position, delta):
+        position += 1
+        while position < len(self._tree):
+            self._tree[position] += delta
+            position += position & -position
+
+    def _prefix(self, position):
+        """Number of keys in sublists before `position`"""
+        total = 0
+        while position > 0:
+            total += self._tree[position]
+            position -= position & -position
+        return total
+
+    def add(self, key):
+        if not self._lists:
+            self._lists.append([key])
+            self._maxes.append(key)
+            self._len = 1
+            self._rebuild_tree()
+            return
+        position = bisect_right(self._maxes, key)
+        if position == len(self._maxes):
+            position -= 1
+        sublist = self._lists[position]
+        insort(sublist, key)
+        self._maxes[position] = sublist[-1]
+        self._len += 1
+        if len(sublist) > 2 * self.load:
+            self._lists[position:position + 1] = [sublist[:self.load], sublist[self.load:]]
+            self._maxes[position:position + 1] = [sublist[self.load - 1], sublist[-1]]
+            self._rebuild_tree()
+        else:
+            self._tree_add(position, 1)
+
+    def remove(self, key):
+        position = bisect_left(self._maxes, key)
+        if position == len(self._maxes):
+            raise KeyError(key)
+        sublist = self._lists[position]
+        index = bisect_left(sublist, key)
+        if index == len(sublist) or sublist[index] != key:
+            raise KeyError(key)
+        del sublist[index]
+        self._len -= 1
+        if sublist:
+            self._maxes[position] = sublist[-1]
+            self._tree_add(position, -1)
+        else:
+            del self._lists[position]
+            del self._maxes[position]
+            self._rebuild_tree()
+
+    def rank(self, key):
+        """Number of keys strictly smaller than `key`"""
+        position = bisect_left(self._maxes, key)
+        if position == len(self._maxes):
+            return self._len
+        return self._prefix(position) + bisect_left(self._lists[position], key)
+
+    def key_at(self, index):
+        # Walk down the Fenwick tree to the sublist holding the index
+        position = 0
+        step = 1 << (len(self._tree).bit_length() - 1)
+        while step:
+            following = position + step
+            if following < len(self._tree) and self._tree[following] <= index:
+                position = following
+                index -= self._tree[following]
+            step >>= 1
+        return self._lists[position][index]
+
+    def slice(self, start, stop):
+        keys = []
+        for index in range(start, min(stop, self._len)):
+            keys.append(self.key_at(index))
+        return keys
+
+def encode(user_id, points):
+    # Higher points sort first, then lower user ids
+    return (-points << USER_ID_BITS) | user_id
+
+def decode(key):
+    return key & ((1 << USER_ID_BITS) - 1), -(key >> USER_ID_BITS)
+
+class Board:
+    """Points per user with competition ranking (1, 2, 2, 4)"""
+
+    def __init__(self, scores=None):
+        self.scores = dict(scores or {})
+        self.ranked = RankedSet.from_sorted(sorted(encode(user_id, points) for user_id, points in self.scores.items()))
+
+    def set(self, user_id, points):
+        old = self.scores.get(user_id)
+        if old == points:
+            return
+        if old is not None:
+            self.ranked.remove(encode(user_id, old))
+        self.scores[user_id] = points
+        self.ranked.add(encode(user_id, points))
+
+    def add(self, user_id, delta):
+        points = self.scores.get(user_id, 0) + delta
+        if points == 0 and user_id in self.scores:
+            # Period boards only list users who earned something
+            self.ranked.remove(encode(user_id, self.scores.pop(user_id)))
+        else:
+            self.set(user_id, points)
+
+    def rank(self, user_id):
+        points = self.scores.get(user_id)
+        if points is None:
+            return None, 0
+        # Users with strictly more points come first
+        return self.ranked.rank(encode(0, points)) + 1, points
+
+    def top(self, limit, offset=0):
+        entries = []
+        for key in self.ranked.slice(offset, offset + limit):
+            user_id, points = decode(key)
+            entries.append({'rank': self.ranked.rank(encode(0, points)) + 1, 'user_id': user_id, 'points': points})
+        return entries
+
+def period_start(period, now):
+    if period == 'week':
+        return datetime(now.year, now.month, now.day) - timedelta(days=now.weekday())
+    if period == 'month':
+        return datetime(now.year, now.month, 1)
+    return None
+
+class Leaderboard:
+    """Global and weekly/monthly leaderboards held in memory.
+
+    Committed points changes in this process are applied immediately; a
+    background thread rebuilds everything from the database every
+    LEADERBOARD_REFRESH seconds so changes made by other workers show up.
+    Weekly and monthly boards count points_earned on activities dated in
+    the current period.
+    """
+
+    def __init__(self, refresh_seconds=300):
+        self.refresh_seconds = refresh_seconds
+        self.boards = None
+        self.starts = {}
+        self._journal = None
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._thread = None
+
+    def init_app(self, app):
+        self.refresh_seconds = app.config.get('LEADERBOARD_REFRESH', self.refresh_seconds)
+
+    def _journal_position(self):
+        with self._lock:
+            return len(self._journal)
+
+    def _load(self, now, marks):
+        # Each board's mark is the journal length when its query starts: changes
+        # recorded before that are already in the rows it reads
+        marks['all'] = self._journal_position()
+        scores = {'all': {user_id: points or 0 for user_id, points in
+                          db.session.query(User.id, User.points).yield_per(50000)}}
+        starts = {}
+        for period in PERIODS[1:]:
+            starts[period] = period_start(period, now)
+            marks[period] = self._journal_position()
+            rows = db.session.query(RecyclingActivity.user_id, func.sum(RecyclingActivity.points_earned)).filter(
+                RecyclingActivity.date >= starts[period]
+            ).group_by(RecyclingActivity.user_id)
+            scores[period] = {user_id: int(points or 0) for user_id, points in rows}
+        return {period: Board(values) for period, values in scores.items()}, starts
+
+    def rebuild(self, only_if_missing=False):
+        with self._build_lock:
+            if only_if_missing and self.boards is not None:
+                return
+            started = time.perf_counter()
+            with self._lock:
+                # Changes committed while the snapshot loads are replayed onto it
+                self._journal = []
+            marks = {}
+            try:
+                boards, starts = self._load(datetime.utcnow(), marks)
+            except Exception:
+                with self._lock:
+                    self._journal = None
+                raise
+            with self._lock:
+                journal, self._journal = self._journal, None
+                self.boards, self.starts = boards, starts
+                for index, operation in enumerate(journal):
+                    self._apply(*operation, periods=[period for period in PERIODS if marks[period] <= index])
+            logger.info("Rebuilt leaderboards for %d users in %.0f ms",
+                        len(boards['all'].scores), (time.perf_counter() - started) * 1000)
+
+    def _ensure_built(self):
+        if self.boards is None:
+            self.rebuild(only_if_missing=True)
+        now = datetime.utcnow()
+        with self._lock:
+            for period in PERIODS[1:]:
+                start = period_start(period, now)
+                if self.starts.get(period) != start:
+                    # A new week or month starts with an empty board
+                    self.boards[period] = Board()
+                    self.starts[period] = start
+
+    def _apply(self, kind, user_id, value, when=None, periods=PERIODS):
+        if kind == 'points':
+            if 'all' in periods:
+                self.boards['all'].set(user_id, value)
+        else:
+            if when is not None and when.tzinfo is not None:
+                when = when.astimezone(timezone.utc).replace(tzinfo=None)
+            for period in PERIODS[1:]:
+                if period in periods and when is not None and when >= self.starts[period]:
+                    self.boards[period].add(user_id, value)
+
+    def _record(self, operation):
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append(operation)
+            if self.boards is not None:
+                self._apply(*operation)
+
+    def record_points(self, user_id, points):
+        """A user's committed points total"""
+        self._record(('points', user_id, points or 0, None))
+
+    def record_earned(self, user_id, points, when):
+        """Points earned (or, negative, taken back) by an activity dated `when`"""
+        self._record(('earned', user_id, points or 0, when))
+
+    def refresh_users(self, user_ids):
+        """Reload points totals for users changed outside the ORM"""
+        for user_id, points in db.session.query(User.id, User.points).filter(User.id.in_(list(user_ids))):
+            self.record_points(user_id, points)
+
+    def top(self, period, limit=10, offset=0):
+        self._ensure_built()
+        with self._lock:
+            return self.boards[period].top(limit, offset), len(self.boards[period].ranked)
+
+    def rank(self, period, user_id):
+        self._ensure_built()
+        with self._lock:
+            return self.boards[period].rank(user_id)
+
+    def start(self, app):
+        """Build in the background now and refresh every LEADERBOARD_REFRESH seconds (0 disables)"""
+        if self._thread is not None or self.refresh_seconds <= 0:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+
+            def run():
+                while True:
+                    with app.app_context():
+                        try:
+                            self.rebuild()
+                        except Exception as e:
+                            logger.exception("Leaderboard rebuild error: %s", e)
+                        finally:
+                            db.session.remove()
+                    time.sleep(self.refresh_seconds)
+
+            self._thread = threading.Thread(target=run, name='leaderboard-refresher', daemon=True)
+            self._thread.start()
+
+leaderboard = Leaderboard()
+
+def _pending(target):
+    return object_session(target).info.setdefault('leaderboard_pending', [])
+
+@event.listens_for(User, 'after_insert')
+def _user_added(mapper, connection, target):
+    _pending(target).append(('points', target.id, target.points or 0, None))
+
+@event.listens_for(User, 'after_update')
+def _user_points_changed(mapper, connection, target):
+    state = db.inspect(target)
+    if 'points' in state.unloaded:
+        # Incremented in SQL (User.add_points), so the new total is only in the database
+        points = connection.execute(select(User.points).where(User.id == target.id)).scalar()
+        _pending(target).append(('points', target.id, points or 0, None))
+    elif state.attrs.points.history.has_changes():
+        _pending(target).append(('points', target.id, target.points or 0, None))
+
+@event.listens_for(RecyclingActivity, 'after_insert')
+def _activity_added(mapper, connection, target):
+    _pending(target).append(('earned', target.user_id, target.points_earned or 0, target.date))
+
+@event.listens_for(RecyclingActivity, 'after_delete')
+def _activity_removed(mapper, connection, target):
+    _pending(target).append(('earned', target.user_id, -(target.points_earned or 0), target.date))
+
+@event.listens_for(Session, 'after_commit')
+def _apply_after_commit(session):
+    for kind, user_id, value, when in session.info.pop('leaderboard_pending', ()):
+        if kind == 'points':
+            leaderboard.record_points(user_id, value)
+        else:
+            leaderboard.record_earned(user_id, value, when)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop('leaderboard_pending', None)
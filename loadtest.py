@@ -0,0 +1,174 @@
+import argparse
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+# Drives the main pages as logged-in users and reports latency percentiles
+# and throughput per route. Run seed_data.py against the same DATABASE_URL
+# first. By default requests go through the Flask test client in this
+# process; --url targets a running server and --gunicorn starts one locally
+# with gunicorn.conf.py.
+
+# name -> (method, path, weight in the request mix, status of a successful response)
+ROUTES = {
+    'login': ('POST', '/login', 1, 302),
+    'dashboard': ('GET', '/dashboard', 4, 200),
+    'waste-details': ('GET', '/waste-details', 3, 200),
+    'schedule': ('GET', '/schedule', 2, 200),
+    'locator': ('GET', '/locator', 2, 200),
+    'waste-stats': ('GET', '/api/waste-stats', 4, 200),
+}
+
+class TestClientTarget:
+    def __init__(self):
+        from app import app
+
+        self.app = app
+
+    def session(self):
+        return self.app.test_client()
+
+    def request(self, session, method, path, data=None):
+        response = session.open(path, method=method, data=data)
+        return response.status_code
+
+class HttpTarget:
+    def __init__(self, url):
+        import requests
+
+        self.requests = requests
+        self.url = url.rstrip('/')
+
+    def session(self):
+        return self.requests.Session()
+
+    def request(self, session, method, path, data=None):
+        response = session.request(method, self.url + path, data=data, allow_redirects=False, timeout=30)
+        return response.status_code
+
+def seeded_user_ids():
+    from sqlalchemy import func
+    from app import app
+    from models import User
+
+    with app.app_context():
+        return User.query.with_entities(func.min(User.id), func.max(User.id)) \
+            .filter(User.username.like('seed%')).one()
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def worker(target, args, user_range, deadline, warm_until, samples, seed):
+    rng = random.Random(seed)
+    names = list(ROUTES)
+    weights = [ROUTES[name][2] for name in names]
+
+    def credentials_for(user_id):
+        return {'email': f'seed{user_id}@example.com', 'password': args.password}
+
+    # Each worker is one logged-in user; /login samples use a fresh anonymous session
+    user_id = rng.randint(*user_range)
+    session = target.session()
+    target.request(session, 'POST', '/login', credentials_for(user_id))
+
+    local = []
+    while time.monotonic() < deadline:
+        name = rng.choices(names, weights)[0]
+        method, path, _, expected = ROUTES[name]
+        if name == 'login':
+            client, data = target.session(), credentials_for(rng.randint(*user_range))
+        else:
+            client, data = session, None
+        started = time.perf_counter()
+        try:
+            status = target.request(client, method, path, data)
+        except Exception:
+            status = None
+        elapsed = time.perf_counter() - started
+        if time.monotonic() >= warm_until:
+            # A failed login renders the form again with 200, a logged-out page redirects with 302
+            local.append((name, elapsed, status == expected))
+    samples.extend(local)
+
+def start_gunicorn(port, workers):
+    env = dict(os.environ, GUNICORN_BIND=f'127.0.0.1:{port}', GUNICORN_WORKERS=str(workers))
+    process = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'], env=env)
+    target = HttpTarget(f'http://127.0.0.1:{port}')
+    for _ in range(120):
+        try:
+            target.request(target.session(), 'GET', '/login')
+            return process, target
+        except Exception:
+            if process.poll() is not None:
+                sys.exit('gunicorn exited during startup')
+            time.sleep(0.5)
+    process.terminate()
+    sys.exit('gunicorn did not start listening within 60 s')
+
+def report(samples, duration, mode, concurrency):
+    print(f"{mode}, {concurrency} concurrent users, {duration:.0f} s measured")
+    print(f"  {'route':14} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    rows = [(name, [s for s in samples if s[0] == name]) for name in ROUTES] + [('all', samples)]
+    for name, route_samples in rows:
+        if not route_samples:
+            continue
+        latencies = sorted(elapsed * 1000 for _, elapsed, _ in route_samples)
+        errors = sum(1 for _, _, ok in route_samples if not ok)
+        print(f"  {name:14} {len(route_samples):9} {errors:7} {len(route_samples) / duration:8.1f} "
+              f"{percentile(latencies, 0.50):8.1f} {percentile(latencies, 0.95):8.1f} "
+              f"{percentile(latencies, 0.99):8.1f} {latencies[-1]:8.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test the main EcoTrack routes')
+    parser.add_argument('--concurrency', type=int, default=8, help='Simulated users, one thread each')
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds measured after warm-up')
+    parser.add_argument('--warmup', type=float, default=3.0)
+    parser.add_argument('--password', default='seed-password', help='Password given to seed_data.py')
+    parser.add_argument('--url', help='Base URL of a running server instead of the test client')
+    parser.add_argument('--gunicorn', action='store_true', help='Start gunicorn locally and test it over HTTP')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn workers with --gunicorn')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    user_range = seeded_user_ids()
+    if user_range[0] is None:
+        sys.exit('No seeded users found, run seed_data.py first')
+
+    process = None
+    if args.gunicorn:
+        process, target = start_gunicorn(args.port, args.workers)
+        mode = f'gunicorn with {args.workers} workers'
+    elif args.url:
+        target = HttpTarget(args.url)
+        mode = args.url
+    else:
+        target = TestClientTarget()
+        mode = 'Flask test client'
+
+    samples = []
+    started = time.monotonic()
+    warm_until = started + args.warmup
+    deadline = warm_until + args.duration
+    threads = [threading.Thread(target=worker, args=(target, args, user_range, deadline, warm_until,
+                                                     samples, args.seed + i))
+               for i in range(args.concurrency)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    report(samples, args.duration, mode, args.concurrency)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+# Reads and writes run in separate processes, like gunicorn workers sharing one SQLite file.
+
+def setup(users):
+    from app import app, db
+    from models import User
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        for i in range(users):
+            user = User(username=f'load{i}', email=f'load{i}@example.com')
+            user.password_hash = 'x'
+            db.session.add(user)
+        db.session.commit()
+
+def client_for(user_index):
+    from app import app
+
+    app.config['TESTING'] = True
+    client = app.test_client()
+    with client.session_transaction() as session:
+        # Flask-Login reads the user id from the session
+        session['_user_id'] = str(user_index + 1)
+        session['_fresh'] = True
+    return client
+
+def reader(user_index, duration, results):
+    client = client_for(user_index)
+    ok = errors = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        response = client.get('/api/waste-stats')
+        if response.status_code == 200:
+            ok += 1
+        else:
+            errors += 1
+    results.put(('read', ok, errors))
+
+def writer(user_index, duration, results):
+    client = client_for(user_index)
+    attempts = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        client.post('/add-waste-details', data={'waste_type': 'Paper', 'quantity': '1.5', 'status': 'Collected'})
+        attempts += 1
+    results.put(('write', attempts, 0))
+
+def count_collections():
+    from app import app
+    from models import WasteCollection
+
+    with app.app_context():
+        return WasteCollection.query.count()
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure read throughput while add_waste_details writes run concurrently')
+    parser.add_argument('--profile', default=os.getenv('DB_PROFILE', 'default'))
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=10.0)
+    args = parser.parse_args()
+
+    os.environ['DB_PROFILE'] = args.profile
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'loadtest.db')}"
+    os.environ['STATS_MAX_STALENESS'] = '0'
+    os.environ['LOG_LEVEL'] = 'CRITICAL'
+
+    context = multiprocessing.get_context('spawn')
+    users = args.readers + args.writers
+    process = context.Process(target=setup, args=(users,))
+    process.start()
+    process.join()
+
+    results = context.Queue()
+    processes = [context.Process(target=reader, args=(i, args.duration, results)) for i in range(args.readers)]
+    processes += [context.Process(target=writer, args=(args.readers + i, args.duration, results))
+                  for i in range(args.writers)]
+    for process in processes:
+        process.start()
+
+    reads = read_errors = write_attempts = 0
+    for _ in processes:
+        kind, count, errors = results.get()
+        if kind == 'read':
+            reads += count
+            read_errors += errors
+        else:
+            write_attempts += count
+    for process in processes:
+        process.join()
+
+    with context.Pool(1) as pool:
+        written = pool.apply(count_collections)
+
+    print(f"Profile: {args.profile} ({args.readers} readers, {args.writers} writers, {args.duration:.0f}s)")
+    print(f"  reads:  {reads / args.duration:.0f}/s, {read_errors} errors")
+    print(f"  writes: {written / args.duration:.0f}/s committed, {write_attempts - written} failed")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+import atexit
+import queue
+import threading
+import time
+from datetime import datetime
+from models import db, UserLogin
+from app_logging import get_logger
+
+logger = get_logger('login_audit')
+
+_STOP = object()
+
+class LoginAuditWriter:
+    """Buffers login audit events and writes them in batches off the request thread.
+
+    Events go onto a bounded in-process queue. A background thread inserts
+    them every flush_interval_ms or every flush_size events, whichever comes
+    first. When the queue is full, as in a brute-force wave, events are
+    written inline on the request thread instead, so none are lost. Pending
+    events are flushed on interpreter exit.
+    """
+
+    def __init__(self, max_queue=10000, flush_interval_ms=200, flush_size=500):
+        self.max_queue = max_queue
+        self.flush_interval_ms = flush_interval_ms
+        self.flush_size = flush_size
+        self.app = None
+        self.enabled = True
+        self._queue = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self.metrics = {
+            'enqueued': 0,
+            'written': 0,
+            'written_inline': 0,
+            'failed': 0,
+            'flushes': 0,
+            'max_queue_depth': 0,
+            'last_flush_ms': 0.0,
+        }
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('LOGIN_AUDIT_ASYNC', True)
+        self.max_queue = app.config.get('LOGIN_AUDIT_QUEUE_SIZE', self.max_queue)
+        self.flush_interval_ms = app.config.get('LOGIN_AUDIT_FLUSH_MS', self.flush_interval_ms)
+        self.flush_size = app.config.get('LOGIN_AUDIT_FLUSH_SIZE', self.flush_size)
+
+    def _ensure_started(self):
+        # Started lazily so each gunicorn worker gets its own thread after fork
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._queue = queue.Queue(maxsize=self.max_queue)
+                self._thread = threading.Thread(target=self._run, name='login-audit-writer', daemon=True)
+                self._thread.start()
+                atexit.register(self.stop)
+
+    def record(self, user_id, ip_address, user_agent, status):
+        event = {
+            'user_id': user_id,
+            'login_time': datetime.utcnow(),
+            'ip_address': ip_address,
+            'user_agent': (user_agent or '')[:255],
+            'status': status,
+        }
+        if not self.enabled:
+            self._write([event])
+            db.session.commit()
+            return
+
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            overflows = self._count('written_inline')
+            if overflows == 1 or overflows % 1000 == 0:
+                logger.warning("Login audit queue full (%d events), %d events written inline so far",
+                               self.max_queue, overflows)
+            self._write([event])
+            db.session.commit()
+            return
+        depth = self._queue.qsize()
+        with self._metrics_lock:
+            self.metrics['enqueued'] += 1
+            if depth > self.metrics['max_queue_depth']:
+                self.metrics['max_queue_depth'] = depth
+
+    def _count(self, name, amount=1):
+        with self._metrics_lock:
+            self.metrics[name] += amount
+            return self.metrics[name]
+
+    def _write(self, events):
+        db.session.execute(UserLogin.__table__.insert(), events)
+
+    def _flush(self, events):
+        started = time.perf_counter()
+        with self.app.app_context():
+            try:
+                self._write(events)
+                db.session.commit()
+                self._count('written', len(events))
+            except Exception as e:
+                db.session.rollback()
+                self._count('failed', len(events))
+                logger.exception("Failed to write %d login audit events: %s", len(events), e)
+            finally:
+                db.session.remove()
+        with self._metrics_lock:
+            self.metrics['flushes'] += 1
+            self.metrics['last_flush_ms'] = round((time.perf_counter() - started) * 1000, 3)
+
+    def _run(self):
+        pending = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                event = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                event = None
+
+            if event is _STOP:
+                if pending:
+                    self._flush(pending)
+                return
+            if event is not None:
+                pending.append(event)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval_ms / 1000
+
+            if pending and (len(pending) >= self.flush_size or time.monotonic() >= deadline):
+                self._flush(pending)
+                pending = []
+                deadline = None
+
+    def stop(self, timeout=10):
+        """Flush everything queued so far and stop the writer thread"""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        # Blocking put: the stop marker must land behind every pending event
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        self._thread = None
+
+    def stats(self):
+        with self._metrics_lock:
+            stats = dict(self.metrics)
+        stats['queue_depth'] = self._queue.qsize() if self._queue is not None else 0
+        stats['queue_capacity'] = self.max_queue
+        return stats
+
+audit_writer = LoginAuditWriter()
@@ -0,0 +1,266 @@
+import math
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from flask import g, has_request_context, request
+from jinja2 import Template
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Mapper
+from app_logging import get_logger
+
+logger = get_logger('metrics')
+
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+# Longest duration tracked, in microseconds; slower requests are recorded as this
+HIGHEST_MICROSECONDS = 3600 * 1000000
+HIGHEST_COUNT = 10000000
+
+class HdrHistogram:
+    """High dynamic range histogram of non-negative integers.
+
+    Values below 2 * 10**significant_figures get a bucket each; above that,
+    every power of two is split into the same number of linear buckets, so
+    any recorded value is reported to within that many significant figures
+    with a fixed, small bucket array and O(1) recording.
+    """
+
+    def __init__(self, highest, significant_figures=2):
+        self.sub_bucket_bits = math.ceil(math.log2(2 * 10 ** significant_figures))
+        self.sub_bucket_count = 1 << self.sub_bucket_bits
+        self.sub_bucket_half = self.sub_bucket_count // 2
+        self.highest = highest
+        self.counts = [0] * (self._index(highest) + 1)
+        self.total = 0
+        self.sum = 0
+        self.max = 0
+
+    def _index(self, value):
+        if value < self.sub_bucket_count:
+            return value
+        shift = value.bit_length() - self.sub_bucket_bits
+        return (shift + 1) * self.sub_bucket_half + (value >> shift) - self.sub_bucket_half
+
+    def _value_at(self, index):
+        """Middle of the range of values that share a bucket"""
+        if index < self.sub_bucket_count:
+            return index
+        shift = index // self.sub_bucket_half - 1
+        lowest = (index - shift * self.sub_bucket_half) << shift
+        return lowest + (1 << shift) // 2
+
+    def record(self, value):
+        value = min(max(int(value), 0), self.highest)
+        self.counts[self._index(value)] += 1
+        self.total += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def value_at_quantile(self, quantile):
+        if not self.total:
+            return 0
+        target = max(1, math.ceil(quantile * self.total))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self._value_at(index), self.max)
+        return self.max
+
+# name -> (help text, scale from recorded integers to exported units)
+SERIES = {
+    'http_request_duration_seconds': ('Wall time per request', 1e-6),
+    'db_duration_seconds': ('Time spent in SQL statements per request', 1e-6),
+    'db_statements': ('SQL statements executed per request', 1),
+    'db_rows': ('ORM rows loaded plus rows written per request', 1),
+    'template_render_duration_seconds': ('Template render time per request', 1e-6),
+}
+
+class TimedTemplate(Template):
+    """Jinja template that adds its render time to the current request's metrics"""
+
+    def render(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            state = _state()
+            if state is not None:
+                state['template'] += time.perf_counter() - started
+
+def _state():
+    if not has_request_context():
+        return None
+    return getattr(g, 'request_metrics', None)
+
+class RequestMetrics:
+    """Per-endpoint wall, SQL and template timings kept in HDR histograms.
+
+    Figures are per process: each gunicorn worker reports its own series,
+    labelled with its pid, so counts and sums are added up across workers
+    in queries while quantiles stay per worker.
+    A request that runs the same SQL statement N_PLUS_ONE_THRESHOLD or more
+    times is logged once per endpoint and statement as a likely N+1.
+    """
+
+    def __init__(self, n_plus_one_threshold=10, significant_figures=2):
+        self.enabled = True
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.significant_figures = significant_figures
+        self.histograms = {}
+        self.requests = {}
+        self.n_plus_one = {}
+        self._warned = set()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = app.config.get('METRICS_ENABLED', True)
+        self.n_plus_one_threshold = app.config.get('N_PLUS_ONE_THRESHOLD', self.n_plus_one_threshold)
+        slow_queries.threshold_ms = app.config.get('SLOW_QUERY_MS', slow_queries.threshold_ms)
+        if not self.enabled:
+            return
+        app.jinja_env.template_class = TimedTemplate
+        # First, so the wall time includes the other before_request hooks
+        app.before_request_funcs.setdefault(None, []).insert(0, self._start)
+        app.after_request(self._remember_status)
+        app.teardown_request(self._finish)
+
+    def _start(self):
+        g.request_metrics = {
+            'started': time.perf_counter(),
+            'db': 0.0,
+            'statements': 0,
+            'rows': 0,
+            'template': 0.0,
+            'status': 500,
+            'sql': {},
+        }
+
+    def _remember_status(self, response):
+        state = _state()
+        if state is not None:
+            state['status'] = response.status_code
+        return response
+
+    def _finish(self, exc=None):
+        state = _state()
+        if state is None:
+            return
+        g.request_metrics = None
+        endpoint = request.endpoint or 'unmatched'
+        values = {
+            'http_request_duration_seconds': (time.perf_counter() - state['started']) * 1e6,
+            'db_duration_seconds': state['db'] * 1e6,
+            'db_statements': state['statements'],
+            'db_rows': state['rows'],
+            'template_render_duration_seconds': state['template'] * 1e6,
+        }
+        repeated = [(statement, count) for statement, count in state['sql'].items()
+                    if count >= self.n_plus_one_threshold]
+
+        with self._lock:
+            for name, value in values.items():
+                histogram = self.histograms.get((name, endpoint))
+                if histogram is None:
+                    highest = HIGHEST_MICROSECONDS if SERIES[name][1] != 1 else HIGHEST_COUNT
+                    histogram = self.histograms[(name, endpoint)] = HdrHistogram(highest, self.significant_figures)
+                histogram.record(value)
+            key = (endpoint, request.method, state['status'])
+            self.requests[key] = self.requests.get(key, 0) + 1
+            if repeated:
+                self.n_plus_one[endpoint] = self.n_plus_one.get(endpoint, 0) + 1
+            new_warnings = [(statement, count) for statement, count in repeated
+                            if (endpoint, statement) not in self._warned]
+            self._warned.update((endpoint, statement) for statement, _ in new_warnings)
+
+        for statement, count in new_warnings:
+            logger.warning("Possible N+1 query in %s: statement ran %d times in one request: %s",
+                           endpoint, count, ' '.join(statement.split())[:300])
+
+    def render(self):
+        """All series in the Prometheus text exposition format"""
+        pid = os.getpid()
+        lines = []
+        with self._lock:
+            lines.append('# HELP ecotrack_http_requests_total Requests by endpoint, method and status')
+            lines.append('# TYPE ecotrack_http_requests_total counter')
+            for (endpoint, method, status), count in sorted(self.requests.items()):
+                lines.append(f'ecotrack_http_requests_total{{endpoint="{_escape(endpoint)}",method="{method}",'
+                             f'status="{status}",pid="{pid}"}} {count}')
+
+            for name, (help_text, scale) in SERIES.items():
+                lines.append(f'# HELP ecotrack_{name} {help_text}')
+                lines.append(f'# TYPE ecotrack_{name} summary')
+                for (series, endpoint), histogram in sorted(self.histograms.items()):
+                    if series != name:
+                        continue
+                    labels = f'endpoint="{_escape(endpoint)}",pid="{pid}"'
+                    for quantile in QUANTILES:
+                        value = histogram.value_at_quantile(quantile) * scale
+                        lines.append(f'ecotrack_{name}{{{labels},quantile="{quantile}"}} {value:.6g}')
+                    lines.append(f'ecotrack_{name}_sum{{{labels}}} {histogram.sum * scale:.6g}')
+                    lines.append(f'ecotrack_{name}_count{{{labels}}} {histogram.total}')
+
+            lines.append('# HELP ecotrack_n_plus_one_requests_total Requests that repeated one SQL statement '
+                         'N_PLUS_ONE_THRESHOLD or more times')
+            lines.append('# TYPE ecotrack_n_plus_one_requests_total counter')
+            for endpoint, count in sorted(self.n_plus_one.items()):
+                lines.append(f'ecotrack_n_plus_one_requests_total{{endpoint="{_escape(endpoint)}",pid="{pid}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+class SlowQueryLog:
+    """The most recent SQL statements that took at least threshold_ms, from any thread"""
+
+    def __init__(self, threshold_ms=100, size=200):
+        self.threshold_ms = threshold_ms
+        self._entries = deque(maxlen=size)
+
+    def record(self, statement, seconds, endpoint):
+        milliseconds = seconds * 1000
+        if self.threshold_ms <= 0 or milliseconds < self.threshold_ms:
+            return
+        # deque.append is atomic, so no lock is needed on the hot path
+        self._entries.append({
+            'at': datetime.utcnow().isoformat(timespec='seconds'),
+            'duration_ms': round(milliseconds, 2),
+            'endpoint': endpoint,
+            'statement': ' '.join(statement.split())[:1000],
+        })
+
+    def slowest(self, limit=20):
+        return sorted(list(self._entries), key=lambda entry: entry['duration_ms'], reverse=True)[:limit]
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+request_metrics = RequestMetrics()
+slow_queries = SlowQueryLog()
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info['metrics_started'] = time.perf_counter()
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop('metrics_started', None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    state = _state()
+    slow_queries.record(statement, elapsed, request.endpoint if state is not None else None)
+    if state is None:
+        return
+    state['db'] += elapsed
+    state['statements'] += 1
+    state['sql'][statement] = state['sql'].get(statement, 0) + 1
+    if statement.lstrip()[:6].upper() != 'SELECT' and cursor.rowcount > 0:
+        state['rows'] += cursor.rowcount
+
+@event.listens_for(Mapper, 'load')
+def _row_loaded(target, context):
+    state = _state()
+    if state is not None:
+        state['rows'] += 1
@@ -0,0 +1,146 @@
+import argparse
+from sqlalchemy import inspect, text
+from models import db, RecyclingActivity, WasteCollection, PickupSchedule
+
+def add_missing_columns(engine, inspector):
+    """ALTER TABLE ... ADD COLUMN for nullable columns the database does not have yet"""
+    added = []
+    for table in db.metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable or column.server_default is not None:
+                raise RuntimeError(f"Cannot add required column {table.name}.{column.name} automatically")
+
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=engine.dialect)}"
+            if len(column.foreign_keys) == 1:
+                target = next(iter(column.foreign_keys)).column
+                ddl += f" REFERENCES {target.table.name}({target.name})"
+            with engine.begin() as conn:
+                conn.execute(text(ddl))
+            added.append(f"column {table.name}.{column.name}")
+    return added
+
+def upgrade_database(engine):
+    """Bring an existing database up to the current models.
+
+    db.create_all() only creates missing tables, so columns and indexes added
+    to tables that already exist are created here.
+    """
+    db.metadata.create_all(bind=engine)
+
+    changes = add_missing_columns(engine, inspect(engine))
+
+    inspector = inspect(engine)
+    for table in db.metadata.sorted_tables:
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=engine, checkfirst=True)
+                changes.append(f"index {index.name}")
+    return changes
+
+def parse_activity_description(description):
+    """Pull (quantity, waste_type) out of 'Added 2.0 kg of Plastic waste' or
+    'Scheduled 2.0 kg of Plastic waste pickup'. Only used for the backfill."""
+    parts = (description or '').split()
+    try:
+        return float(parts[1]), parts[4]
+    except (IndexError, ValueError):
+        return None, None
+
+def backfill_activity_links(batch_size=1000):
+    """Link RecyclingActivity rows written before the foreign keys existed.
+
+    A 'Waste Added' activity was written in the same request as its
+    collection with the same timestamp, so it is matched on user, type,
+    quantity and that timestamp. A 'Pickup Scheduled' activity is matched
+    to the oldest unlinked pickup with the same user, type and quantity.
+    Activities with no unambiguous match are left unlinked.
+    """
+    linked = 0
+    unmatched = 0
+    last_id = 0
+    while True:
+        activities = RecyclingActivity.query.filter(
+            RecyclingActivity.id > last_id,
+            RecyclingActivity.waste_collection_id.is_(None),
+            RecyclingActivity.pickup_schedule_id.is_(None),
+            RecyclingActivity.activity_type.in_(['Waste Added', 'Pickup Scheduled'])
+        ).order_by(RecyclingActivity.id).limit(batch_size).all()
+        if not activities:
+            break
+
+        for activity in activities:
+            last_id = activity.id
+            quantity, waste_type = parse_activity_description(activity.description)
+            if quantity is None:
+                unmatched += 1
+                continue
+
+            if activity.activity_type == 'Waste Added':
+                match = WasteCollection.query.filter(
+                    WasteCollection.user_id == activity.user_id,
+                    WasteCollection.waste_type == waste_type,
+                    WasteCollection.quantity == quantity,
+                    WasteCollection.scheduled_date == activity.date,
+                    ~WasteCollection.activities.any()
+                ).order_by(WasteCollection.id).first()
+                if match:
+                    activity.waste_collection_id = match.id
+            else:
+                match = PickupSchedule.query.filter(
+                    PickupSchedule.user_id == activity.user_id,
+                    PickupSchedule.waste_type == waste_type,
+                    PickupSchedule.quantity_estimate == quantity,
+                    ~PickupSchedule.activities.any()
+                ).order_by(PickupSchedule.id).first()
+                if match:
+                    activity.pickup_schedule_id = match.id
+
+            if match:
+                linked += 1
+                # Later activities in this batch must not claim the same row
+                db.session.flush()
+            else:
+                unmatched += 1
+
+        db.session.commit()
+    return linked, unmatched
+
+if __name__ == '__main__':
+    from app import app
+
+    parser = argparse.ArgumentParser(description='Upgrade the EcoTrack database schema')
+    parser.add_argument('--backfill', action='store_true', help='Link existing activities to their collections and pickups')
+    parser.add_argument('--rebuild-slots', action='store_true', help='Zone existing pickups and recount pickup slots')
+    parser.add_argument('--rebuild-carbon', action='store_true', help='Rebuild the carbon ledger with the current carbon factors')
+    parser.add_argument('--rebuild-rollups', action='store_true',
+                        help='Recompute waste rollups from WasteCollection (done automatically when they are missing)')
+    args = parser.parse_args()
+
+    with app.app_context():
+        print(f"Upgrading database: {app.config['SQLALCHEMY_DATABASE_URI']}")
+        changes = upgrade_database(db.engine)
+        if changes:
+            for change in changes:
+                print(f"Created {change}")
+        else:
+            print("Database schema is already up to date")
+
+        from rollups import rollups_missing, rebuild_rollups
+        if args.rebuild_rollups or rollups_missing():
+            print(f"Rebuilt {rebuild_rollups()} waste rollup rows")
+
+        if args.backfill:
+            linked, unmatched = backfill_activity_links()
+            print(f"Linked {linked} activities, {unmatched} left unlinked")
+
+        if args.rebuild_slots:
+            from slots import rebuild_pickup_slots
+            print(f"Recounted {rebuild_pickup_slots()} pickup slots")
+
+        if args.rebuild_carbon:
+            from carbon import recompute_carbon_ledger
+            print(f"Rebuilt {recompute_carbon_ledger()} carbon ledger rows")
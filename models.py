@@ -1,7 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from passwords import hasher
 
 db = SQLAlchemy()
 
@@ -24,12 +24,24 @@ class User(UserMixin, db.Model):
     green_activities = db.relationship('GreenActivity', backref='user', lazy=True)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return hasher.verify(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        return hasher.needs_rehash(self.password_hash)
+
+    def add_points(self, delta):
+        # Incremented in SQL: current_user can come from the user cache and be
+        # seconds old, so writing back an absolute total would lose other updates
+        self.points = User.points + delta
 
 class UserLogin(db.Model):
+    __table_args__ = (
+        db.Index('ix_user_login_user_id_login_time', 'user_id', 'login_time'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     login_time = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
@@ -38,6 +50,12 @@ class UserLogin(db.Model):
     status = db.Column(db.String(20), default='success')  # success, failed, etc.
 
 class WasteCollection(db.Model):
+    __table_args__ = (
+        db.Index('ix_waste_collection_user_id_created_at', 'user_id', 'created_at'),
+        # Chart series are bucketed by scheduled_date, like the carbon ledger
+        db.Index('ix_waste_collection_user_id_scheduled_date', 'user_id', 'scheduled_date'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     scheduled_date = db.Column(db.DateTime, nullable=False)
@@ -67,6 +85,10 @@ class Incentive(db.Model):
     description = db.Column(db.String(200))
 
 class WasteStatistics(db.Model):
+    __table_args__ = (
+        db.Index('ix_waste_statistics_user_id_date', 'user_id', 'date'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     total_waste = db.Column(db.Float, nullable=False)
@@ -75,7 +97,43 @@ class WasteStatistics(db.Model):
     date = db.Column(db.Date, nullable=False)
     carbon_offset = db.Column(db.Float, default=0.0)
 
+class WasteRollup(db.Model):
+    # Running totals per user, waste type and status, maintained by the write paths
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'waste_type', 'status', name='uq_waste_rollup_user_type_status'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    waste_type = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(50), nullable=False)
+    total_quantity = db.Column(db.Float, nullable=False, default=0.0)
+    collection_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class CarbonLedger(db.Model):
+    # Carbon offset per user, day, source ('waste' or 'green') and activity type, maintained by the write paths
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'day', 'source', 'activity_type', name='uq_carbon_ledger_user_day_source_type'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    source = db.Column(db.String(20), nullable=False)
+    activity_type = db.Column(db.String(50), nullable=False)
+    quantity = db.Column(db.Float, nullable=False, default=0.0)
+    carbon_offset = db.Column(db.Float, nullable=False, default=0.0)  # kg CO2e
+    entry_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 class PickupSchedule(db.Model):
+    __table_args__ = (
+        db.Index('ix_pickup_schedule_user_id_pickup_date', 'user_id', 'pickup_date'),
+        # Route planning loads every pickup for a day
+        db.Index('ix_pickup_schedule_pickup_date_status', 'pickup_date', 'status'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     pickup_date = db.Column(db.DateTime, nullable=False)
@@ -84,21 +142,57 @@ class PickupSchedule(db.Model):
     status = db.Column(db.String(20), nullable=False, default='Scheduled')
     pickup_address = db.Column(db.String(250), nullable=False)
     special_instructions = db.Column(db.Text)
+    zone = db.Column(db.String(20))  # slot zone the pickup was booked against, see slots.py
+
+class PickupSlot(db.Model):
+    # Booked pickups per day and zone, kept in step by slots.book_slot/release_slot
+    __table_args__ = (
+        db.UniqueConstraint('pickup_date', 'zone', name='uq_pickup_slot_date_zone'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    pickup_date = db.Column(db.Date, nullable=False)
+    zone = db.Column(db.String(20), nullable=False)
+    capacity = db.Column(db.Integer)  # NULL uses PICKUP_SLOT_CAPACITY
+    booked = db.Column(db.Integer, nullable=False, default=0)
+
+class GeocodeCache(db.Model):
+    # Coordinates per normalized address, so each address is geocoded once
+    id = db.Column(db.Integer, primary_key=True)
+    address_key = db.Column(db.String(250), unique=True, nullable=False)
+    latitude = db.Column(db.Float)  # NULL when the geocoder found no match
+    longitude = db.Column(db.Float)
+    source = db.Column(db.String(50), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class RecyclingActivity(db.Model):
+    __table_args__ = (
+        db.Index('ix_recycling_activity_user_id_date', 'user_id', 'date'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     activity_type = db.Column(db.String(50), nullable=False)
     points_earned = db.Column(db.Integer, nullable=False, default=0)
     date = db.Column(db.DateTime, default=datetime.utcnow)
     description = db.Column(db.Text)
+    waste_collection_id = db.Column(db.Integer, db.ForeignKey('waste_collection.id'), index=True)
+    pickup_schedule_id = db.Column(db.Integer, db.ForeignKey('pickup_schedule.id'), index=True)
+
+    waste_collection = db.relationship('WasteCollection', backref='activities', lazy=True)
+    pickup_schedule = db.relationship('PickupSchedule', backref='activities', lazy=True)
 
 class GreenActivity(db.Model):
+    __table_args__ = (
+        db.Index('ix_green_activity_user_id_date', 'user_id', 'date'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     activity_type = db.Column(db.String(50), nullable=False)  # e.g., 'recycling', 'transport', 'energy'
     description = db.Column(db.String(200))
     carbon_offset = db.Column(db.Float, nullable=False)  # kg CO2e saved
+    quantity = db.Column(db.Float)  # Amount in the factor table's unit, kept so offsets can be recomputed
     date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     
     def __repr__(self):
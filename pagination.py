@@ -0,0 +1,51 @@
+from datetime import datetime
+from sqlalchemy import or_, and_
+
+# Largest page a client can ask for, and the most rows one streamed response returns
+MAX_PER_PAGE = 200
+MAX_STREAM_ROWS = 100000
+
+def clamp_limit(limit, default, maximum=MAX_PER_PAGE):
+    """A page size or row limit from a query parameter, kept within 1..maximum"""
+    if limit is None:
+        return default
+    return max(1, min(limit, maximum))
+
+def encode_cursor(timestamp, row_id):
+    return f"{timestamp.isoformat()}_{row_id}"
+
+def decode_cursor(cursor):
+    """Parse a cursor produced by encode_cursor, returning None if it is malformed"""
+    if not cursor:
+        return None
+    try:
+        timestamp, row_id = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except ValueError:
+        return None
+
+def keyset_filter(query, time_column, id_column, cursor):
+    """Restrict a newest-first query to rows strictly after the cursor position"""
+    position = decode_cursor(cursor)
+    if position:
+        timestamp, row_id = position
+        query = query.filter(or_(
+            time_column < timestamp,
+            and_(time_column == timestamp, id_column < row_id)
+        ))
+    return query.order_by(time_column.desc(), id_column.desc())
+
+def keyset_page(query, time_column, id_column, cursor=None, per_page=50):
+    """Return (rows, next_cursor) for one newest-first page.
+
+    Pages are located by (time, id) rather than OFFSET, so deep pages cost
+    the same as the first one when (user_id, time) is indexed.
+    """
+    per_page = clamp_limit(per_page, 50)
+    rows = keyset_filter(query, time_column, id_column, cursor).limit(per_page + 1).all()
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, time_column.key), getattr(last, id_column.key))
+    return rows, next_cursor
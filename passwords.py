@@ -0,0 +1,84 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from werkzeug.security import generate_password_hash, check_password_hash
+
+class HashingBusy(Exception):
+    """Raised when the hashing pool is saturated and the caller should back off"""
+
+class PasswordHasher:
+    """Hashes and verifies passwords on a small, bounded process pool.
+
+    Hashing is CPU-bound, so running it on request threads lets a login
+    storm starve every other route. Here at most `workers` hashes run at
+    once per gunicorn worker, a few more may wait, and anything beyond that
+    is rejected with HashingBusy.
+    """
+
+    def __init__(self, method='pbkdf2:sha256:600000', workers=2, max_pending=8, timeout=5.0):
+        self.method = method
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.method = app.config.get('PASSWORD_HASH_METHOD', self.method)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', self.workers)
+        self.max_pending = app.config.get('PASSWORD_HASH_MAX_PENDING', self.max_pending)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', self.timeout)
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_pending)
+
+    def _get_executor(self):
+        # Created lazily so each gunicorn worker owns its pool
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+        return self._executor
+
+    def _run(self, func, *args):
+        if self.workers <= 0:
+            return func(*args)
+        if not self._slots.acquire(timeout=self.timeout):
+            raise HashingBusy()
+        try:
+            future = self._get_executor().submit(func, *args)
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            # Drop it if it is still queued; a hash already running finishes unobserved
+            future.cancel()
+            raise HashingBusy()
+        except BrokenProcessPool:
+            # A crashed child poisons the pool; start a fresh one on the next call
+            with self._lock:
+                self._executor = None
+            raise
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        # Werkzeug stores "method$salt$hash"; rehash anything not using the configured
+        # method. A method given without parameters matches any parameters.
+        configured = self.method.split(':')
+        stored = password_hash.split('$', 1)[0].split(':')
+        return stored[:len(configured)] != configured
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+hasher = PasswordHasher()
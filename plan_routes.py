@@ -0,0 +1,33 @@
+import argparse
+import json
+from datetime import datetime
+from app import app, db
+from route_planning import plan_day
+
+def main():
+    parser = argparse.ArgumentParser(description='Plan pickup routes for one day')
+    parser.add_argument('--date', required=True, help='YYYY-MM-DD')
+    parser.add_argument('--waste-type', help='Only plan pickups of this waste type')
+    parser.add_argument('--output', help='Write the full plan as JSON to this file')
+    args = parser.parse_args()
+
+    day = datetime.strptime(args.date, '%Y-%m-%d').date()
+    with app.app_context():
+        plan = plan_day(day, app.config, waste_type=args.waste_type)
+        db.session.commit()
+
+    summary = plan['summary']
+    print(f"{summary['pickups']} pickups, {summary['routed']} routed into {summary['routes']} routes, "
+          f"{summary['total_distance_km']} km in {summary['elapsed_ms']} ms")
+    for route in plan['routes']:
+        flag = ' OVERLOADED' if route['overloaded'] else ''
+        print(f"  {route['waste_type']:12} {len(route['stops']):3} stops {route['load_kg']:8.1f} kg "
+              f"{route['distance_km']:8.1f} km{flag}")
+    if plan['unrouted']:
+        print(f"{len(plan['unrouted'])} pickups could not be geocoded")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(plan, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,21 @@
+import argparse
+from app import app, db
+from rollups import rebuild_rollups
+
+def main():
+    parser = argparse.ArgumentParser(description='Recompute waste rollups from WasteCollection')
+    parser.add_argument('--user-id', type=int, help='Only rebuild rollups for this user')
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.create_all()
+        try:
+            count = rebuild_rollups(args.user_id)
+            print(f"Rebuilt {count} rollup rows")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error rebuilding rollups: {e}")
+            raise
+
+if __name__ == '__main__':
+    main()
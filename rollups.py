@@ -0,0 +1,232 @@
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import select, func, case
+from sqlalchemy.exc import IntegrityError
+from models import db, WasteCollection, WasteRollup, WasteStatistics
+from scoring import get_rules
+from app_logging import get_logger
+
+logger = get_logger('rollups')
+
+DEFAULT_STATUS = 'Pending'
+
+def _ensure_rollup(user_id, waste_type, status):
+    table = WasteRollup.__table__
+    values = dict(user_id=user_id, waste_type=waste_type, status=status, total_quantity=0.0, collection_count=0)
+    dialect = db.engine.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        db.session.execute(insert(table).values(**values).on_conflict_do_nothing())
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.execute(table.insert().values(**values))
+    except IntegrityError:
+        # Another request created the row first
+        pass
+
+def apply_collection_delta(user_id, waste_type, status, quantity, count=1):
+    """Add quantity/count to a user's rollup bucket. Caller owns the commit."""
+    status = status or DEFAULT_STATUS
+    rollup = WasteRollup.query.filter_by(
+        user_id=user_id,
+        waste_type=waste_type,
+        status=status
+    ).first()
+
+    if not rollup:
+        # Two first writes for a bucket can race here; both end up incrementing the same row
+        _ensure_rollup(user_id, waste_type, status)
+        rollup = WasteRollup.query.filter_by(
+            user_id=user_id,
+            waste_type=waste_type,
+            status=status
+        ).one()
+
+    # Increment in SQL so concurrent writers don't lose updates
+    rollup.total_quantity = WasteRollup.total_quantity + float(quantity)
+    rollup.collection_count = WasteRollup.collection_count + count
+    rollup.updated_at = datetime.utcnow()
+    return rollup
+
+def record_collection_added(collection):
+    return apply_collection_delta(collection.user_id, collection.waste_type,
+                                  collection.status, collection.quantity)
+
+def record_collection_removed(collection):
+    return apply_collection_delta(collection.user_id, collection.waste_type,
+                                  collection.status, -collection.quantity, count=-1)
+
+def set_collection_status(collection, new_status):
+    """Change a collection's status and move its quantity between rollup buckets"""
+    old_status = collection.status or DEFAULT_STATUS
+    if old_status == new_status:
+        return collection
+    apply_collection_delta(collection.user_id, collection.waste_type,
+                           old_status, -collection.quantity, count=-1)
+    apply_collection_delta(collection.user_id, collection.waste_type,
+                           new_status, collection.quantity)
+    collection.status = new_status
+    return collection
+
+def get_user_rollups(user_id):
+    return WasteRollup.query.filter_by(user_id=user_id).all()
+
+def get_user_totals(user_id):
+    """Return (total_waste, recycled_waste) for a user from the rollup rows"""
+    total_waste = 0.0
+    recycled_waste = 0.0
+    for rollup in get_user_rollups(user_id):
+        total_waste += rollup.total_quantity
+        if rollup.status == 'Recycled':
+            recycled_waste += rollup.total_quantity
+    return total_waste, recycled_waste
+
+def rollups_missing():
+    """True for a database upgraded from before the rollups: collections exist but no rollup rows"""
+    return db.session.query(WasteRollup.id).first() is None and db.session.query(WasteCollection.id).first() is not None
+
+def users_with_rollups(user_ids):
+    """The users whose rollups account for every one of their collections.
+
+    Until rebuild_rollups() has run on an upgraded database, a user's rollups
+    only hold what was written since, and syncing from them would overwrite
+    their statistics with partial totals.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return set()
+    counted = dict(db.session.query(WasteRollup.user_id, func.sum(WasteRollup.collection_count))
+                   .filter(WasteRollup.user_id.in_(user_ids)).group_by(WasteRollup.user_id))
+    actual = dict(db.session.query(WasteCollection.user_id, func.count(WasteCollection.id))
+                  .filter(WasteCollection.user_id.in_(user_ids)).group_by(WasteCollection.user_id))
+    return {user_id for user_id in user_ids if (counted.get(user_id) or 0) == actual.get(user_id, 0)}
+
+def sync_user_statistics(user_id):
+    """Write the user's WasteStatistics row from the rollup totals. Caller owns the commit."""
+    if user_id not in users_with_rollups([user_id]):
+        logger.warning("Rollups for user %s do not cover their collections, not syncing statistics; "
+                       "run migrations.py --rebuild-rollups", user_id)
+        return None
+    total_waste, recycled_waste = get_user_totals(user_id)
+    stats = WasteStatistics.query.filter_by(user_id=user_id).order_by(WasteStatistics.date.desc()).first()
+    if not stats:
+        stats = WasteStatistics(user_id=user_id, waste_type='Total')
+        db.session.add(stats)
+    stats.total_waste = total_waste
+    stats.recycled_waste = recycled_waste
+    stats.carbon_offset = get_rules().recycled_carbon_offset(recycled_waste)
+    stats.date = datetime.utcnow().date()
+    return stats
+
+def sync_statistics_for(user_ids, chunk_size=500):
+    """sync_user_statistics for many users with one query per chunk. Caller owns the commit."""
+    rules = get_rules()
+    today = datetime.utcnow().date()
+    recycled = case((WasteRollup.status == 'Recycled', WasteRollup.total_quantity), else_=0.0)
+    user_ids = sorted(user_ids)
+    for start in range(0, len(user_ids), chunk_size):
+        chunk = user_ids[start:start + chunk_size]
+        built = users_with_rollups(chunk)
+        if len(built) < len(chunk):
+            logger.warning("Rollups for %d users do not cover their collections, not syncing their statistics; "
+                           "run migrations.py --rebuild-rollups", len(chunk) - len(built))
+        chunk = sorted(built)
+        if not chunk:
+            continue
+        totals = {user_id: (0.0, 0.0) for user_id in chunk}
+        for user_id, total_waste, recycled_waste in db.session.query(
+                WasteRollup.user_id, func.sum(WasteRollup.total_quantity), func.sum(recycled)
+        ).filter(WasteRollup.user_id.in_(chunk)).group_by(WasteRollup.user_id):
+            totals[user_id] = (total_waste or 0.0, recycled_waste or 0.0)
+
+        # Like sync_user_statistics, update each user's latest row
+        latest = {}
+        for stats in WasteStatistics.query.filter(WasteStatistics.user_id.in_(chunk)) \
+                .order_by(WasteStatistics.user_id, WasteStatistics.date.desc()):
+            latest.setdefault(stats.user_id, stats)
+        for user_id, (total_waste, recycled_waste) in totals.items():
+            stats = latest.get(user_id)
+            if not stats:
+                stats = WasteStatistics(user_id=user_id, waste_type='Total')
+                db.session.add(stats)
+            stats.total_waste = total_waste
+            stats.recycled_waste = recycled_waste
+            stats.carbon_offset = rules.recycled_carbon_offset(recycled_waste)
+            stats.date = today
+
+def refresh_statistics(since):
+    """Sync WasteStatistics for every user whose rollups changed after `since`"""
+    user_ids = [row[0] for row in db.session.query(WasteRollup.user_id)
+                .filter(WasteRollup.updated_at > since).distinct()]
+    for user_id in user_ids:
+        sync_user_statistics(user_id)
+    db.session.commit()
+    return len(user_ids)
+
+_refresher_lock = threading.Lock()
+_refresher_thread = None
+
+def start_statistics_refresher(app):
+    """Start one background thread per process that keeps WasteStatistics within
+    STATS_MAX_STALENESS seconds of the rollups. A value of 0 disables it."""
+    global _refresher_thread
+    interval = app.config.get('STATS_MAX_STALENESS', 0)
+    if interval <= 0:
+        return None
+
+    with _refresher_lock:
+        if _refresher_thread is not None:
+            return _refresher_thread
+
+        def run():
+            last_run = datetime.utcnow()
+            while True:
+                time.sleep(interval)
+                started = datetime.utcnow()
+                with app.app_context():
+                    try:
+                        refresh_statistics(last_run)
+                        last_run = started
+                    except Exception as e:
+                        db.session.rollback()
+                        logger.exception("Statistics refresh error: %s", e)
+                    finally:
+                        db.session.remove()
+
+        _refresher_thread = threading.Thread(target=run, name='stats-refresher', daemon=True)
+        _refresher_thread.start()
+        return _refresher_thread
+
+def rebuild_rollups(user_id=None):
+    """Recompute rollup rows from WasteCollection, for one user or everyone"""
+    delete_query = WasteRollup.query
+    if user_id is not None:
+        delete_query = delete_query.filter_by(user_id=user_id)
+    delete_query.delete(synchronize_session=False)
+
+    status = func.coalesce(WasteCollection.status, DEFAULT_STATUS)
+    source = select(
+        WasteCollection.user_id,
+        WasteCollection.waste_type,
+        status,
+        func.sum(WasteCollection.quantity),
+        func.count(WasteCollection.id),
+        func.current_timestamp()
+    )
+    if user_id is not None:
+        source = source.where(WasteCollection.user_id == user_id)
+    source = source.group_by(WasteCollection.user_id, WasteCollection.waste_type, status)
+
+    db.session.execute(
+        WasteRollup.__table__.insert().from_select(
+            ['user_id', 'waste_type', 'status', 'total_quantity', 'collection_count', 'updated_at'],
+            source
+        )
+    )
+    db.session.commit()
+    return WasteRollup.query.count() if user_id is None else len(get_user_rollups(user_id))
@@ -0,0 +1,206 @@
+import math
+import time
+from datetime import datetime, timedelta
+from models import db, PickupSchedule
+from geocoding import geocode_service
+from spatial_index import haversine_km
+
+KM_PER_DEGREE_LAT = 110.574
+KM_PER_DEGREE_LNG = 111.320
+
+class Stop:
+    __slots__ = ('pickup_id', 'address', 'waste_type', 'quantity', 'lat', 'lng', 'x', 'y')
+
+    def __init__(self, pickup_id, address, waste_type, quantity, lat, lng):
+        self.pickup_id = pickup_id
+        self.address = address
+        self.waste_type = waste_type
+        self.quantity = quantity
+        self.lat = lat
+        self.lng = lng
+        self.x = 0.0
+        self.y = 0.0
+
+    def to_dict(self):
+        return {
+            'pickup_id': self.pickup_id,
+            'address': self.address,
+            'latitude': self.lat,
+            'longitude': self.lng,
+            'quantity_kg': self.quantity,
+        }
+
+def project(stops, depot):
+    """Equirectangular projection to km around the depot; accurate enough at city scale"""
+    scale = KM_PER_DEGREE_LNG * math.cos(math.radians(depot[0]))
+    for stop in stops:
+        stop.x = (stop.lng - depot[1]) * scale
+        stop.y = (stop.lat - depot[0]) * KM_PER_DEGREE_LAT
+
+def split_area(stops, max_size):
+    """Recursively halve a set of stops along its wider axis until every area has at most max_size"""
+    areas = []
+    pending = [stops]
+    while pending:
+        group = pending.pop()
+        if len(group) <= max_size:
+            areas.append(group)
+            continue
+        width = max(stop.x for stop in group) - min(stop.x for stop in group)
+        height = max(stop.y for stop in group) - min(stop.y for stop in group)
+        group.sort(key=(lambda stop: stop.x) if width >= height else (lambda stop: stop.y))
+        middle = len(group) // 2
+        pending.append(group[:middle])
+        pending.append(group[middle:])
+    return areas
+
+def savings_routes(stops, capacity, max_stops):
+    """Clarke-Wright savings: start with one route per stop and merge route ends in order of
+    the distance saved by serving them on one trip, while load and stop limits allow."""
+    count = len(stops)
+    xs = [stop.x for stop in stops]
+    ys = [stop.y for stop in stops]
+    loads = [stop.quantity for stop in stops]
+    to_depot = [math.hypot(x, y) for x, y in zip(xs, ys)]
+
+    savings = []
+    for i in range(count):
+        xi, yi, di = xs[i], ys[i], to_depot[i]
+        for j in range(i + 1, count):
+            saving = di + to_depot[j] - math.hypot(xi - xs[j], yi - ys[j])
+            if saving > 0:
+                savings.append((saving, i, j))
+    savings.sort(reverse=True)
+
+    routes = {i: [i] for i in range(count)}
+    route_of = list(range(count))
+    route_load = {i: loads[i] for i in range(count)}
+    for _, i, j in savings:
+        first, second = route_of[i], route_of[j]
+        if first == second:
+            continue
+        a, b = routes[first], routes[second]
+        if len(a) + len(b) > max_stops or route_load[first] + route_load[second] > capacity:
+            continue
+        # Only route ends can be joined without breaking a route apart
+        if (i != a[0] and i != a[-1]) or (j != b[0] and j != b[-1]):
+            continue
+        if a[-1] != i:
+            a.reverse()
+        if b[0] != j:
+            b.reverse()
+        a.extend(b)
+        route_load[first] += route_load.pop(second)
+        del routes[second]
+        for node in b:
+            route_of[node] = first
+    return [[stops[i] for i in route] for route in routes.values()]
+
+def two_opt(route):
+    """Reverse segments of a depot-to-depot tour while that shortens it"""
+    if len(route) < 3:
+        return route
+    points = [(0.0, 0.0)] + [(stop.x, stop.y) for stop in route] + [(0.0, 0.0)]
+    order = list(range(len(points)))
+
+    def dist(p, q):
+        return math.hypot(points[p][0] - points[q][0], points[p][1] - points[q][1])
+
+    improved = True
+    while improved:
+        improved = False
+        for a in range(1, len(order) - 2):
+            for b in range(a + 1, len(order) - 1):
+                delta = (dist(order[a - 1], order[b]) + dist(order[a], order[b + 1])
+                         - dist(order[a - 1], order[a]) - dist(order[b], order[b + 1]))
+                if delta < -1e-9:
+                    order[a:b + 1] = reversed(order[a:b + 1])
+                    improved = True
+    return [route[index - 1] for index in order[1:-1]]
+
+def route_distance_km(route, depot):
+    path = [depot] + [(stop.lat, stop.lng) for stop in route] + [depot]
+    return sum(haversine_km(p[0], p[1], q[0], q[1]) for p, q in zip(path, path[1:]))
+
+def plan_routes(stops, depot=None, capacity_kg=1000.0, max_stops=40, cluster_size=150):
+    """Group stops by waste type, split each group into areas of at most
+    cluster_size stops, and route every area from the depot. A stop heavier
+    than a whole truck gets a route of its own, flagged as overloaded."""
+    if not stops:
+        return []
+    if depot is None:
+        depot = (sum(stop.lat for stop in stops) / len(stops), sum(stop.lng for stop in stops) / len(stops))
+    project(stops, depot)
+
+    by_type = {}
+    for stop in stops:
+        by_type.setdefault(stop.waste_type, []).append(stop)
+
+    routes = []
+    for waste_type in sorted(by_type):
+        for area in split_area(by_type[waste_type], cluster_size):
+            for route in savings_routes(area, capacity_kg, max_stops):
+                route = two_opt(route)
+                load = sum(stop.quantity for stop in route)
+                routes.append({
+                    'waste_type': waste_type,
+                    'load_kg': round(load, 2),
+                    'overloaded': load > capacity_kg,
+                    'distance_km': round(route_distance_km(route, depot), 3),
+                    'stops': [stop.to_dict() for stop in route],
+                })
+    return routes
+
+def plan_day(day, config, waste_type=None):
+    """Plan routes for every Scheduled pickup on a date. Caller commits the geocode cache."""
+    started = time.perf_counter()
+    start = datetime.combine(day, datetime.min.time())
+    query = db.session.query(
+        PickupSchedule.id,
+        PickupSchedule.pickup_address,
+        PickupSchedule.waste_type,
+        PickupSchedule.quantity_estimate
+    ).filter(
+        PickupSchedule.pickup_date >= start,
+        PickupSchedule.pickup_date < start + timedelta(days=1),
+        PickupSchedule.status == 'Scheduled'
+    )
+    if waste_type:
+        query = query.filter(PickupSchedule.waste_type == waste_type)
+    pickups = query.order_by(PickupSchedule.id).all()
+
+    points = geocode_service.geocode_many(pickup.pickup_address for pickup in pickups)
+    default_quantity = config.get('ROUTE_DEFAULT_QUANTITY_KG', 5.0)
+    stops = []
+    unrouted = []
+    for pickup in pickups:
+        point = points.get(pickup.pickup_address)
+        if point is None:
+            unrouted.append({'pickup_id': pickup.id, 'address': pickup.pickup_address,
+                             'reason': 'address could not be geocoded'})
+            continue
+        quantity = pickup.quantity_estimate if pickup.quantity_estimate is not None else default_quantity
+        stops.append(Stop(pickup.id, pickup.pickup_address, pickup.waste_type, quantity, point[0], point[1]))
+
+    depot = config.get('ROUTE_DEPOT')
+    if depot is None and stops:
+        depot = (sum(stop.lat for stop in stops) / len(stops), sum(stop.lng for stop in stops) / len(stops))
+    capacity_kg = config.get('ROUTE_VEHICLE_CAPACITY_KG', 1000.0)
+    routes = plan_routes(stops, depot, capacity_kg=capacity_kg,
+                         max_stops=config.get('ROUTE_MAX_STOPS', 40),
+                         cluster_size=config.get('ROUTE_CLUSTER_SIZE', 150))
+
+    return {
+        'date': day.isoformat(),
+        'depot': {'latitude': depot[0], 'longitude': depot[1]} if depot else None,
+        'vehicle_capacity_kg': capacity_kg,
+        'routes': routes,
+        'unrouted': unrouted,
+        'summary': {
+            'pickups': len(pickups),
+            'routed': len(stops),
+            'routes': len(routes),
+            'total_distance_km': round(sum(route['distance_km'] for route in routes), 3),
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+        },
+    }
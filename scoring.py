@@ -0,0 +1,108 @@
+import json
+import os
+import threading
+import time
+from app_logging import get_logger
+
+logger = get_logger('scoring')
+
+RULES_PATH = os.getenv('SCORING_RULES_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scoring_rules.json'))
+# How often (seconds) the rules file is checked for changes
+RELOAD_INTERVAL = 5
+# Rules file format this code understands, bumped when the layout changes
+RULES_VERSION = 1
+
+class ScoringRules:
+    """Points and carbon factor tables compiled into flat lookups"""
+
+    def __init__(self, data):
+        if data.get('version') != RULES_VERSION:
+            raise ValueError(f"Unsupported scoring rules version {data.get('version')!r}, expected {RULES_VERSION}")
+        self.version = data['version']
+        self.default_points_per_kg = data['default_points_per_kg']
+        self.recycled_bonus = data['recycled_bonus']
+        self.points_per_kg = dict(data['points_per_kg'])
+        self.recycled_carbon_per_kg = data['recycled_carbon_per_kg']
+        self.carbon_factors = dict(data['carbon_factors'])
+        self.waste_type_carbon_activity = dict(data['waste_type_carbon_activity'])
+        # kg CO2e per kg of each waste type, resolved once instead of per row
+        self.waste_type_carbon_factor = {
+            waste_type: self.carbon_factors.get(activity, 0)
+            for waste_type, activity in self.waste_type_carbon_activity.items()
+        }
+
+    def collection_points(self, waste_type, quantity, status=None):
+        points = int(quantity * self.points_per_kg.get(waste_type, self.default_points_per_kg))
+        if status == 'Recycled':
+            points = int(points * self.recycled_bonus)
+        return points
+
+    def score_collections(self, collections):
+        """Points for many (waste_type, quantity, status) tuples in one pass"""
+        rates = self.points_per_kg
+        default = self.default_points_per_kg
+        bonus = self.recycled_bonus
+        scores = []
+        for waste_type, quantity, status in collections:
+            points = int(quantity * rates.get(waste_type, default))
+            scores.append(int(points * bonus) if status == 'Recycled' else points)
+        return scores
+
+    def carbon_offset(self, activity_type, quantity):
+        return self.carbon_factors.get(activity_type, 0) * quantity
+
+    def waste_carbon_offset(self, waste_type, quantity):
+        return self.waste_type_carbon_factor.get(waste_type, 0) * quantity
+
+    def total_waste_carbon_offset(self, collections):
+        """Carbon offset for many (waste_type, quantity) pairs in one pass"""
+        factors = self.waste_type_carbon_factor
+        return sum(factors.get(waste_type, 0) * quantity for waste_type, quantity in collections)
+
+    def recycled_carbon_offset(self, recycled_quantity):
+        return recycled_quantity * self.recycled_carbon_per_kg
+
+class RulesLoader:
+    """Loads scoring_rules.json once and reloads it when the file changes"""
+
+    def __init__(self, path):
+        self.path = path
+        self._rules = None
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _load(self):
+        mtime = os.path.getmtime(self.path)
+        with open(self.path) as f:
+            rules = ScoringRules(json.load(f))
+        self._rules = rules
+        self._mtime = mtime
+
+    def get(self):
+        now = time.monotonic()
+        if self._rules is not None and now - self._checked_at < RELOAD_INTERVAL:
+            return self._rules
+        with self._lock:
+            if self._rules is None:
+                self._load()
+            elif now - self._checked_at >= RELOAD_INTERVAL:
+                try:
+                    if os.path.getmtime(self.path) != self._mtime:
+                        self._load()
+                except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+                    # Keep serving the last good rules if the file is mid-edit or broken
+                    logger.error("Error reloading scoring rules: %s", e)
+            self._checked_at = now
+            return self._rules
+
+    def reload(self):
+        with self._lock:
+            self._load()
+            self._checked_at = time.monotonic()
+            return self._rules
+
+rules_loader = RulesLoader(RULES_PATH)
+
+def get_rules():
+    return rules_loader.get()
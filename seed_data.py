@@ -0,0 +1,257 @@
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from app import app, db
+from models import (User, WasteCollection, RecyclingActivity, PickupSchedule, GreenActivity, UserLogin,
+                    RecyclingCenter, WasteStatistics)
+from migrations import upgrade_database
+from bulk_ingest import driver_executemany
+from passwords import hasher
+from scoring import get_rules
+from rollups import rebuild_rollups
+from carbon import recompute_carbon_ledger
+from slots import zone_for_address, rebuild_pickup_slots
+
+# Generates production-sized data with bulk inserts. Row counts per user are
+# heavy-tailed (a few very active users, many occasional ones), waste types
+# and quantities follow the household mix below, and timestamps fall in
+# daytime hours between each user's signup and now.
+
+# Waste type -> (share of collections, median kg per collection)
+WASTE_MIX = {
+    'Organic': (0.34, 3.0),
+    'Plastic': (0.22, 1.2),
+    'Paper': (0.20, 1.8),
+    'Glass': (0.10, 2.0),
+    'Metal': (0.08, 0.9),
+    'Electronic': (0.06, 1.5),
+}
+# Relative activity per hour of day
+HOUR_WEIGHTS = [1, 1, 1, 1, 1, 2, 4, 7, 9, 10, 10, 9, 8, 8, 8, 9, 10, 10, 9, 7, 5, 3, 2, 1]
+CITIES = [
+    ('Bengaluru', 12.9716, 77.5946, '5600'),
+    ('Delhi', 28.6139, 77.2090, '1100'),
+    ('Mumbai', 19.0760, 72.8777, '4000'),
+    ('Chennai', 13.0827, 80.2707, '6000'),
+    ('Hyderabad', 17.3850, 78.4867, '5000'),
+]
+USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/119.0 Safari/537.36',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 Mobile/15E148',
+    'Mozilla/5.0 (Linux; Android 13) AppleWebKit/537.36 Chrome/119.0 Mobile Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 14_0) AppleWebKit/605.1.15 Version/17.0 Safari/605.1.15',
+]
+GREEN_ACTIVITY_TYPES = ['public_transport', 'cycling', 'tree_planting']
+PARETO_ALPHA = 1.5
+PARETO_MEAN = PARETO_ALPHA / (PARETO_ALPHA - 1)
+INSERT_CHUNK = 50000
+
+class Generator:
+    def __init__(self, rng, now, days, collections_per_user, password_hash):
+        self.rng = rng
+        self.now = now
+        self.start = now - timedelta(days=days)
+        self.collections_per_user = collections_per_user
+        self.password_hash = password_hash
+        self.rules = get_rules()
+        self.waste_types = list(WASTE_MIX)
+        self.waste_weights = [share for share, _ in WASTE_MIX.values()]
+        self.ids = {}
+
+    def next_id(self, model):
+        self.ids[model] += 1
+        return self.ids[model]
+
+    def moment(self, since):
+        """A daytime timestamp between `since` and now"""
+        span = max((self.now - since).days, 0)
+        day = since + timedelta(days=self.rng.randint(0, span))
+        hour = self.rng.choices(range(24), HOUR_WEIGHTS)[0]
+        value = day.replace(hour=hour, minute=self.rng.randrange(60), second=self.rng.randrange(60), microsecond=0)
+        return min(value, self.now)
+
+    def status(self, when):
+        age = (self.now - when).days
+        if age < 3:
+            return 'Pending'
+        if age < 14:
+            return self.rng.choice(('Pending', 'Collected'))
+        return 'Recycled' if self.rng.random() < 0.55 else 'Collected'
+
+    def address(self):
+        city, _, _, prefix = self.rng.choice(CITIES)
+        pin = f'{prefix}{self.rng.randint(1, 99):02d}'
+        return f'{self.rng.randint(1, 999)} Main Road, {city} {pin}'
+
+    def user_block(self, count):
+        """Rows for `count` new users and everything they did, keyed by table"""
+        rows = {model: [] for model in (User, WasteCollection, RecyclingActivity, PickupSchedule,
+                                        GreenActivity, UserLogin, WasteStatistics)}
+        for _ in range(count):
+            user_id = self.next_id(User)
+            signup = self.moment(self.start)
+            points = 0
+            total_waste = recycled_waste = 0.0
+
+            activity_level = self.rng.paretovariate(PARETO_ALPHA) / PARETO_MEAN
+            collections = min(int(self.collections_per_user * activity_level), self.collections_per_user * 50)
+            for _ in range(collections):
+                when = self.moment(signup)
+                waste_type = self.rng.choices(self.waste_types, self.waste_weights)[0]
+                quantity = max(round(WASTE_MIX[waste_type][1] * self.rng.lognormvariate(0, 0.6), 2), 0.1)
+                status = self.status(when)
+                earned = self.rules.collection_points(waste_type, quantity, status)
+                collection_id = self.next_id(WasteCollection)
+                rows[WasteCollection].append({
+                    'id': collection_id, 'user_id': user_id, 'scheduled_date': when, 'waste_type': waste_type,
+                    'quantity': quantity, 'status': status, 'notes': None, 'created_at': when
+                })
+                rows[RecyclingActivity].append({
+                    'id': self.next_id(RecyclingActivity), 'user_id': user_id, 'activity_type': 'Waste Added',
+                    'points_earned': earned, 'date': when,
+                    'description': f'Added {quantity} kg of {waste_type} waste',
+                    'waste_collection_id': collection_id, 'pickup_schedule_id': None
+                })
+                points += earned
+                total_waste += quantity
+                if status == 'Recycled':
+                    recycled_waste += quantity
+
+            # About a third of users book pickups, mostly in the past
+            if self.rng.random() < 0.3:
+                for _ in range(self.rng.randint(1, 5)):
+                    booked = self.moment(signup)
+                    pickup_date = booked + timedelta(days=self.rng.randint(1, 14))
+                    waste_type = self.rng.choices(self.waste_types, self.waste_weights)[0]
+                    quantity = max(round(WASTE_MIX[waste_type][1] * self.rng.lognormvariate(0, 0.6), 2), 0.1)
+                    address = self.address()
+                    earned = self.rules.collection_points(waste_type, quantity)
+                    pickup_id = self.next_id(PickupSchedule)
+                    rows[PickupSchedule].append({
+                        'id': pickup_id, 'user_id': user_id, 'pickup_date': pickup_date, 'waste_type': waste_type,
+                        'quantity_estimate': quantity,
+                        'status': 'Scheduled' if pickup_date > self.now else 'Completed',
+                        'pickup_address': address, 'special_instructions': None, 'zone': zone_for_address(address)
+                    })
+                    rows[RecyclingActivity].append({
+                        'id': self.next_id(RecyclingActivity), 'user_id': user_id, 'activity_type': 'Pickup Scheduled',
+                        'points_earned': earned, 'date': booked,
+                        'description': f'Scheduled {quantity} kg of {waste_type} waste pickup',
+                        'waste_collection_id': None, 'pickup_schedule_id': pickup_id
+                    })
+                    points += earned
+
+            if self.rng.random() < 0.2:
+                for _ in range(self.rng.randint(1, 10)):
+                    activity_type = self.rng.choice(GREEN_ACTIVITY_TYPES)
+                    quantity = round(self.rng.uniform(1, 5 if activity_type == 'tree_planting' else 40), 1)
+                    rows[GreenActivity].append({
+                        'id': self.next_id(GreenActivity), 'user_id': user_id, 'activity_type': activity_type,
+                        'description': None, 'quantity': quantity, 'date': self.moment(signup),
+                        'carbon_offset': self.rules.carbon_offset(activity_type, quantity)
+                    })
+
+            for _ in range(1 + int(collections * 0.8)):
+                rows[UserLogin].append({
+                    'id': self.next_id(UserLogin), 'user_id': user_id, 'login_time': self.moment(signup),
+                    'ip_address': f'10.{self.rng.randrange(256)}.{self.rng.randrange(256)}.{self.rng.randrange(1, 255)}',
+                    'user_agent': self.rng.choice(USER_AGENTS),
+                    'status': 'failed' if self.rng.random() < 0.04 else 'success'
+                })
+
+            rows[User].append({
+                'id': user_id, 'username': f'seed{user_id}', 'email': f'seed{user_id}@example.com',
+                'password_hash': self.password_hash, 'points': points, 'created_at': signup,
+                'is_active': True, 'carbon_offset': 0.0
+            })
+            if collections:
+                rows[WasteStatistics].append({
+                    'user_id': user_id, 'waste_type': 'Total', 'date': self.now.date(),
+                    'total_waste': round(total_waste, 2), 'recycled_waste': round(recycled_waste, 2),
+                    'carbon_offset': self.rules.recycled_carbon_offset(recycled_waste)
+                })
+        return rows
+
+    def centers(self, count):
+        rows = []
+        for _ in range(count):
+            city, lat, lng, _ = self.rng.choice(CITIES)
+            rows.append({
+                'id': self.next_id(RecyclingCenter),
+                'name': f'{city} Recycling Point {self.ids[RecyclingCenter]}',
+                'address': self.address(),
+                'latitude': round(self.rng.gauss(lat, 0.08), 6),
+                'longitude': round(self.rng.gauss(lng, 0.08), 6),
+                'contact_number': f'+91 9{self.rng.randrange(10 ** 9):09d}',
+                'operating_hours': self.rng.choice(['Mon-Sat: 9 AM - 6 PM', 'Mon-Fri: 8 AM - 7 PM', 'Mon-Sun: 24/7']),
+                'is_active': self.rng.random() < 0.95
+            })
+        return rows
+
+def insert(model, rows):
+    # driver_executemany only pre-formats datetimes, so tables with Date columns go through SQLAlchemy
+    has_dates = any(isinstance(column.type, db.Date) for column in model.__table__.columns)
+    for start in range(0, len(rows), INSERT_CHUNK):
+        chunk = rows[start:start + INSERT_CHUNK]
+        if has_dates:
+            db.session.execute(model.__table__.insert(), chunk)
+        else:
+            driver_executemany(model.__table__, chunk)
+
+def main():
+    parser = argparse.ArgumentParser(description='Fill the database with generated users and their history')
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--collections-per-user', type=int, default=20, help='Mean; the distribution is heavy-tailed')
+    parser.add_argument('--centers', type=int, default=2000)
+    parser.add_argument('--days', type=int, default=730, help='History length')
+    parser.add_argument('--block-users', type=int, default=5000, help='Users generated and committed per block')
+    parser.add_argument('--password', default='seed-password', help='Password of every generated user')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--reset', action='store_true', help='Drop every table first')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    with app.app_context():
+        if args.reset:
+            db.drop_all()
+        upgrade_database(db.engine)
+
+        # One real hash shared by every user, so /login costs what it does in production
+        generator = Generator(random.Random(args.seed), datetime.utcnow().replace(microsecond=0), args.days,
+                              args.collections_per_user, hasher.hash(args.password))
+        for model in (User, WasteCollection, RecyclingActivity, PickupSchedule, GreenActivity, UserLogin,
+                      RecyclingCenter):
+            generator.ids[model] = db.session.query(func.coalesce(func.max(model.id), 0)).scalar()
+
+        insert(RecyclingCenter, generator.centers(args.centers))
+        db.session.commit()
+
+        totals = {}
+        done = 0
+        while done < args.users:
+            count = min(args.block_users, args.users - done)
+            rows = generator.user_block(count)
+            for model, model_rows in rows.items():
+                if model_rows:
+                    insert(model, model_rows)
+                totals[model.__tablename__] = totals.get(model.__tablename__, 0) + len(model_rows)
+            db.session.commit()
+            done += count
+            elapsed = time.perf_counter() - started
+            print(f"{done}/{args.users} users, {sum(totals.values())} rows in {elapsed:.0f} s")
+
+        print("Rebuilding rollups, carbon ledger and pickup slots...")
+        rebuild_rollups()
+        recompute_carbon_ledger()
+        rebuild_pickup_slots()
+
+    print(f"Seeded in {time.perf_counter() - started:.0f} s:")
+    for table, count in sorted(totals.items()):
+        print(f"  {table:20} {count}")
+    print(f"  {'recycling_center':20} {args.centers}")
+    print(f"Log in as seed<id>@example.com with password {args.password!r}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+from datetime import date, datetime, timedelta
+from sqlalchemy import func, update, select
+from sqlalchemy.exc import IntegrityError
+from models import db, PickupSchedule, PickupSlot
+from geocoding import PIN_CODE, normalize_address
+
+DEFAULT_ZONE = 'default'
+CANCELLED = 'Cancelled'
+
+def zone_for_address(address):
+    """Pickups are zoned by the PIN code in their address"""
+    match = PIN_CODE.search(normalize_address(address))
+    return match.group(1) if match else DEFAULT_ZONE
+
+def _capacity(default_capacity):
+    return func.coalesce(PickupSlot.__table__.c.capacity, default_capacity)
+
+def _ensure_slot(day, zone):
+    table = PickupSlot.__table__
+    dialect = db.engine.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        db.session.execute(insert(table).values(pickup_date=day, zone=zone, booked=0).on_conflict_do_nothing())
+        return
+    if db.session.execute(select(table.c.id).where(table.c.pickup_date == day, table.c.zone == zone)).first():
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.execute(table.insert().values(pickup_date=day, zone=zone, booked=0))
+    except IntegrityError:
+        # Another request created the row first
+        pass
+
+def book_slot(day, zone, default_capacity):
+    """Take one slot on a day in a zone if any are left. Caller owns the commit.
+
+    The check and the increment are one conditional UPDATE, so concurrent
+    bookings cannot oversubscribe a day.
+    """
+    _ensure_slot(day, zone)
+    table = PickupSlot.__table__
+    result = db.session.execute(
+        update(table)
+        .where(table.c.pickup_date == day, table.c.zone == zone, table.c.booked < _capacity(default_capacity))
+        .values(booked=table.c.booked + 1)
+    )
+    return result.rowcount == 1
+
+def release_slot(pickup):
+    """Give back the slot a pickup was booked against. Caller owns the commit."""
+    if pickup.zone is None or pickup.status == CANCELLED:
+        return
+    table = PickupSlot.__table__
+    db.session.execute(
+        update(table)
+        .where(table.c.pickup_date == pickup.pickup_date.date(), table.c.zone == pickup.zone, table.c.booked > 0)
+        .values(booked=table.c.booked - 1)
+    )
+
+def slot_status(day, zone, default_capacity):
+    slot = PickupSlot.query.filter_by(pickup_date=day, zone=zone).first()
+    capacity = slot.capacity if slot and slot.capacity is not None else default_capacity
+    booked = slot.booked if slot else 0
+    return {
+        'date': day.isoformat(),
+        'zone': zone,
+        'capacity': capacity,
+        'booked': booked,
+        'available': max(capacity - booked, 0),
+    }
+
+def nearest_free_slot(day, zone, default_capacity, earliest, horizon_days=14):
+    """Closest date to `day`, not before `earliest`, that still has a slot in the zone"""
+    rows = PickupSlot.query.filter(
+        PickupSlot.zone == zone,
+        PickupSlot.pickup_date >= max(earliest, day - timedelta(days=horizon_days)),
+        PickupSlot.pickup_date <= day + timedelta(days=horizon_days)
+    ).all()
+    full = {row.pickup_date for row in rows
+            if row.booked >= (row.capacity if row.capacity is not None else default_capacity)}
+
+    for offset in range(horizon_days + 1):
+        for candidate in (day + timedelta(days=offset), day - timedelta(days=offset)):
+            if candidate >= earliest and candidate not in full:
+                return candidate
+    return None
+
+def rebuild_pickup_slots(batch_size=1000):
+    """Zone any unzoned pickups and recount every slot from PickupSchedule.
+    Capacity overrides on existing slot rows are kept."""
+    last_id = 0
+    while True:
+        pickups = PickupSchedule.query.filter(
+            PickupSchedule.id > last_id,
+            PickupSchedule.zone.is_(None)
+        ).order_by(PickupSchedule.id).limit(batch_size).all()
+        if not pickups:
+            break
+        for pickup in pickups:
+            pickup.zone = zone_for_address(pickup.pickup_address)
+            last_id = pickup.id
+        db.session.commit()
+
+    db.session.execute(update(PickupSlot.__table__).values(booked=0))
+    day = func.date(PickupSchedule.pickup_date)
+    counts = db.session.query(day, PickupSchedule.zone, func.count(PickupSchedule.id)).filter(
+        PickupSchedule.status != CANCELLED
+    ).group_by(day, PickupSchedule.zone).all()
+
+    table = PickupSlot.__table__
+    for pickup_day, zone, count in counts:
+        if isinstance(pickup_day, str):
+            pickup_day = date.fromisoformat(pickup_day)
+        elif isinstance(pickup_day, datetime):
+            pickup_day = pickup_day.date()
+        _ensure_slot(pickup_day, zone)
+        db.session.execute(
+            update(table).where(table.c.pickup_date == pickup_day, table.c.zone == zone).values(booked=count)
+        )
+    db.session.commit()
+    return len(counts)
@@ -0,0 +1,175 @@
+import math
+import threading
+import time
+from sqlalchemy import event
+from models import RecyclingCenter
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+class GridIndex:
+    """Bucket points into fixed-size latitude/longitude cells.
+
+    A nearest-k query scans rings of cells around the query cell and stops
+    once the next ring cannot contain anything closer than the current k-th
+    result, so it only touches the cells near the query point.
+    """
+
+    def __init__(self, cell_degrees=0.05):
+        self.cell_degrees = cell_degrees
+        self.cells = {}
+        self.size = 0
+
+    def _cell(self, lat, lng):
+        return int(math.floor(lat / self.cell_degrees)), int(math.floor(lng / self.cell_degrees))
+
+    def insert(self, lat, lng, item):
+        self.cells.setdefault(self._cell(lat, lng), []).append((lat, lng, item))
+        self.size += 1
+
+    def _ring(self, row, col, radius):
+        if radius == 0:
+            yield row, col
+            return
+        for c in range(col - radius, col + radius + 1):
+            yield row - radius, c
+            yield row + radius, c
+        for r in range(row - radius + 1, row + radius):
+            yield r, col - radius
+            yield r, col + radius
+
+    def _cell_km(self, lat, ring):
+        # Narrowest cell width (km) anywhere in the given ring around lat
+        edge_lat = min(abs(lat) + (ring + 1) * self.cell_degrees, 90.0)
+        return self.cell_degrees * KM_PER_DEGREE * max(math.cos(math.radians(edge_lat)), 0.01)
+
+    def _scan_all(self, lat, lng, k, radius_km):
+        found = []
+        for points in self.cells.values():
+            for point_lat, point_lng, item in points:
+                distance = haversine_km(lat, lng, point_lat, point_lng)
+                if radius_km is None or distance <= radius_km:
+                    found.append((distance, item))
+        found.sort(key=lambda pair: pair[0])
+        return found[:k]
+
+    def nearest(self, lat, lng, k=10, radius_km=None):
+        """Return up to k (distance_km, item) pairs sorted by distance"""
+        if not self.size or k <= 0:
+            return []
+        if k >= self.size:
+            return self._scan_all(lat, lng, k, radius_km)
+
+        row, col = self._cell(lat, lng)
+        found = []
+        ring = 0
+        while True:
+            # Every cell in this ring is at least (ring - 1) cell widths away
+            ring_min_km = (ring - 1) * self._cell_km(lat, ring) if ring > 0 else 0.0
+            if radius_km is not None and ring_min_km > radius_km:
+                break
+            if len(found) >= k and ring_min_km > found[k - 1][0]:
+                break
+            # Sparse data far from the query point: scanning everything is cheaper
+            if (2 * ring + 1) ** 2 > 4 * len(self.cells):
+                return self._scan_all(lat, lng, k, radius_km)
+
+            added = False
+            for cell in self._ring(row, col, ring):
+                for point_lat, point_lng, item in self.cells.get(cell, ()):
+                    distance = haversine_km(lat, lng, point_lat, point_lng)
+                    if radius_km is None or distance <= radius_km:
+                        found.append((distance, item))
+                        added = True
+            if added:
+                found.sort(key=lambda pair: pair[0])
+                del found[k:]
+            ring += 1
+
+        return found
+
+    def within_bbox(self, south, west, north, east):
+        """Yield (lat, lng, item) for every point inside the bounding box"""
+        min_row, min_col = self._cell(south, west)
+        max_row, max_col = self._cell(north, east)
+        if (max_row - min_row + 1) * (max_col - min_col + 1) > len(self.cells):
+            # Box covers more cells than are occupied, walk the occupied ones
+            candidates = (points for (row, col), points in self.cells.items()
+                          if min_row <= row <= max_row and min_col <= col <= max_col)
+        else:
+            candidates = (self.cells[(row, col)]
+                          for row in range(min_row, max_row + 1)
+                          for col in range(min_col, max_col + 1)
+                          if (row, col) in self.cells)
+        for points in candidates:
+            for lat, lng, item in points:
+                if south <= lat <= north and west <= lng <= east:
+                    yield lat, lng, item
+
+def center_to_dict(center):
+    return {
+        'id': center.id,
+        'name': center.name,
+        'address': center.address,
+        'contact': center.contact_number,
+        'latitude': float(center.latitude),
+        'longitude': float(center.longitude),
+        'operating_hours': center.operating_hours
+    }
+
+class CenterIndex:
+    """Process-wide spatial index over active recycling centers.
+
+    Writes to RecyclingCenter in this process mark the index dirty; the TTL
+    picks up changes made by other workers. The index is rebuilt lazily on
+    the next query.
+    """
+
+    def __init__(self, ttl_seconds=300, cell_degrees=0.05):
+        self.ttl_seconds = ttl_seconds
+        self.cell_degrees = cell_degrees
+        self.version = 0
+        self._grid = None
+        self._built_version = None
+        self._built_at = 0.0
+        # Re-entrant: an autoflush during a rebuild can fire the invalidation hook
+        self._lock = threading.RLock()
+
+    def invalidate(self):
+        with self._lock:
+            self.version += 1
+
+    def _is_fresh(self):
+        return (self._grid is not None
+                and self._built_version == self.version
+                and time.monotonic() - self._built_at < self.ttl_seconds)
+
+    def get(self):
+        if self._is_fresh():
+            return self._grid
+        with self._lock:
+            if not self._is_fresh():
+                version = self.version
+                grid = GridIndex(self.cell_degrees)
+                for center in RecyclingCenter.query.filter_by(is_active=True).yield_per(5000):
+                    grid.insert(float(center.latitude), float(center.longitude), center_to_dict(center))
+                self._grid = grid
+                self._built_version = version
+                self._built_at = time.monotonic()
+            return self._grid
+
+    def nearest(self, lat, lng, k=10, radius_km=None):
+        return self.get().nearest(lat, lng, k, radius_km)
+
+center_index = CenterIndex()
+
+@event.listens_for(RecyclingCenter, 'after_insert')
+@event.listens_for(RecyclingCenter, 'after_update')
+@event.listens_for(RecyclingCenter, 'after_delete')
+def _invalidate_center_index(mapper, connection, target):
+    center_index.invalidate()
@@ -0,0 +1,55 @@
+import os
+import sys
+import tempfile
+import pytest
+
+# The app reads its configuration at import time, so point it at a throwaway
+# SQLite file and turn off the background threads before anything imports it
+_database_dir = tempfile.mkdtemp(prefix='ecotrack-tests-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_database_dir, 'ecotrack.db')
+os.environ['DB_PROFILE'] = 'default'
+os.environ['STATS_MAX_STALENESS'] = '0'
+os.environ['LEADERBOARD_REFRESH'] = '0'
+os.environ['LOGIN_AUDIT_ASYNC'] = 'False'
+os.environ['PASSWORD_HASH_WORKERS'] = '0'
+os.environ['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+os.environ['LOG_LEVEL'] = 'WARNING'
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def app():
+    from app import app as flask_app
+    from models import db
+    from migrations import upgrade_database
+    from user_cache import user_cache
+    from leaderboard import leaderboard
+    from waste_charts import chart_cache
+
+    with flask_app.app_context():
+        upgrade_database(db.engine)
+    user_cache._entries.clear()
+    chart_cache._entries.clear()
+    leaderboard.boards = None
+    yield flask_app
+    with flask_app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def make_user(app):
+    from models import db, User
+
+    def make_user(username='user', points=0):
+        with app.app_context():
+            user = User(username=username, email=f'{username}@example.com', points=points)
+            user.set_password('password123')
+            db.session.add(user)
+            db.session.commit()
+            return user.id
+    return make_user
+
+def log_in(client, user_id):
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
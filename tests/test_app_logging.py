@@ -0,0 +1,23 @@
+import logging
+from flask import g
+from app_logging import RequestContextFilter
+
+def record(level):
+    return logging.LogRecord('ecotrack', level, __file__, 1, 'message', None, None)
+
+def test_sampled_request_keeps_log_level_for_non_debug_records(app):
+    log_filter = RequestContextFilter(logging.WARNING)
+    with app.test_request_context('/'):
+        g.debug_sampled = True
+        assert log_filter.filter(record(logging.DEBUG))
+        assert not log_filter.filter(record(logging.INFO))
+        assert log_filter.filter(record(logging.WARNING))
+
+        g.debug_sampled = False
+        assert not log_filter.filter(record(logging.DEBUG))
+        assert not log_filter.filter(record(logging.INFO))
+
+def test_records_outside_requests_use_log_level(app):
+    log_filter = RequestContextFilter(logging.INFO)
+    assert not log_filter.filter(record(logging.DEBUG))
+    assert log_filter.filter(record(logging.INFO))
@@ -0,0 +1,18 @@
+import pytest
+from assets import plotly_package_bundle
+
+def test_unbuilt_pages_load_vendor_files_locally(app):
+    # Built or not, templates point at this server rather than a CDN
+    asset_url = app.jinja_env.globals['asset_url']
+    with app.test_request_context():
+        urls = {name: asset_url(name) for name in ('leaflet.js', 'leaflet.css', 'plotly.js')}
+    assert all(url.startswith('/static/') for url in urls.values())
+
+    client = app.test_client()
+    assert client.get(urls['leaflet.js']).status_code == 200
+    assert client.get('/static/vendor/images/marker-icon.png').status_code == 200
+    if plotly_package_bundle() is None:
+        pytest.skip('plotly package not installed')
+    response = client.get(urls['plotly.js'])
+    assert response.status_code == 200
+    assert b'plotly' in response.get_data()[:2000].lower()
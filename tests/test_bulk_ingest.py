@@ -0,0 +1,70 @@
+import io
+import bulk_ingest
+from conftest import log_in
+from models import db, User, WasteCollection, RecyclingActivity, WasteRollup
+from bulk_ingest import ingest
+
+def csv_upload(*lines):
+    return io.BytesIO(('user_id,waste_type,quantity,status,scheduled_date\n' + '\n'.join(lines) + '\n').encode('utf-8'))
+
+def test_imported_activities_link_to_their_collections(app, make_user):
+    user_id = make_user()
+    with app.app_context():
+        report = ingest(csv_upload(f'{user_id},Paper,2,Recycled,2024-03-01T10:00:00',
+                                   f'{user_id},Glass,3,Pending,2024-04-02T10:00:00'), 'csv', user_id)
+        assert report.inserted == 2 and report.error_count == 0
+        activities = RecyclingActivity.query.filter_by(user_id=user_id).all()
+        collections = {collection.id for collection in WasteCollection.query.filter_by(user_id=user_id)}
+        assert {activity.waste_collection_id for activity in activities} == collections
+        assert db.session.get(User, user_id).points == sum(activity.points_earned for activity in activities)
+        assert db.session.query(db.func.sum(WasteRollup.collection_count)).scalar() == 2
+
+def test_deleting_an_imported_collection_takes_its_points_back(app, make_user):
+    user_id = make_user()
+    with app.app_context():
+        ingest(csv_upload(f'{user_id},Paper,2,Recycled,2024-03-01T10:00:00'), 'csv', user_id)
+        activity_id = RecyclingActivity.query.filter_by(user_id=user_id).one().id
+        assert db.session.get(User, user_id).points > 0
+
+    client = app.test_client()
+    log_in(client, user_id)
+    assert client.post(f'/delete-waste/{activity_id}').status_code == 302
+    with app.app_context():
+        assert db.session.get(User, user_id).points == 0
+        assert WasteCollection.query.filter_by(user_id=user_id).count() == 0
+
+def test_failed_batch_reports_one_generic_error(app, make_user, monkeypatch):
+    user_id = make_user()
+
+    def fail(deltas, now):
+        raise RuntimeError('secret database detail')
+    monkeypatch.setattr(bulk_ingest, 'apply_carbon_deltas', fail)
+
+    with app.app_context():
+        report = ingest(csv_upload(f'{user_id},Paper,2,Recycled,2024-03-01T10:00:00',
+                                   f'{user_id},Glass,3,Pending,2024-04-02T10:00:00'), 'csv', user_id)
+        assert report.inserted == 0
+        assert report.error_count == 2
+        assert len(report.errors) == 1
+        assert 'secret' not in report.errors[0]['error']
+        assert WasteCollection.query.count() == 0
+
+def test_quantity_error_mentions_the_cap(app, make_user):
+    user_id = make_user()
+    with app.app_context():
+        report = ingest(csv_upload(f'{user_id},Paper,200000,Recycled,2024-03-01T10:00:00'), 'csv', user_id)
+    assert report.error_count == 1
+    assert str(bulk_ingest.MAX_QUANTITY) in report.errors[0]['error']
+
+def test_upload_refreshes_cached_charts(app, make_user):
+    user_id = make_user()
+    client = app.test_client()
+    log_in(client, user_id)
+    # Cache the empty distribution first
+    assert client.get('/api/waste-distribution').get_json()['labels'] == []
+
+    with app.app_context():
+        ingest(csv_upload(f'{user_id},Paper,3,Collected,2024-03-01T10:00:00'), 'csv', user_id)
+    distribution = client.get('/api/waste-distribution').get_json()
+    assert distribution['labels'] == ['Paper']
+    assert distribution['quantities'] == [3.0]
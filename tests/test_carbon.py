@@ -0,0 +1,55 @@
+from datetime import date
+from conftest import log_in
+from models import db, CarbonLedger, RecyclingActivity
+import carbon
+
+def test_concurrent_first_writes_share_one_ledger_row(app, make_user, monkeypatch):
+    user_id = make_user()
+    ensure = carbon._ensure_entry
+    day = date(2024, 3, 1)
+
+    def racing_ensure(*args):
+        # Another worker books the same day between our lookup and our insert
+        with db.engine.begin() as connection:
+            connection.execute(CarbonLedger.__table__.insert().values(
+                user_id=user_id, day=day, source=carbon.WASTE, activity_type='Paper',
+                quantity=1.0, carbon_offset=0.9, entry_count=1))
+        ensure(*args)
+    monkeypatch.setattr(carbon, '_ensure_entry', racing_ensure)
+
+    with app.app_context():
+        carbon.apply_carbon_delta(user_id, day, carbon.WASTE, 'Paper', 2.0, 1.8)
+        db.session.commit()
+        entry = CarbonLedger.query.filter_by(user_id=user_id).one()
+        assert (entry.quantity, entry.entry_count) == (3.0, 2)
+        assert round(entry.carbon_offset, 6) == 2.7
+
+def test_adding_then_deleting_a_collection_leaves_the_ledger_at_zero(app, make_user):
+    user_id = make_user()
+    client = app.test_client()
+    log_in(client, user_id)
+    client.post('/add-waste-details', data={'waste_type': 'Metal', 'quantity': '4', 'status': 'Collected'})
+    with app.app_context():
+        assert carbon.carbon_summary(user_id)['total'] == 16.0
+        activity_id = RecyclingActivity.query.filter_by(user_id=user_id).one().id
+
+    assert client.post(f'/delete-waste/{activity_id}').status_code == 302
+    with app.app_context():
+        entry = CarbonLedger.query.filter_by(user_id=user_id).one()
+        assert (entry.quantity, entry.carbon_offset, entry.entry_count) == (0.0, 0.0, 0)
+        assert carbon.carbon_summary(user_id)['total'] == 0.0
+
+def test_recompute_matches_the_write_path(app, make_user):
+    user_id = make_user()
+    client = app.test_client()
+    log_in(client, user_id)
+    for waste_type, quantity, status in (('Paper', '2.5', 'Recycled'), ('Glass', '3', 'Pending'),
+                                         ('Paper', '1', 'Collected'), ('Organic', '5', 'Collected')):
+        client.post('/add-waste-details', data={'waste_type': waste_type, 'quantity': quantity, 'status': status})
+    client.post('/add-green-activity', data={'activity_type': 'cycling', 'quantity': '12', 'description': 'Commute'})
+
+    with app.app_context():
+        written = carbon.carbon_summary(user_id)
+        assert {entry['source'] for entry in written['by_activity_type']} == {carbon.WASTE, carbon.GREEN}
+        carbon.recompute_carbon_ledger()
+        assert carbon.carbon_summary(user_id) == written
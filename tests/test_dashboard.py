@@ -0,0 +1,13 @@
+from conftest import log_in
+
+def test_dashboard_renders_totals(app, make_user):
+    user_id = make_user()
+    client = app.test_client()
+    log_in(client, user_id)
+    assert client.post('/add-waste-details', data={'waste_type': 'Paper', 'quantity': '2.5', 'status': 'Recycled'}).status_code == 302
+
+    response = client.get('/dashboard')
+    assert response.status_code == 200
+    page = response.get_data(as_text=True)
+    assert '2.5 kg' in page
+    assert 'wasteChart' in page
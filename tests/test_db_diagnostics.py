@@ -0,0 +1,17 @@
+from conftest import log_in
+
+def test_diagnostics_need_the_operator_token(app, make_user, monkeypatch):
+    client = app.test_client()
+    log_in(client, make_user())
+    monkeypatch.setitem(app.config, 'OPS_TOKEN', 'ops-secret')
+    # Being logged in is not enough, including for a forced refresh
+    assert client.get('/db-diagnostics').status_code == 403
+    assert client.get('/db-diagnostics?refresh=1', headers={'X-Ops-Token': 'wrong'}).status_code == 403
+
+    response = client.get('/db-diagnostics?refresh=1', headers={'X-Ops-Token': 'ops-secret'})
+    assert response.status_code == 200
+    assert 'error' not in response.get_json()
+
+def test_diagnostics_are_off_without_a_configured_token(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'OPS_TOKEN', None)
+    assert app.test_client().get('/db-diagnostics', headers={'X-Ops-Token': ''}).status_code == 403
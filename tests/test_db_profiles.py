@@ -0,0 +1,14 @@
+import pytest
+from db_profiles import engine_options
+
+def test_postgres_profile_needs_database_url(monkeypatch):
+    monkeypatch.delenv('DATABASE_URL', raising=False)
+    with pytest.raises(ValueError, match='DATABASE_URL'):
+        engine_options('postgres')
+
+    monkeypatch.setenv('DATABASE_URL', 'postgresql://ecotrack@localhost/ecotrack')
+    assert engine_options('postgres')['pool_pre_ping'] is True
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError):
+        engine_options('mysql')
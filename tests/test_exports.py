@@ -0,0 +1,49 @@
+import csv
+import gzip
+import io
+from datetime import datetime
+from conftest import log_in
+from models import db, WasteCollection
+
+def add_collection(user_id, notes):
+    db.session.add(WasteCollection(user_id=user_id, scheduled_date=datetime(2024, 3, 1), waste_type='Paper',
+                                   quantity=1.0, status='Collected', notes=notes))
+
+def exported_rows(response, compressed=False):
+    assert response.status_code == 200
+    data = response.get_data()
+    if compressed:
+        data = gzip.decompress(data)
+    return list(csv.DictReader(io.StringIO(data.decode('utf-8'))))
+
+def test_export_is_limited_to_the_caller_without_a_token(app, make_user, monkeypatch):
+    alice, bob = make_user('alice'), make_user('bob')
+    with app.app_context():
+        add_collection(alice, 'alice notes')
+        add_collection(bob, 'bob private notes')
+        db.session.commit()
+    monkeypatch.setitem(app.config, 'EXPORT_TOKEN', 'export-secret')
+
+    client = app.test_client()
+    log_in(client, alice)
+    for query in ('', f'?user_id={alice}'):
+        rows = exported_rows(client.get(f'/api/export/waste_collections{query}'))
+        assert [row['notes'] for row in rows] == ['alice notes']
+    rows = exported_rows(client.get('/api/export/waste_collections?gzip=1'), compressed=True)
+    assert {row['user_id'] for row in rows} == {str(alice)}
+
+    for query in (f'?user_id={bob}', '?user_id=all'):
+        assert client.get(f'/api/export/waste_collections{query}').status_code == 403
+        response = client.get(f'/api/export/waste_collections{query}', headers={'X-Export-Token': 'wrong'})
+        assert response.status_code == 403
+
+    response = client.get('/api/export/waste_collections?user_id=all&gzip=1', headers={'X-Export-Token': 'export-secret'})
+    assert {row['user_id'] for row in exported_rows(response, compressed=True)} == {str(alice), str(bob)}
+
+def test_other_users_are_refused_when_no_token_is_configured(app, make_user, monkeypatch):
+    alice = make_user('alice')
+    monkeypatch.setitem(app.config, 'EXPORT_TOKEN', None)
+    client = app.test_client()
+    log_in(client, alice)
+    response = client.get('/api/export/waste_collections?user_id=all', headers={'X-Export-Token': ''})
+    assert response.status_code == 403
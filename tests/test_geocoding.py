@@ -0,0 +1,47 @@
+from geocoding import Geocoder, geocode_service
+from models import db, GeocodeCache
+
+ADDRESS = '12 Main Road, Bengaluru 560001'
+
+class FixedGeocoder(Geocoder):
+    name = 'fixed'
+
+    def __init__(self, points):
+        super().__init__()
+        self.points = points
+        self.calls = 0
+
+    def geocode(self, address):
+        self.calls += 1
+        return self.points.get(address)
+
+def test_miss_is_retried_once_the_geocoder_knows_the_address(app, monkeypatch):
+    with app.app_context():
+        monkeypatch.setattr(geocode_service, 'geocoder', FixedGeocoder({}))
+        assert geocode_service.geocode_many([ADDRESS]) == {ADDRESS: None}
+        db.session.commit()
+        assert GeocodeCache.query.count() == 0
+
+        geocoder = FixedGeocoder({'12 main road bengaluru 560001': (12.97, 77.59)})
+        monkeypatch.setattr(geocode_service, 'geocoder', geocoder)
+        assert geocode_service.geocode_many([ADDRESS]) == {ADDRESS: (12.97, 77.59)}
+        db.session.commit()
+        assert geocoder.calls == 1
+        assert GeocodeCache.query.one().latitude == 12.97
+
+def test_address_stored_concurrently_is_not_a_duplicate(app, monkeypatch):
+    key = '7 lake view chennai 600001'
+
+    class RacingGeocoder(FixedGeocoder):
+        def geocode(self, address):
+            # Another worker caches the same address while this one is geocoding it
+            with db.engine.begin() as connection:
+                connection.execute(GeocodeCache.__table__.insert(),
+                                   {'address_key': key, 'latitude': 13.08, 'longitude': 80.27, 'source': 'other'})
+            return super().geocode(address)
+
+    with app.app_context():
+        monkeypatch.setattr(geocode_service, 'geocoder', RacingGeocoder({key: (13.08, 80.27)}))
+        assert geocode_service.geocode_many(['7 Lake View, Chennai 600001'])['7 Lake View, Chennai 600001'] == (13.08, 80.27)
+        db.session.commit()
+        assert GeocodeCache.query.filter_by(address_key=key).count() == 1
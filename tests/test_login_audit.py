@@ -0,0 +1,32 @@
+import queue
+from login_audit import LoginAuditWriter
+from models import db, UserLogin
+
+def test_full_queue_writes_inline_instead_of_dropping(app, make_user):
+    user_id = make_user()
+    writer = LoginAuditWriter(max_queue=1)
+    writer.init_app(app)
+    writer.enabled = True
+    # A writer thread that has fallen behind: the queue is full and nothing drains it
+    writer._queue = queue.Queue(maxsize=1)
+    writer._queue.put({})
+    writer._thread = object()
+
+    with app.test_request_context():
+        for _ in range(3):
+            writer.record(user_id, '10.0.0.1', 'test', 'failed')
+        assert UserLogin.query.filter_by(user_id=user_id, status='failed').count() == 3
+        db.session.remove()
+    assert writer.stats()['written_inline'] == 3
+    assert writer.stats()['enqueued'] == 0
+
+def test_metrics_need_the_operator_token(app, monkeypatch):
+    client = app.test_client()
+    monkeypatch.setitem(app.config, 'OPS_TOKEN', None)
+    assert client.get('/api/login-audit/metrics', headers={'X-Ops-Token': ''}).status_code == 403
+
+    monkeypatch.setitem(app.config, 'OPS_TOKEN', 'ops-secret')
+    assert client.get('/api/login-audit/metrics').status_code == 403
+    response = client.get('/api/login-audit/metrics', headers={'X-Ops-Token': 'ops-secret'})
+    assert response.status_code == 200
+    assert 'written_inline' in response.get_json()
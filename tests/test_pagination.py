@@ -0,0 +1,24 @@
+from datetime import datetime, timedelta
+from conftest import log_in
+from models import db, UserLogin
+from pagination import clamp_limit, MAX_PER_PAGE
+
+def test_clamp_limit():
+    assert clamp_limit(None, 50) == 50
+    assert clamp_limit(-5, 50) == 1
+    assert clamp_limit(0, 50) == 1
+    assert clamp_limit(10**6, 50) == MAX_PER_PAGE
+    assert clamp_limit(30, 50) == 30
+
+def test_negative_limit_does_not_stream_everything(app, make_user):
+    user_id = make_user()
+    now = datetime.utcnow()
+    with app.app_context():
+        db.session.add_all(UserLogin(user_id=user_id, login_time=now - timedelta(minutes=i)) for i in range(5))
+        db.session.commit()
+
+    client = app.test_client()
+    log_in(client, user_id)
+    lines = client.get('/api/login-history?limit=-1').get_data(as_text=True).splitlines()
+    assert len(lines) == 1
+    assert client.get('/login-history?per_page=-3').status_code == 200
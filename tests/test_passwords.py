@@ -0,0 +1,19 @@
+import time
+import pytest
+from passwords import PasswordHasher, HashingBusy
+
+def test_slow_hash_times_out_as_busy():
+    hasher = PasswordHasher(workers=1, max_pending=1, timeout=0.5)
+    try:
+        started = time.monotonic()
+        with pytest.raises(HashingBusy):
+            hasher._run(time.sleep, 5)
+        assert time.monotonic() - started < 3
+    finally:
+        hasher.shutdown()
+
+def test_full_queue_is_busy():
+    hasher = PasswordHasher(workers=1, max_pending=0, timeout=0.2)
+    hasher._slots.acquire()
+    with pytest.raises(HashingBusy):
+        hasher.verify('pbkdf2:sha256:1000$salt$hash', 'password')
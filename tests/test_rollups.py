@@ -0,0 +1,60 @@
+from datetime import datetime
+from models import db, WasteCollection, WasteRollup, WasteStatistics
+from rollups import record_collection_added, sync_user_statistics, rollups_missing, rebuild_rollups, get_user_totals
+
+def add_collection(user_id, waste_type, quantity, status='Collected'):
+    collection = WasteCollection(user_id=user_id, scheduled_date=datetime.utcnow(), waste_type=waste_type,
+                                 quantity=quantity, status=status)
+    db.session.add(collection)
+    return collection
+
+def test_statistics_are_not_overwritten_before_rollups_are_rebuilt(app, make_user):
+    user_id = make_user()
+    with app.app_context():
+        # History written before the rollups existed
+        add_collection(user_id, 'Paper', 10.0)
+        db.session.add(WasteStatistics(user_id=user_id, waste_type='Total', total_waste=10.0, recycled_waste=0.0,
+                                       date=datetime.utcnow().date()))
+        db.session.commit()
+        assert rollups_missing()
+
+        # The next write only knows about itself
+        record_collection_added(add_collection(user_id, 'Glass', 2.0))
+        assert sync_user_statistics(user_id) is None
+        db.session.commit()
+        assert WasteStatistics.query.filter_by(user_id=user_id).one().total_waste == 10.0
+
+        rebuild_rollups()
+        assert not rollups_missing()
+        assert get_user_totals(user_id) == (12.0, 0.0)
+        sync_user_statistics(user_id)
+        db.session.commit()
+        assert WasteStatistics.query.filter_by(user_id=user_id).one().total_waste == 12.0
+
+def test_new_users_sync_normally(app, make_user):
+    user_id = make_user()
+    with app.app_context():
+        record_collection_added(add_collection(user_id, 'Paper', 3.0, status='Recycled'))
+        stats = sync_user_statistics(user_id)
+        db.session.commit()
+        assert (stats.total_waste, stats.recycled_waste) == (3.0, 3.0)
+        assert WasteRollup.query.filter_by(user_id=user_id).count() == 1
+
+def test_concurrent_first_writes_share_one_rollup(app, make_user, monkeypatch):
+    import rollups
+    user_id = make_user()
+    ensure = rollups._ensure_rollup
+
+    def racing_ensure(*args):
+        # Another worker creates the bucket between our lookup and our insert
+        with db.engine.begin() as connection:
+            connection.execute(WasteRollup.__table__.insert().values(
+                user_id=user_id, waste_type='Paper', status='Collected', total_quantity=4.0, collection_count=1))
+        ensure(*args)
+    monkeypatch.setattr(rollups, '_ensure_rollup', racing_ensure)
+
+    with app.app_context():
+        rollups.apply_collection_delta(user_id, 'Paper', 'Collected', 2.0)
+        db.session.commit()
+        rollup = WasteRollup.query.filter_by(user_id=user_id).one()
+        assert (rollup.total_quantity, rollup.collection_count) == (6.0, 2)
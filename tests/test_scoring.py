@@ -0,0 +1,44 @@
+import json
+import os
+import pytest
+from scoring import RULES_PATH, RulesLoader, ScoringRules
+
+def write_rules(path, **changes):
+    with open(RULES_PATH) as f:
+        data = json.load(f)
+    data.update(changes)
+    with open(path, 'w') as f:
+        json.dump(data, f)
+
+def test_unknown_version_is_rejected():
+    with open(RULES_PATH) as f:
+        data = json.load(f)
+    data['version'] = 2
+    with pytest.raises(ValueError):
+        ScoringRules(data)
+    del data['version']
+    with pytest.raises(ValueError):
+        ScoringRules(data)
+
+def test_reload_keeps_last_good_rules_on_version_mismatch(tmp_path, monkeypatch):
+    path = str(tmp_path / 'rules.json')
+    write_rules(path)
+    loader = RulesLoader(path)
+    rules = loader.get()
+
+    write_rules(path, version=99, recycled_bonus=5)
+    os.utime(path, (0, 0))
+    monkeypatch.setattr(loader, '_checked_at', -1e9)
+    assert loader.get() is rules
+
+def test_reload_keeps_last_good_rules_on_malformed_tables(tmp_path, monkeypatch):
+    path = str(tmp_path / 'rules.json')
+    write_rules(path)
+    loader = RulesLoader(path)
+    rules = loader.get()
+
+    for changes in ({'points_per_kg': ['Plastic', 15]}, {'carbon_factors': 3}, {'waste_type_carbon_activity': [1, 2]}):
+        write_rules(path, **changes)
+        os.utime(path, (0, 0))
+        monkeypatch.setattr(loader, '_checked_at', -1e9)
+        assert loader.get() is rules
@@ -0,0 +1,30 @@
+from datetime import date, datetime
+from types import SimpleNamespace
+from models import db
+from slots import book_slot, release_slot, slot_status
+
+def test_full_slot_refuses_bookings_until_one_is_released(app):
+    day = date(2030, 5, 1)
+    with app.app_context():
+        assert book_slot(day, '560001', 2)
+        assert book_slot(day, '560001', 2)
+        # The conditional UPDATE matches no row once booked reaches capacity
+        assert not book_slot(day, '560001', 2)
+        # Other zones and days have their own slots
+        assert book_slot(day, '560002', 2)
+        db.session.commit()
+        assert slot_status(day, '560001', 2)['available'] == 0
+
+        release_slot(SimpleNamespace(zone='560001', status='Scheduled', pickup_date=datetime(2030, 5, 1, 9)))
+        db.session.commit()
+        assert slot_status(day, '560001', 2)['available'] == 1
+        assert book_slot(day, '560001', 2)
+
+def test_cancelled_or_unzoned_pickups_release_nothing(app):
+    day = date(2030, 5, 2)
+    with app.app_context():
+        assert book_slot(day, '560001', 1)
+        release_slot(SimpleNamespace(zone='560001', status='Cancelled', pickup_date=datetime(2030, 5, 2)))
+        release_slot(SimpleNamespace(zone=None, status='Scheduled', pickup_date=datetime(2030, 5, 2)))
+        db.session.commit()
+        assert slot_status(day, '560001', 1)['booked'] == 1
@@ -0,0 +1,12 @@
+import pytest
+
+@pytest.mark.parametrize('bbox', ['nan,77.5,13.1,77.7', '12.9,-inf,13.1,77.7', '12.9,77.5,inf,77.7', '12.9,77.5,13.1,1e400'])
+def test_non_finite_bbox_is_rejected(app, bbox):
+    response = app.test_client().get(f'/api/centers/clusters?bbox={bbox}&zoom=12')
+    assert response.status_code == 400
+    assert 'finite' in response.get_json()['error']
+
+def test_valid_bbox_returns_clusters(app):
+    response = app.test_client().get('/api/centers/clusters?bbox=12.9,77.5,13.1,77.7&zoom=12')
+    assert response.status_code == 200
+    assert response.get_json()['zoom'] == 12
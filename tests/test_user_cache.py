@@ -0,0 +1,34 @@
+from conftest import log_in
+from models import db, User
+from user_cache import user_cache
+
+def test_points_update_keeps_changes_made_elsewhere(app, make_user):
+    user_id = make_user()
+    client = app.test_client()
+    log_in(client, user_id)
+    # Warm the cache with points=0
+    assert client.get('/api/waste-stats').status_code == 200
+    assert client.get('/api/leaderboard').status_code == 200
+
+    # Another worker commits points this process's cache does not know about
+    with app.app_context():
+        db.session.execute(User.__table__.update().where(User.id == user_id).values(points=100))
+        db.session.commit()
+
+    response = client.post('/add-waste-details', data={'waste_type': 'Paper', 'quantity': '2', 'status': 'Pending'})
+    assert response.status_code == 302
+    with app.app_context():
+        points = db.session.get(User, user_id).points
+    assert points > 100
+    # The leaderboard sees the incremented total, not the SQL expression
+    assert client.get('/api/leaderboard').get_json()['me']['points'] == points
+
+def test_password_hash_is_not_cached(app, make_user):
+    user_id = make_user()
+    with app.test_request_context():
+        user_cache.load(user_id)
+        version, _, data = user_cache._entries[user_id]
+        assert 'password_hash' not in data
+        db.session.remove()
+        # A cached user still checks passwords, loading the hash on demand
+        assert user_cache.load(user_id).check_password('password123')
@@ -0,0 +1,21 @@
+from datetime import datetime, timedelta
+from models import db, WasteCollection
+from waste_charts import waste_time_series
+
+def test_series_buckets_by_scheduled_date(app, make_user):
+    user_id = make_user()
+    now = datetime.utcnow()
+    scheduled = now - timedelta(days=40)
+    with app.app_context():
+        # Entered today for a collection that happened weeks ago
+        db.session.add(WasteCollection(user_id=user_id, scheduled_date=scheduled, waste_type='Paper',
+                                       quantity=2.0, status='Collected', created_at=now))
+        # Scheduled before the daily window, so only the monthly series shows it
+        db.session.add(WasteCollection(user_id=user_id, scheduled_date=now - timedelta(days=200), waste_type='Glass',
+                                       quantity=1.0, status='Collected', created_at=now))
+        db.session.commit()
+
+        daily = waste_time_series(user_id, 'daily')
+        assert daily['periods'] == [scheduled.strftime('%Y-%m-%d')]
+        assert daily['traces'] == [{'name': 'Paper', 'x': daily['periods'], 'y': [2.0]}]
+        assert len(waste_time_series(user_id, 'monthly')['traces']) == 2
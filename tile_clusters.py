@@ -0,0 +1,103 @@
+import math
+import threading
+from collections import OrderedDict
+from spatial_index import center_index
+
+# Each 256px tile is split into CLUSTER_GRID x CLUSTER_GRID cells (32px clusters)
+CLUSTER_GRID = 8
+# From this zoom level on every center is returned as its own marker
+MAX_CLUSTER_ZOOM = 16
+MAX_ZOOM = 20
+MAX_LAT = 85.0511287798
+
+def tile_to_lng(x, z):
+    return x / (2 ** z) * 360.0 - 180.0
+
+def tile_to_lat(y, z):
+    return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / (2 ** z)))))
+
+def lng_to_tile_x(lng, z):
+    return (lng + 180.0) / 360.0 * (2 ** z)
+
+def lat_to_tile_y(lat, z):
+    lat = max(min(lat, MAX_LAT), -MAX_LAT)
+    lat_rad = math.radians(lat)
+    return (1 - math.log(math.tan(lat_rad) + 1 / math.cos(lat_rad)) / math.pi) / 2 * (2 ** z)
+
+def tile_bounds(z, x, y):
+    """Return (south, west, north, east) for a slippy-map tile"""
+    return tile_to_lat(y + 1, z), tile_to_lng(x, z), tile_to_lat(y, z), tile_to_lng(x + 1, z)
+
+def tiles_for_bbox(south, west, north, east, z):
+    last = 2 ** z - 1
+    min_x = max(int(lng_to_tile_x(west, z)), 0)
+    max_x = min(int(lng_to_tile_x(east, z)), last)
+    min_y = max(int(lat_to_tile_y(north, z)), 0)
+    max_y = min(int(lat_to_tile_y(south, z)), last)
+    return [(z, x, y) for x in range(min_x, max_x + 1) for y in range(min_y, max_y + 1)]
+
+def cluster_tile(grid, z, x, y):
+    """Group the centers in one tile into cluster aggregates"""
+    last = 2 ** z - 1
+    buckets = {}
+    for lat, lng, center in grid.within_bbox(*tile_bounds(z, x, y)):
+        tile_x = lng_to_tile_x(lng, z)
+        tile_y = lat_to_tile_y(lat, z)
+        # Centers on a tile edge belong to exactly one tile
+        if min(int(tile_x), last) != x or min(int(tile_y), last) != y:
+            continue
+        if z >= MAX_CLUSTER_ZOOM:
+            key = center['id']
+        else:
+            key = (int((tile_x - x) * CLUSTER_GRID), int((tile_y - y) * CLUSTER_GRID))
+        bucket = buckets.setdefault(key, {'count': 0, 'lat_sum': 0.0, 'lng_sum': 0.0, 'center': center})
+        bucket['count'] += 1
+        bucket['lat_sum'] += lat
+        bucket['lng_sum'] += lng
+
+    clusters = []
+    for bucket in buckets.values():
+        if bucket['count'] == 1:
+            clusters.append({'type': 'center', 'count': 1, **bucket['center']})
+        else:
+            clusters.append({
+                'type': 'cluster',
+                'count': bucket['count'],
+                'latitude': bucket['lat_sum'] / bucket['count'],
+                'longitude': bucket['lng_sum'] / bucket['count']
+            })
+    return clusters
+
+class TileCache:
+    """LRU cache of clustered tiles, cleared whenever the center index is rebuilt"""
+
+    def __init__(self, max_tiles=4096):
+        self.max_tiles = max_tiles
+        self._tiles = OrderedDict()
+        self._grid = None
+        self._lock = threading.Lock()
+
+    def get(self, z, x, y):
+        grid = center_index.get()
+        key = (z, x, y)
+        with self._lock:
+            if grid is not self._grid:
+                self._tiles.clear()
+                self._grid = grid
+            if key in self._tiles:
+                self._tiles.move_to_end(key)
+                return self._tiles[key]
+
+        clusters = cluster_tile(grid, z, x, y)
+        with self._lock:
+            if grid is self._grid:
+                self._tiles[key] = clusters
+                while len(self._tiles) > self.max_tiles:
+                    self._tiles.popitem(last=False)
+        return clusters
+
+    def clear(self):
+        with self._lock:
+            self._tiles.clear()
+
+tile_cache = TileCache()
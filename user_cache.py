@@ -0,0 +1,183 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+from models import db, User
+from app_logging import get_logger
+
+logger = get_logger('user_cache')
+
+# Never cached, and loaded from the database on first access when needed
+UNCACHED_COLUMNS = ('password_hash',)
+
+def user_to_dict(user):
+    data = {}
+    for column in User.__table__.columns:
+        if column.key in UNCACHED_COLUMNS:
+            continue
+        value = getattr(user, column.key)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        data[column.key] = value
+    return data
+
+def user_from_dict(data):
+    """Attach a cached user to the session without querying the database"""
+    values = dict(data)
+    if values.get('created_at'):
+        values['created_at'] = datetime.fromisoformat(values['created_at'])
+    user = User(**values)
+    make_transient_to_detached(user)
+    # load=False reuses the instance if this request already loaded the row
+    return db.session.merge(user, load=False)
+
+class RedisBackend:
+    """Shares cached users and their versions between gunicorn workers"""
+
+    def __init__(self, url, ttl_seconds):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+
+    def version(self, user_id):
+        return int(self.client.get(f'user:ver:{user_id}') or 0)
+
+    def bump(self, user_id):
+        return self.client.incr(f'user:ver:{user_id}')
+
+    def get(self, user_id, version):
+        raw = self.client.get(f'user:data:{user_id}:{version}')
+        return json.loads(raw) if raw else None
+
+    def set(self, user_id, version, data):
+        self.client.set(f'user:data:{user_id}:{version}', json.dumps(data), ex=max(int(self.ttl_seconds), 1))
+
+class UserCache:
+    """Short-TTL LRU of User rows keyed by id, used by load_user.
+
+    Every entry carries the user's version at load time. Writes to User in
+    this process bump the version, so the next lookup misses and reloads.
+    With USER_CACHE_REDIS_URL set, versions and rows are also shared through
+    Redis and writes in one worker invalidate every worker; otherwise other
+    workers see a change once the TTL runs out.
+    """
+
+    def __init__(self, maxsize=10000, ttl_seconds=30):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.enabled = True
+        self.backend = None
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.metrics = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    def init_app(self, app):
+        self.maxsize = app.config.get('USER_CACHE_SIZE', self.maxsize)
+        self.ttl_seconds = app.config.get('USER_CACHE_TTL', self.ttl_seconds)
+        self.enabled = self.ttl_seconds > 0 and self.maxsize > 0
+        redis_url = app.config.get('USER_CACHE_REDIS_URL')
+        if self.enabled and redis_url:
+            try:
+                self.backend = RedisBackend(redis_url, self.ttl_seconds)
+            except ImportError:
+                logger.warning("USER_CACHE_REDIS_URL is set but the redis package is not installed, "
+                               "caching users in-process only")
+
+    def _version(self, user_id):
+        if self.backend is not None:
+            try:
+                return self.backend.version(user_id)
+            except Exception as e:
+                logger.warning("User cache backend unavailable: %s", e)
+        return self._versions.get(user_id, 0)
+
+    def _get_cached(self, user_id, version):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                entry_version, expires_at, data = entry
+                if entry_version == version and time.monotonic() < expires_at:
+                    self._entries.move_to_end(user_id)
+                    return data
+                del self._entries[user_id]
+
+        if self.backend is not None:
+            try:
+                data = self.backend.get(user_id, version)
+            except Exception as e:
+                logger.warning("User cache backend unavailable: %s", e)
+                data = None
+            if data is not None:
+                self._store(user_id, version, data)
+                return data
+        return None
+
+    def _store(self, user_id, version, data):
+        with self._lock:
+            self._entries[user_id] = (version, time.monotonic() + self.ttl_seconds, data)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def load(self, user_id):
+        if not self.enabled:
+            return db.session.get(User, user_id)
+
+        # Read the version before the row so a concurrent write leaves this entry stale
+        version = self._version(user_id)
+        data = self._get_cached(user_id, version)
+        if data is not None:
+            self.metrics['hits'] += 1
+            return user_from_dict(data)
+
+        self.metrics['misses'] += 1
+        user = db.session.get(User, user_id)
+        if user is not None:
+            data = user_to_dict(user)
+            self._store(user_id, version, data)
+            if self.backend is not None:
+                try:
+                    self.backend.set(user_id, version, data)
+                except Exception as e:
+                    logger.warning("User cache backend unavailable: %s", e)
+        return user
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            self._entries.pop(user_id, None)
+        self.metrics['invalidations'] += 1
+        if self.backend is not None:
+            try:
+                self.backend.bump(user_id)
+            except Exception as e:
+                logger.warning("User cache backend unavailable: %s", e)
+
+    def stats(self):
+        stats = dict(self.metrics)
+        stats['size'] = len(self._entries)
+        stats['shared'] = self.backend is not None
+        return stats
+
+user_cache = UserCache()
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _invalidate_user(mapper, connection, target):
+    user_cache.invalidate(target.id)
+    # Bump again after commit: a request that reloaded the row between the
+    # flush and the commit would otherwise cache the old values
+    object_session(target).info.setdefault('user_cache_dirty', set()).add(target.id)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    for user_id in session.info.pop('user_cache_dirty', ()):
+        user_cache.invalidate(user_id)
+
+@event.listens_for(Session, 'after_rollback')
+def _clear_after_rollback(session):
+    session.info.pop('user_cache_dirty', None)
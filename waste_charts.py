@@ -0,0 +1,123 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from sqlalchemy import event, func
+from models import db, WasteCollection, WasteRollup
+
+# Bucket name -> days of history included (None for the full history)
+BUCKETS = {
+    'daily': 90,
+    'weekly': 365,
+    'monthly': None,
+}
+
+def waste_type_distribution(user_id):
+    """Collection count and kg per waste type over the user's full history, from the rollups"""
+    rows = db.session.query(
+        WasteRollup.waste_type,
+        func.sum(WasteRollup.collection_count),
+        func.sum(WasteRollup.total_quantity)
+    ).filter(
+        WasteRollup.user_id == user_id
+    ).group_by(WasteRollup.waste_type).order_by(WasteRollup.waste_type).all()
+
+    rows = [row for row in rows if row[1] > 0]
+    return {
+        'labels': [row[0] for row in rows],
+        'counts': [int(row[1]) for row in rows],
+        'quantities': [round(float(row[2]), 2) for row in rows],
+    }
+
+def bucket_expression(bucket, column):
+    """SQL expression for the first day of the bucket a timestamp falls in, as YYYY-MM-DD"""
+    if db.engine.dialect.name == 'sqlite':
+        if bucket == 'daily':
+            return func.date(column)
+        if bucket == 'weekly':
+            # Monday of the week
+            return func.date(column, '-6 days', 'weekday 1')
+        return func.strftime('%Y-%m-01', column)
+    return func.to_char(func.date_trunc({'daily': 'day', 'weekly': 'week', 'monthly': 'month'}[bucket], column),
+                        'YYYY-MM-DD')
+
+def waste_time_series(user_id, bucket):
+    """kg per waste type per day/week/month, one Plotly trace per waste type.
+
+    Bucketed by scheduled_date, the same day the carbon ledger books a
+    collection under, so the chart and the carbon totals agree.
+    """
+    period = bucket_expression(bucket, WasteCollection.scheduled_date).label('period')
+    query = db.session.query(
+        period,
+        WasteCollection.waste_type,
+        func.sum(WasteCollection.quantity)
+    ).filter(WasteCollection.user_id == user_id)
+    if BUCKETS[bucket] is not None:
+        query = query.filter(WasteCollection.scheduled_date >= datetime.utcnow() - timedelta(days=BUCKETS[bucket]))
+    rows = query.group_by(period, WasteCollection.waste_type).order_by(period).all()
+
+    periods = sorted({row[0] for row in rows})
+    position = {value: index for index, value in enumerate(periods)}
+    traces = {}
+    for value, waste_type, quantity in rows:
+        trace = traces.setdefault(waste_type, [0.0] * len(periods))
+        trace[position[value]] = round(float(quantity), 2)
+    return {
+        'bucket': bucket,
+        'periods': periods,
+        'traces': [{'name': name, 'x': periods, 'y': values} for name, values in sorted(traces.items())],
+    }
+
+class ChartCache:
+    """Per-user LRU of chart data.
+
+    Rollup writes for a user in this process bump that user's version and
+    drop their entries; the TTL picks up writes made by other workers.
+    """
+
+    def __init__(self, maxsize=5000, ttl_seconds=300):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+
+    def get(self, user_id, kind, build):
+        key = (user_id, kind)
+        with self._lock:
+            version = self._versions.get(user_id, 0)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version and time.monotonic() < entry[1]:
+                self._entries.move_to_end(key)
+                return entry[2]
+
+        data = build()
+        with self._lock:
+            # Stored under the version read before building, so a write during the build leaves it stale
+            self._entries[key] = (version, time.monotonic() + self.ttl_seconds, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return data
+
+    def distribution(self, user_id):
+        return self.get(user_id, 'distribution', lambda: waste_type_distribution(user_id))
+
+    def series(self, user_id, bucket):
+        return self.get(user_id, f'series:{bucket}', lambda: waste_time_series(user_id, bucket))
+
+chart_cache = ChartCache()
+
+# ORM writes to WasteCollection go through the rollups (see rollups.py) and land here.
+# Core writes skip these events: bulk_ingest.py invalidates its users itself, and
+# rebuild_rollups() runs offline and relies on the cache TTL.
+@event.listens_for(WasteRollup, 'after_insert')
+@event.listens_for(WasteRollup, 'after_update')
+@event.listens_for(WasteRollup, 'after_delete')
+def _invalidate_user_charts(mapper, connection, target):
+    chart_cache.invalidate(target.user_id)